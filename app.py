@@ -1,25 +1,32 @@
 import os
-import msgspec
 import logging
 from flask import Flask, jsonify
 from flask_login import LoginManager
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
 from flasgger import Swagger
 from flask_swagger_ui import get_swaggerui_blueprint
 from flask_migrate import Migrate
 from flask_mail import Mail, Message 
 from dotenv import load_dotenv
-from extensions import db, migrate, csrf 
-from routes import main_blueprint, auth_blueprint
+from extensions import db, migrate, csrf, mail, limiter
+from routes import main_blueprint, auth_blueprint, api_blueprint
 from redis import Redis
-from limits.storage import RedisStorage
-from extensions import init_session
+from extensions import init_session, init_celery
+from memo_cache import init_cache, cache_stats
+from query_stats import init_query_stats
+from notifications import init_notifications
+from audit import init_audit
+from table_versions import init_table_versions
+from rate_limiting import init_rate_limiting, rate_limit_stats
+from database import configure_engines, init_database, pool_stats
+from serializers import MsgspecJSONProvider
+from exports import export_requests_command
+from bulk_import import import_requests_command
 import redis
 from waitress import serve
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models import (
     User, Branch, Department, Role, Expense, CashAdvance, OpexCapexRetirement,
     PettyCashAdvance, PettyCashRetirement, StationaryRequest, Notification,
@@ -60,11 +67,16 @@ def ensure_directory_exists(directory):
         except Exception as e:
             logging.error(f"Failed to create directory '{directory}': {e}")
 
-# Rate limiter setup
-limiter = Limiter(key_func=get_remote_address, storage_uri=redis_url)
-
 def create_app():
     app = Flask(__name__)
+    # jsonify() and request.get_json() go through msgspec
+    app.json = MsgspecJSONProvider(app)
+    # Behind Render's proxy, take the client address and scheme from the
+    # X-Forwarded-* headers set by the trusted proxy hops, so rate limits
+    # are keyed on the real client instead of the proxy
+    trusted_proxies = int(os.getenv('TRUSTED_PROXY_COUNT', '1'))
+    if trusted_proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies, x_host=trusted_proxies)
 
 # App configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
@@ -74,17 +86,63 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'eKM_5eCur3t-K3y#2024!')
 
+    # Mail configuration (used by the background outbox worker)
+    app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.example.com')
+    app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', '587'))
+    app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
+    app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER', 'your_email@example.com')
+
+    # Rate limiting (shared across workers through Redis)
+    app.config['RATELIMIT_STORAGE_URI'] = os.getenv('RATELIMIT_STORAGE_URI', redis_url)
+
+    # Celery configuration (outbound mail queue)
+    app.config['CELERY'] = {
+        'broker_url': os.getenv('CELERY_BROKER_URL', redis_url),
+        'task_ignore_result': True,
+        'task_acks_late': True,
+        'beat_schedule': {
+            # Sweep the outbox for retries and for anything queued while the broker was down
+            'drain-email-outbox': {
+                'task': 'mail_queue.drain_outbox',
+                'schedule': float(os.getenv('OUTBOX_SWEEP_SECONDS', '30')),
+            },
+            # Write buffered audit events that did not fill a batch
+            'flush-audit-buffer': {
+                'task': 'audit.flush_buffer',
+                'schedule': float(os.getenv('AUDIT_FLUSH_SECONDS', '5')),
+            },
+            'ensure-audit-partitions': {
+                'task': 'audit.ensure_partitions',
+                'schedule': 24 * 60 * 60.0,
+            },
+        },
+    }
+
 
     # Ensure directories exist
     ensure_directory_exists("uploads/receipts")
     ensure_directory_exists("uploads/docs")
+    ensure_directory_exists("uploads/blobs")
 
     # Initialize extensions
+    configure_engines(app)
     db.init_app(app)
-    init_session(app)
+    init_database(app)
+    # Sessions are stored as msgpack bytes, so they need a client that does not decode responses
+    init_session(app, create_redis_client(redis_url, decode_responses=False) if redis_client else None)
     migrate.init_app(app, db)
     csrf.init_app(app)
+    mail.init_app(app)
+    init_celery(app)
+    init_cache(redis_client)
+    init_notifications(redis_client)
+    init_audit(redis_client)
+    init_table_versions(redis_client)
+    init_query_stats(app)
     CORS(app, resources={r"/*": {"origins": "*"}})
+    init_rate_limiting(app)
     limiter.init_app(app)
 
     # Initialize LoginManager
@@ -107,6 +165,11 @@ def create_app():
     # Register blueprints
     app.register_blueprint(main_blueprint, url_prefix='/main')
     app.register_blueprint(auth_blueprint, url_prefix='/api/auth')
+    app.register_blueprint(api_blueprint, url_prefix='/api')
+
+    # CLI commands
+    app.cli.add_command(export_requests_command)
+    app.cli.add_command(import_requests_command)
 
     # Swagger setup
     SWAGGER_URL = '/swagger'
@@ -142,6 +205,30 @@ def create_app():
         except Exception as e:
             return {"error": str(e)}, 500
 
+    # Cache statistics endpoint
+    @app.route('/healthcheck/cache')
+    def cache_healthcheck():
+        """
+        Hit/miss counters of the memoized lookups in this worker process.
+        """
+        return {"backend": "redis" if redis_client else "local", "namespaces": cache_stats()}, 200
+
+    # Connection pool statistics endpoint
+    @app.route('/healthcheck/db_pool')
+    def db_pool_healthcheck():
+        """
+        Pool occupancy and checkout wait times per engine in this worker process.
+        """
+        return {"engines": pool_stats()}, 200
+
+    # Rate limit statistics endpoint
+    @app.route('/healthcheck/ratelimit')
+    def ratelimit_healthcheck():
+        """
+        Requests rejected per limit scope in this worker process, by the local early-reject filter or Redis.
+        """
+        return {"rejected": rate_limit_stats()}, 200
+
     # Home route
     @app.route('/')
     def home():
@@ -0,0 +1,326 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from celery import shared_task
+from flask import has_request_context, session as flask_session
+import msgspec
+from redis.exceptions import RedisError
+from sqlalchemy import and_, event, insert, inspect, or_, text
+from sqlalchemy.exc import DataError, IntegrityError
+from extensions import db
+from models import (
+    AuditLog, CashAdvance, OpexCapexRetirement, PettyCashAdvance,
+    PettyCashRetirement, StationaryRequest
+)
+from utils import encode_cursor, decode_cursor
+
+# Audit events are collected on the session, handed to a buffer when the
+# transaction commits and written to audit_logs in multi-row INSERTs, so the
+# request path never pays for an extra INSERT per action.
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_SECONDS = float(os.getenv('AUDIT_FLUSH_SECONDS', '5'))
+AUDIT_QUERY_DEFAULT_DAYS = int(os.getenv('AUDIT_QUERY_DEFAULT_DAYS', '90'))
+BUFFER_KEY = 'audit:buffer'
+# Events the database rejects (e.g. an unknown performed_by) are moved here
+# with the error, so they are kept for inspection without blocking the buffer
+DEAD_LETTER_KEY = 'audit:dead_letter'
+
+# Models whose creation and status changes are audited automatically
+AUDITED_MODELS = (CashAdvance, OpexCapexRetirement, PettyCashAdvance, PettyCashRetirement, StationaryRequest)
+
+# Shared Redis client; set by init_audit() in create_app. Without Redis the
+# buffer is per process and flushed inline once it is full or old enough.
+_redis = None
+
+_lock = threading.Lock()
+_local_buffer = []
+_last_flush = time.monotonic()
+
+
+def init_audit(redis_client):
+    global _redis
+    _redis = redis_client
+
+
+def record(action, entity_type, entity_id, performed_by, session=None):
+    """Queue an audit event that is kept only if the current transaction commits."""
+    session = session or db.session()
+    session.info.setdefault('audit_events', []).append({
+        'action': action,
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'performed_by': performed_by,
+        'performed_at': datetime.utcnow().isoformat(),
+    })
+
+
+def log_event(action, entity_type, entity_id, performed_by):
+    """Buffer an audit event immediately, for actions outside a write transaction (e.g. login)."""
+    _buffer([{
+        'action': action,
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'performed_by': performed_by,
+        'performed_at': datetime.utcnow().isoformat(),
+    }])
+
+
+def _buffer(events):
+    if _redis is not None:
+        try:
+            length = _redis.rpush(BUFFER_KEY, *[msgspec.json.encode(e) for e in events])
+            if length >= AUDIT_BATCH_SIZE:
+                try:
+                    flush_buffer_task.delay()
+                except Exception as e:
+                    logging.warning(f"Could not dispatch audit flush task: {e}")
+            return
+        except RedisError as e:
+            logging.warning(f"Audit buffer write failed, keeping events locally: {e}")
+
+    with _lock:
+        _local_buffer.extend(events)
+        due = len(_local_buffer) >= AUDIT_BATCH_SIZE or time.monotonic() - _last_flush >= AUDIT_FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def _take_batch():
+    """Remove up to AUDIT_BATCH_SIZE events from the buffer.
+
+    Events kept locally while Redis was unreachable are taken first.
+    """
+    global _last_flush
+    with _lock:
+        if _local_buffer or _redis is None:
+            batch = _local_buffer[:AUDIT_BATCH_SIZE]
+            del _local_buffer[:AUDIT_BATCH_SIZE]
+            _last_flush = time.monotonic()
+            return batch, False
+
+    try:
+        pipe = _redis.pipeline(transaction=True)
+        pipe.lrange(BUFFER_KEY, 0, AUDIT_BATCH_SIZE - 1)
+        pipe.ltrim(BUFFER_KEY, AUDIT_BATCH_SIZE, -1)
+        raw, _ = pipe.execute()
+        return [msgspec.json.decode(item) for item in raw], True
+    except RedisError as e:
+        logging.warning(f"Audit buffer read failed: {e}")
+        return [], False
+
+
+def _return_batch(batch, from_redis):
+    """Put a batch back after a failed write so it is retried on the next flush.
+
+    Events that cannot be pushed back to Redis are kept in the local buffer.
+    """
+    batch = [dict(e, performed_at=e['performed_at'].isoformat()) for e in batch]
+    if from_redis:
+        try:
+            _redis.rpush(BUFFER_KEY, *[msgspec.json.encode(e) for e in batch])
+            return
+        except RedisError as e:
+            logging.error(f"Audit buffer write failed, keeping {len(batch)} events locally: {e}")
+    with _lock:
+        _local_buffer[:0] = batch
+
+
+def _dead_letter(event_row, error):
+    """Set aside an event the database rejects, logging it with the error."""
+    payload = msgspec.json.encode(dict(event_row, error=str(error).splitlines()[0]))
+    logging.error(f"Audit event rejected by the database: {payload.decode()}")
+    if _redis is not None:
+        try:
+            _redis.rpush(DEAD_LETTER_KEY, payload)
+        except RedisError as e:
+            logging.error(f"Audit dead-letter write failed: {e}")
+
+
+def _write_batch(batch):
+    """Insert events in one multi-row INSERT.
+
+    When the database rejects the batch, it is split in halves until the
+    offending events are isolated; those are dead-lettered and the rest
+    written. Any other error (e.g. a lost connection) stops the write.
+
+    Returns:
+        tuple: (number of events written, events left unwritten by an error)
+    """
+    written = 0
+    pending = [batch]
+    while pending:
+        chunk = pending.pop()
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(AuditLog), chunk)
+        except (IntegrityError, DataError) as e:
+            if len(chunk) == 1:
+                _dead_letter(chunk[0], e.orig)
+            else:
+                middle = len(chunk) // 2
+                pending += [chunk[middle:], chunk[:middle]]
+            continue
+        except Exception as e:
+            logging.error(f"Error writing {len(chunk)} audit events: {e}")
+            return written, [event_row for rest in (chunk, *reversed(pending)) for event_row in rest]
+        written += len(chunk)
+    return written, []
+
+
+def flush():
+    """Write buffered events to audit_logs in multi-row INSERTs until the buffer is empty.
+
+    Uses its own connection, so it is safe to call while a request session
+    is active.
+
+    Returns:
+        int: The number of events written.
+    """
+    written = 0
+    while True:
+        batch, from_redis = _take_batch()
+        if not batch:
+            return written
+        for event_row in batch:
+            event_row['performed_at'] = datetime.fromisoformat(event_row['performed_at'])
+        count, unwritten = _write_batch(batch)
+        written += count
+        if unwritten:
+            _return_batch(unwritten, from_redis)
+            return written
+        # A short batch from Redis means it is drained; a local one may be
+        # followed by events in Redis
+        if from_redis and len(batch) < AUDIT_BATCH_SIZE:
+            return written
+
+
+@shared_task(name='audit.flush_buffer', ignore_result=True)
+def flush_buffer_task():
+    """Celery task: write the shared audit buffer to the database."""
+    flush()
+
+
+@shared_task(name='audit.ensure_partitions', ignore_result=True)
+def ensure_partitions_task():
+    """Celery task: keep monthly audit_logs partitions created ahead of time."""
+    ensure_partitions()
+
+
+def ensure_partitions(months_ahead=3):
+    """Create the monthly audit_logs partitions for the coming months (PostgreSQL only).
+
+    Rows already written to audit_logs_default for a month are moved into
+    the new partition: the default partition is detached while the month's
+    partition is created and filled, then reattached, all in one transaction
+    per month. A month that cannot be created is logged and skipped.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+    month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(months_ahead + 1):
+        following = (month + timedelta(days=32)).replace(day=1)
+        try:
+            _create_partition(month, following)
+        except Exception as e:
+            logging.error(f"Error creating audit_logs partition for {month:%Y-%m}: {e}")
+        month = following
+
+
+def _create_partition(month, following):
+    partition = f"audit_logs_{month:%Y_%m}"
+    bounds = {'start': month, 'end': following}
+    with db.engine.begin() as connection:
+        if connection.execute(text("SELECT to_regclass(:name)"), {'name': partition}).scalar() is not None:
+            return
+        connection.execute(text("ALTER TABLE audit_logs DETACH PARTITION audit_logs_default"))
+        connection.execute(text(
+            f"CREATE TABLE {partition} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+        ))
+        # With the default detached, rows inserted through the parent land in the new partition
+        connection.execute(text(
+            "INSERT INTO audit_logs SELECT * FROM audit_logs_default "
+            "WHERE performed_at >= :start AND performed_at < :end"
+        ), bounds)
+        connection.execute(text(
+            "DELETE FROM audit_logs_default WHERE performed_at >= :start AND performed_at < :end"
+        ), bounds)
+        connection.execute(text("ALTER TABLE audit_logs ATTACH PARTITION audit_logs_default DEFAULT"))
+
+
+def query_audit_log(entity_type=None, entity_id=None, performed_by=None,
+                    since=None, until=None, cursor=None, limit=50):
+    """Fetch one page of audit events, newest first.
+
+    The time range defaults to the last AUDIT_QUERY_DEFAULT_DAYS days so
+    PostgreSQL only scans the matching monthly partitions, and each filter
+    combination is served by the (entity_type, entity_id, performed_at) or
+    (performed_by, performed_at) index.
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=AUDIT_QUERY_DEFAULT_DAYS)
+    query = AuditLog.query.filter(AuditLog.performed_at >= since, AuditLog.performed_at <= until)
+    if entity_type is not None:
+        query = query.filter(AuditLog.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    if performed_by is not None:
+        query = query.filter(AuditLog.performed_by == performed_by)
+    if cursor:
+        before_at, before_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            AuditLog.performed_at < before_at,
+            and_(AuditLog.performed_at == before_at, AuditLog.id < before_id)
+        ))
+
+    rows = query.order_by(AuditLog.performed_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].performed_at, rows[-1].id)
+
+
+# Capture: creations and ORM status changes of audited models are recorded
+# from the flush; bulk transitions in workflow.py call record() directly.
+def _current_user_id():
+    if has_request_context():
+        return flask_session.get('user_id')
+    return None
+
+
+@event.listens_for(db.session, 'after_flush')
+def _capture_changes(session, flush_context):
+    user_id = _current_user_id()
+    if user_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, AUDITED_MODELS):
+            record('Created', type(obj).__name__, obj.id, user_id, session=session)
+    for obj in session.dirty:
+        if isinstance(obj, AUDITED_MODELS):
+            history = inspect(obj).attrs.status.history
+            if history.deleted and history.added:
+                record(
+                    f"Status changed from {history.deleted[0]} to {history.added[0]}",
+                    type(obj).__name__, obj.id, user_id, session=session
+                )
+
+
+@event.listens_for(db.session, 'after_commit')
+def _buffer_on_commit(session):
+    events = session.info.pop('audit_events', None)
+    if events:
+        _buffer(events)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_audit_events(session):
+    session.info.pop('audit_events', None)
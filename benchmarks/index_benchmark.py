@@ -0,0 +1,218 @@
+"""Index benchmark for the hot request-table queries.
+
+Seeds a local stand-in database (SQLite by default, or any URL given with
+--database-url, e.g. a local Postgres) with synthetic requests and
+notifications, then runs the statements routes.py issues, built with the same
+helpers (keyset_page, inbox_statement, requests_statement), twice: once with
+primary keys only and once with the composite indexes declared in models.py.
+For every query it prints the EXPLAIN plan and p50/p95 latency.
+
+Usage:
+    python benchmarks/index_benchmark.py --rows 1000000
+    python benchmarks/index_benchmark.py --database-url postgresql+pg8000://localhost/bench --json results.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, Index, MetaData, Table, create_engine, desc, select, text
+from models import (
+    CashAdvance, OpexCapexRetirement, PettyCashAdvance, PettyCashRetirement,
+    StationaryRequest, Notification, User, ExpenseStatus
+)
+from inbox import inbox_statement
+from request_listing import parse_fields, parse_sort, requests_statement
+from routes import DEFAULT_REVIEW_TYPES, REQUEST_TYPES
+from utils import encode_cursor, keyset_page
+from workflow import QUEUE_STATUS
+
+MODELS = [CashAdvance, OpexCapexRetirement, PettyCashAdvance, PettyCashRetirement, StationaryRequest, Notification, User]
+BRANCHES = [f"Branch {i}" for i in range(18)]
+DEPARTMENTS = ["HR/Admin", "Account", "Risk/Compliance", "IT", "Audit", "Fund transfer",
+               "Credit", "Recovery", "E-Business", "Legal", "Strategic Branding/Communications"]
+# Most requests have finished the workflow; a few sit in each review queue
+STATUSES = (
+    [ExpenseStatus.PENDING.value] * 2 + [ExpenseStatus.AUTHORIZED_BY_SUPERVISOR.value]
+    + [ExpenseStatus.REVIEWED_BY_REVIEWER.value] + [ExpenseStatus.APPROVED_BY_APPROVER.value] * 2
+    + [ExpenseStatus.PAYMENT_REQUESTED.value] * 3 + [ExpenseStatus.RETURNED_TO_OFFICER.value]
+)
+USERS = 5000
+BATCH_SIZE = 10000
+
+
+def build_schema():
+    """Mirror the model tables without foreign keys or secondary indexes.
+
+    Returns the stand-in metadata and (name, table, columns) specs of the
+    composite indexes declared on the models, created only for the "after" run.
+    """
+    metadata = MetaData()
+    indexes = []
+    for model in MODELS:
+        source = model.__table__
+        table = Table(source.name, metadata, *[
+            Column(column.name, column.type, primary_key=column.primary_key) for column in source.columns
+        ])
+        for index in source.indexes:
+            indexes.append((index.name, table, [column.name for column in index.columns]))
+    return metadata, indexes
+
+
+def seed(engine, metadata, rows):
+    """Insert `rows` synthetic rows spread over the request tables and notifications."""
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    request_tables = [t for t in metadata.sorted_tables if t.name not in ('users', 'notifications')]
+    per_table = rows // (len(request_tables) + 1)
+
+    def stamp():
+        return start + timedelta(minutes=rng.randrange(60 * 24 * 365 * 5))
+
+    with engine.begin() as connection:
+        users = metadata.tables['users']
+        connection.execute(users.insert(), [{
+            'id': i, 'username': f"user{i}", 'email': f"user{i}@example.com", 'first_name': "Bench",
+            'last_name': "User", 'password': "x", 'role_id': rng.randrange(1, 7),
+            'department_id': rng.randrange(1, len(DEPARTMENTS) + 1), 'is_active': True,
+            'email_verified': True, 'is_deleted': False, 'created_at': start, 'updated_at': start
+        } for i in range(1, USERS + 1)])
+
+    for table in request_tables:
+        owner = 'officer_id' if 'officer_id' in table.c else 'created_by'
+        for offset in range(0, per_table, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, per_table - offset)):
+                row = {
+                    owner: rng.randrange(1, USERS + 1), 'branch': rng.choice(BRANCHES),
+                    'department': rng.choice(DEPARTMENTS), 'status': rng.choice(STATUSES),
+                    'created_at': stamp()
+                }
+                for column in table.c:
+                    if column.name in row or column.primary_key:
+                        continue
+                    if column.name in ('amount', 'total_amount', 'invoice_amount'):
+                        row[column.name] = rng.randrange(100, 1000000) / 100
+                    elif column.name == 'items':
+                        row[column.name] = [{"item": "Paper", "quantity": 2}]
+                    elif not column.nullable:
+                        row[column.name] = "bench"
+                batch.append(row)
+            with engine.begin() as connection:
+                connection.execute(table.insert(), batch)
+
+    notifications = metadata.tables['notifications']
+    for offset in range(0, per_table, BATCH_SIZE):
+        with engine.begin() as connection:
+            connection.execute(notifications.insert(), [{
+                'user_id': rng.randrange(1, USERS + 1), 'message': "Request status updated",
+                'is_read': rng.random() < 0.8, 'created_at': stamp()
+            } for _ in range(min(BATCH_SIZE, per_table - offset))])
+
+
+def route_queries(metadata):
+    """The statements issued by each route, keyed by a readable name.
+
+    The request statements are built on the model tables, which share their
+    names with the stand-in tables.
+    """
+    t = metadata.tables
+    deep_cursor = encode_cursor(datetime(2024, 1, 1), 1)
+    queries = {}
+    for role, status in QUEUE_STATUS.items():
+        model, _ = REQUEST_TYPES[DEFAULT_REVIEW_TYPES[role]]
+        query = select(model).where(model.status == status)
+        # Supervisors and Reviewers only see their own department
+        if role in ('Supervisor', 'Reviewer'):
+            query = query.where(model.department == 'IT')
+        queries[f'review_requests ({role})'] = keyset_page(query, model.created_at, model.id)
+        queries[f'review_requests ({role}, deep page)'] = keyset_page(
+            query, model.created_at, model.id, deep_cursor
+        )
+
+    queries['approval_inbox'] = inbox_statement(QUEUE_STATUS['Reviewer'], 'IT')
+    queries['list_requests (officer)'] = requests_statement(parse_fields(None), parse_sort(None), officer_id=42)
+    queries['list_requests (department, by amount)'] = requests_statement(
+        parse_fields(None), parse_sort('-amount'), department='IT'
+    )
+    queries['get_notifications (unread)'] = select(t['notifications']).where(
+        t['notifications'].c.user_id == 42, t['notifications'].c.is_read.is_(False)
+    ).order_by(desc(t['notifications'].c.created_at)).limit(50)
+    queries['get_supervisor'] = select(t['users'].c.id, t['users'].c.email).where(
+        t['users'].c.role_id == 4, t['users'].c.department_id == 3
+    ).limit(1)
+    return queries
+
+
+def explain(connection, statement):
+    sql = str(statement.compile(connection, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    return [' '.join(str(value) for value in row) for row in connection.execute(text(prefix + sql))]
+
+
+def measure(engine, queries, repeat):
+    results = {}
+    with engine.connect() as connection:
+        for name, statement in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                connection.execute(statement).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[name] = {
+                'p50_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+                'plan': explain(connection, statement),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default='sqlite:///index_benchmark.db')
+    parser.add_argument('--rows', type=int, default=1000000, help='total rows to seed')
+    parser.add_argument('--repeat', type=int, default=20, help='executions per query')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    metadata, indexes = build_schema()
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    started = time.perf_counter()
+    seed(engine, metadata, args.rows)
+    print(f"Seeded {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+    queries = route_queries(metadata)
+    before = measure(engine, queries, args.repeat)
+
+    with engine.begin() as connection:
+        for name, table, columns in indexes:
+            Index(name, *[table.c[column] for column in columns]).create(connection)
+        connection.execute(text('ANALYZE'))
+    after = measure(engine, queries, args.repeat)
+
+    for name in queries:
+        print(f"\n== {name}")
+        print(f"   before: p50 {before[name]['p50_ms']} ms, p95 {before[name]['p95_ms']} ms")
+        for line in before[name]['plan']:
+            print(f"     {line}")
+        print(f"   after:  p50 {after[name]['p50_ms']} ms, p95 {after[name]['p95_ms']} ms")
+        for line in after[name]['plan']:
+            print(f"     {line}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'database': engine.dialect.name, 'before': before, 'after': after}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""Load and latency benchmark for the Flask API.
+
+Boots create_app() against a local stand-in database (SQLite by default),
+seeds branches, departments, roles and users, then drives login, every
+submission endpoint, the review queue, the approval inbox and notifications
+at a configurable concurrency. For each scenario it reports p50/p95/p99
+latency, requests per second and SQL queries per request, and writes the
+results to JSON so runs can be compared between commits.
+
+Requests run in-process through the Flask test client, so the numbers
+cover the application and database but not the network or WSGI server.
+
+Usage:
+    python benchmarks/load_benchmark.py --requests 500 --concurrency 8
+    python benchmarks/load_benchmark.py --database-url postgresql+pg8000://localhost/bench --output before.json
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'Bench-Passw0rd!'
+ROLES = ['Officer', 'Supervisor', 'Reviewer', 'Approver', 'Admin', 'Super Admin']
+DEPARTMENT = 'IT'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None,
+                        help='defaults to a fresh SQLite file in a temporary directory')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=4, help='concurrent clients')
+    parser.add_argument('--scenario', action='append', help='run only these scenarios (repeatable)')
+    parser.add_argument('--output', default='load_benchmark.json', help='JSON results file')
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Point the app at local stand-ins before app.py is imported."""
+    workdir = tempfile.mkdtemp(prefix='ekondo-bench-')
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # memory:// keeps the limiter and Celery broker in-process and disables the Redis client
+    os.environ.setdefault('REDIS_URL', 'memory://')
+    os.environ.setdefault('CELERY_BROKER_URL', 'memory://')
+    os.chdir(workdir)  # uploads/ is created relative to the working directory
+    return workdir
+
+
+def seed(app, concurrency):
+    """Create branches, departments, roles and one user per role (plus officers per client)."""
+    from extensions import db
+    from models import Department, Role, User
+    from utils import populate_branches_and_departments
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        populate_branches_and_departments()
+        department = Department.query.filter_by(name=DEPARTMENT).first()
+
+        roles = {name: Role(name=name) for name in ROLES}
+        db.session.add_all(roles.values())
+        db.session.flush()
+
+        users = [('supervisor', 'Supervisor'), ('reviewer', 'Reviewer'), ('approver', 'Approver')]
+        users += [(f'officer{i}', 'Officer') for i in range(concurrency)]
+        for username, role in users:
+            db.session.add(User(
+                username=username, email=f'{username}@example.com', password=PASSWORD,
+                first_name='Bench', last_name=username.title(),
+                role_id=roles[role].id, department_id=department.id
+            ))
+        db.session.commit()
+
+
+class QueryCounter:
+    """Count SQL statements issued by the current thread."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.local.count = getattr(self.local, 'count', 0) + 1
+
+    def reset(self):
+        self.local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self.local, 'count', 0)
+
+
+def upload(name='receipt.pdf'):
+    return (io.BytesIO(b'%PDF-1.4\n% benchmark receipt\n' + os.urandom(2048)), name)
+
+
+def scenarios():
+    """(name, username to log in as, request callable) for every benchmarked route."""
+    form = {
+        'branch': 'HeadOffice Branch', 'department': DEPARTMENT, 'name': 'Bench Officer',
+        'account': '0123456789', 'invoice_amount': '1500.00', 'cash_advance': 'y',
+        'narration': 'Benchmark', 'less_what': '0', 'amount': '1500.00', 'items': 'Paper',
+        'description': 'Benchmark request', 'total_amount': '1500.00', 'refund_reimbursement': '0',
+    }
+    return [
+        ('login', None, lambda c, user: c.post('/api/auth/login', json={'login': user, 'password': PASSWORD})),
+        ('petty_cash_advance', 'officer', lambda c, user: c.post('/main/petty_cash_advance', json={
+            **form, 'items': [{'item': 'Paper', 'quantity': 2, 'amount': 1500}]
+        })),
+        ('petty_cash_retirement', 'officer', lambda c, user: c.post('/main/petty_cash_retirement', data={
+            **form, 'items': json.dumps([{'item': 'Paper', 'quantity': 2, 'amount': 1500}]), 'receipt': upload()
+        }, content_type='multipart/form-data')),
+        ('cash_advance', 'officer', lambda c, user: c.post('/main/cash_advance', data={
+            **form, 'management_board_approval': upload('approval.pdf'), 'proforma_invoice': upload('invoice.pdf')
+        }, content_type='multipart/form-data')),
+        ('opex_capex_retirement', 'officer', lambda c, user: c.post(
+            '/main/opex_capex_retirement', data={**form, 'receipt': upload()}, content_type='multipart/form-data'
+        )),
+        ('stationery_request', 'officer', lambda c, user: c.post('/main/stationery_request', json={
+            'branch': form['branch'], 'department': DEPARTMENT, 'description': 'Benchmark',
+            'quantity': 2, 'items': [{'item': 'Paper', 'quantity': 2}], 'total_amount': '1500.00'
+        })),
+        ('review_requests', 'supervisor', lambda c, user: c.get('/main/review_requests?type=cash_advance&limit=50')),
+        ('approval_inbox', 'approver', lambda c, user: c.get('/main/inbox?limit=50')),
+        ('get_notifications', 'officer', lambda c, user: c.get('/main/notifications')),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(app, counter, login_as, call, total, concurrency):
+    """Issue `total` requests from `concurrency` logged-in clients and summarise them."""
+    clients = []
+    for worker in range(concurrency):
+        client = app.test_client()
+        username = f'officer{worker}' if login_as in (None, 'officer') else login_as
+        if login_as is not None:
+            client.post('/api/auth/login', json={'login': username, 'password': PASSWORD})
+        clients.append((client, username))
+
+    latencies, queries, statuses = [], [], {}
+    lock = threading.Lock()
+
+    def worker(index):
+        client, username = clients[index % concurrency]
+        counter.reset()
+        started = time.perf_counter()
+        response = call(client, username)
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            queries.append(counter.count)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(total)))
+    wall = time.perf_counter() - wall_started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'requests_per_second': round(total / wall, 1),
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output)
+    configure_environment(args)
+
+    from app import create_app
+    from extensions import db, limiter
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, MAIL_SUPPRESS_SEND=True)
+    limiter.enabled = False  # Measure the routes, not the login/submission rate limits
+    seed(app, args.concurrency)
+
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+
+    results = {}
+    for name, login_as, call in scenarios():
+        if args.scenario and name not in args.scenario:
+            continue
+        results[name] = run_scenario(app, counter, login_as, call, args.requests, args.concurrency)
+        r = results[name]
+        print(f"{name:24} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  p99 {r['p99_ms']:8.2f} ms  "
+              f"{r['requests_per_second']:8.1f} req/s  {r['queries_per_request']:5.1f} queries/req  {r['status_codes']}")
+
+    with open(output, 'w') as f:
+        json.dump({
+            'revision': git_revision(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'database': os.environ['DATABASE_URL'].split('://')[0],
+            'scenarios': results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Response encoding microbenchmark: jsonify vs msgspec structs.
+
+Builds large listing payloads in memory and times how long it takes to turn
+them into a Flask response three ways:
+
+    jsonify         dicts per row (to_dict()) through Flask's stdlib JSON provider
+    jsonify+msgspec the same dicts through MsgspecJSONProvider (what jsonify() now uses)
+    structs         serializers.py structs encoded by json_response()
+
+The payloads are ORM request rows with their requester, users with role and
+department, and Core result rows shaped like the approval inbox. No database
+server is needed: ORM rows are transient instances and Core rows come from
+an in-memory SQLite table.
+
+Usage:
+    python benchmarks/serializer_benchmark.py --rows 10000
+    python benchmarks/serializer_benchmark.py --rows 10000 --repeat 50 --json results.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import create_engine, insert, literal, select
+from models import CashAdvance, Department, Role, User
+from serializers import (
+    InboxItemOut, MsgspecJSONProvider, json_response, serialize_request, serialize_rows, serialize_user
+)
+
+BRANCHES = [f"Branch {i}" for i in range(18)]
+DEPARTMENTS = ["HR/Admin", "Account", "Risk/Compliance", "IT", "Audit", "Credit"]
+
+
+def transient(model, **values):
+    """Create a model instance without its __init__ (User.__init__ hashes a password)."""
+    obj = model.__mapper__.class_manager.new_instance()
+    for key, value in values.items():
+        setattr(obj, key, value)
+    return obj
+
+
+def build_payloads(rows):
+    """Transient users, cash advances and inbox-shaped Core rows."""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    roles = [Role(id=i, name=name) for i, name in enumerate(['Officer', 'Supervisor', 'Reviewer', 'Approver'], 1)]
+    departments = [transient(Department, id=i, name=name, branch_id=1) for i, name in enumerate(DEPARTMENTS, 1)]
+
+    users = []
+    for i in range(1, rows + 1):
+        role, department = rng.choice(roles), rng.choice(departments)
+        users.append(transient(
+            User, id=i, username=f"user{i}", email=f"user{i}@example.com", first_name="First", last_name="Last",
+            role_id=role.id, role=role, department_id=department.id, department=department,
+            is_active=True, email_verified=False, created_at=start + timedelta(minutes=i)
+        ))
+
+    advances = []
+    for i in range(1, rows + 1):
+        officer = users[rng.randrange(len(users))]
+        advances.append(CashAdvance(
+            id=i, officer_id=officer.id, officer=officer, branch=rng.choice(BRANCHES),
+            department=officer.department.name, amount=Decimal(rng.randrange(100, 10000000)) / 100,
+            purpose="Travel and accommodation for branch audit", status='Pending', version=1,
+            created_at=start + timedelta(minutes=i)
+        ))
+
+    engine = create_engine('sqlite://')
+    table = CashAdvance.__table__
+    with engine.begin() as connection:
+        table.create(connection)
+        connection.execute(insert(table), [
+            {column.name: getattr(advance, column.key) for column in table.columns} for advance in advances
+        ])
+        inbox_rows = connection.execute(select(
+            literal('cash_advance').label('request_type'), table.c.id, table.c.branch, table.c.department,
+            table.c.amount.label('amount'), table.c.purpose.label('description'), table.c.status,
+            table.c.version, table.c.officer_id.label('requester_id'), table.c.created_at
+        )).all()
+    return users, advances, inbox_rows
+
+
+# The dict builders the routes used before serializers.py
+def user_to_dict(user):
+    return {
+        "id": user.id, "username": user.username, "email": user.email,
+        "first_name": user.first_name, "last_name": user.last_name,
+        "role_id": user.role_id, "role": user.role.name if user.role else None,
+        "department_id": user.department_id, "department": user.department.name if user.department else None,
+        "is_active": user.is_active, "email_verified": user.email_verified,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def request_to_dict(advance):
+    return {**advance.to_dict(), "requester": advance.officer.username, "version": advance.version}
+
+
+def inbox_row_to_dict(row):
+    return {
+        'request_type': row.request_type, 'id': row.id, 'branch': row.branch, 'department': row.department,
+        'amount': str(row.amount), 'description': row.description, 'status': row.status,
+        'version': row.version, 'requester_id': row.requester_id,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def measure(app, build, repeat):
+    timings = []
+    with app.test_request_context():
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = build()
+            response.get_data()
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[max(int(len(timings) * 0.95) - 1, 0)], 3),
+        'bytes': len(response.get_data()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help='rows per payload')
+    parser.add_argument('--repeat', type=int, default=20, help='encodes per variant')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    users, advances, inbox_rows = build_payloads(args.rows)
+
+    stdlib_app = Flask('stdlib')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    msgspec_app = Flask('msgspec')
+    msgspec_app.json = MsgspecJSONProvider(msgspec_app)
+
+    payloads = {
+        'review_requests': (
+            lambda: jsonify({"items": [request_to_dict(a) for a in advances], "next_cursor": None}),
+            lambda: json_response({"items": [serialize_request(a) for a in advances], "next_cursor": None}),
+        ),
+        'users': (
+            lambda: jsonify([user_to_dict(u) for u in users]),
+            lambda: json_response([serialize_user(u) for u in users]),
+        ),
+        'inbox (Core rows)': (
+            lambda: jsonify({"items": [inbox_row_to_dict(r) for r in inbox_rows], "next_cursor": None}),
+            lambda: json_response({"items": serialize_rows(InboxItemOut, inbox_rows), "next_cursor": None}),
+        ),
+    }
+
+    results = {}
+    for name, (as_dicts, as_structs) in payloads.items():
+        results[name] = {
+            'jsonify': measure(stdlib_app, as_dicts, args.repeat),
+            'jsonify+msgspec': measure(msgspec_app, as_dicts, args.repeat),
+            'structs': measure(msgspec_app, as_structs, args.repeat),
+        }
+        baseline = results[name]['jsonify']['p50_ms']
+        print(f"\n== {name} ({args.rows} rows)")
+        for variant, result in results[name].items():
+            print(f"   {variant:<16} p50 {result['p50_ms']:>9} ms  p95 {result['p95_ms']:>9} ms  "
+                  f"{result['bytes']} bytes  x{baseline / result['p50_ms']:.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
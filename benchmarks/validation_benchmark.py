@@ -0,0 +1,88 @@
+"""Submission validation microbenchmark: get_json() + manual checks vs schemas.py.
+
+Times the work a submission route does before touching the database, for a
+valid petty cash advance body and for an invalid one:
+
+    manual   request.get_json(), a data.get() per field and all([...])
+             (the checks the routes used before schemas.py)
+    schema   parse_json(PettyCashAdvanceIn, request.get_data()), which also
+             types the amounts as Decimal
+
+Usage:
+    python benchmarks/validation_benchmark.py --iterations 5000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
+from schemas import PettyCashAdvanceIn, SchemaValidationError, parse_json
+
+VALID = {
+    "branch": "Head Office", "department": "IT", "name": "Ada Obi", "account": "0123456789",
+    "items": [{"item": "Toner", "quantity": 2, "amount": "15000.00"}, {"item": "Paper", "quantity": 10, "amount": "3500.00"}],
+    "description": "Printer consumables for the IT unit", "total_amount": "65000.00",
+}
+INVALID = {**VALID, "branch": "", "total_amount": "abc"}
+
+
+def manual():
+    data = request.get_json()
+    if not data:
+        return None
+    branch = data.get('branch')
+    department = data.get('department')
+    name = data.get('name')
+    account = data.get('account')
+    items = data.get('items')
+    description = data.get('description')
+    total_amount = data.get('total_amount')
+    if not all([branch, department, name, account, items, description, total_amount]):
+        return None
+    return data
+
+
+def schema():
+    try:
+        return parse_json(PettyCashAdvanceIn, request.get_data())
+    except SchemaValidationError:
+        return None
+
+
+def measure(app, body, validate, iterations):
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with app.test_request_context(method='POST', data=body, content_type='application/json'):
+                validate()
+        timings.append((time.perf_counter() - started) / iterations * 1e6)
+    return round(statistics.median(timings), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5000, help='requests per timing run')
+    args = parser.parse_args()
+
+    # The baseline uses Flask's stdlib JSON provider, as the app did before MsgspecJSONProvider
+    app = Flask(__name__)
+    app.json = DefaultJSONProvider(app)
+    empty = measure(app, b'{}', lambda: None, args.iterations)
+
+    for name, payload in (('valid', VALID), ('invalid', INVALID)):
+        body = json.dumps(payload).encode()
+        before = measure(app, body, manual, args.iterations) - empty
+        after = measure(app, body, schema, args.iterations) - empty
+        print(f"{name:<8} manual {before:>7.2f} us  schema {after:>7.2f} us  x{before / after:.1f}")
+    print(f"(request context overhead of {empty:.2f} us per request excluded)")
+
+
+if __name__ == '__main__':
+    main()
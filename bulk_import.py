@@ -0,0 +1,277 @@
+import io
+import os
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Annotated, ClassVar, Optional, Union
+import click
+import msgspec
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, select, update
+from extensions import db
+from models import CashAdvance, ExpenseStatus, ImportCheckpoint, PettyCashAdvance, PettyCashRetirement, User
+from reporting import summarize_inserted_rows
+from schemas import BranchName, Items, NonEmptyStr, PositiveInt, Submission
+from table_versions import bump_table_versions
+
+# Backfill of legacy requests from a JSONL file, one request per line.
+# Lines are decoded and validated by msgspec, collected into batches and
+# written with Core multi-row INSERTs (COPY on PostgreSQL with pg8000).
+# Each batch is committed together with its request_summary deltas and the
+# import checkpoint, so an interrupted import resumes after the last
+# committed batch without inserting any row twice. Lines that fail
+# validation are written to a dead-letter file with the reason.
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '5000'))
+
+OptionalDepartmentName = Optional[Annotated[str, msgspec.Meta(max_length=100)]]
+FilePath = Optional[Annotated[str, msgspec.Meta(max_length=255)]]
+
+
+class LegacyRecord(Submission, kw_only=True, tag_field='request_type'):
+    """Base class of the import records; the request_type field selects the subclass."""
+    model: ClassVar = None
+    # Field holding the user who raised the request
+    requester_field: ClassVar[str] = None
+
+    status: ExpenseStatus = ExpenseStatus.PENDING
+    created_at: datetime
+
+    def __post_init__(self):
+        # Amounts are checked against the Numeric(10, 2) columns by Submission
+        super().__post_init__()
+        # The request tables store naive UTC timestamps
+        if self.created_at.tzinfo is not None:
+            self.created_at = self.created_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    def to_row(self):
+        row = msgspec.structs.asdict(self)
+        row['status'] = self.status.value
+        return row
+
+
+class CashAdvanceRecord(LegacyRecord, kw_only=True, tag='cash_advance'):
+    model: ClassVar = CashAdvance
+    requester_field: ClassVar[str] = 'officer_id'
+    positive_fields: ClassVar[tuple] = ('amount',)
+
+    officer_id: PositiveInt
+    branch: BranchName
+    department: OptionalDepartmentName = None
+    amount: Decimal
+    purpose: NonEmptyStr
+    management_board_approval_path: FilePath = None
+    proforma_invoice_path: FilePath = None
+
+
+class PettyCashAdvanceRecord(LegacyRecord, kw_only=True, tag='petty_cash_advance'):
+    model: ClassVar = PettyCashAdvance
+    requester_field: ClassVar[str] = 'officer_id'
+    positive_fields: ClassVar[tuple] = ('total_amount',)
+
+    officer_id: PositiveInt
+    branch: BranchName
+    department: OptionalDepartmentName = None
+    description: Optional[str] = None
+    items: Items
+    total_amount: Decimal
+
+
+class PettyCashRetirementRecord(LegacyRecord, kw_only=True, tag='petty_cash_retirement'):
+    model: ClassVar = PettyCashRetirement
+    requester_field: ClassVar[str] = 'created_by'
+    positive_fields: ClassVar[tuple] = ('total_amount',)
+
+    created_by: Optional[PositiveInt] = None
+    branch: BranchName
+    department: OptionalDepartmentName = None
+    description: Optional[str] = None
+    items: Items
+    total_amount: Decimal
+
+
+RECORDS = (CashAdvanceRecord, PettyCashAdvanceRecord, PettyCashRetirementRecord)
+RECORD_TYPES = {record.__struct_config__.tag: record for record in RECORDS}
+# None decodes any record type from the line's request_type field
+_decoders = {None: msgspec.json.Decoder(Union[RECORDS])}
+_decoders.update({request_type: msgspec.json.Decoder(record) for request_type, record in RECORD_TYPES.items()})
+_encoder = msgspec.json.Encoder()
+
+
+def _copy_value(value):
+    """Format a value for COPY's text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, dict)):
+        value = _encoder.encode(value).decode()
+    elif isinstance(value, datetime):
+        value = value.isoformat(sep=' ')
+    else:
+        value = str(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy_rows(connection, table, rows):
+    """Load rows with COPY ... FROM STDIN through the connection's pg8000 cursor."""
+    preparer = connection.dialect.identifier_preparer
+    columns = list(rows[0])
+    data = ''.join('\t'.join(_copy_value(row[column]) for column in columns) + '\n' for row in rows)
+    statement = (f"COPY {preparer.format_table(table)} "
+                 f"({', '.join(preparer.quote(column) for column in columns)}) FROM STDIN")
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(statement, stream=io.BytesIO(data.encode()))
+    finally:
+        cursor.close()
+
+
+def _insert_rows(connection, model, rows):
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'pg8000':
+        _copy_rows(connection, model.__table__, rows)
+    else:
+        # Executed as batched multi-row INSERT ... VALUES statements
+        connection.execute(insert(model.__table__), rows)
+    summarize_inserted_rows(connection, model, rows)
+
+
+def _load_checkpoint(source):
+    with db.engine.connect() as connection:
+        row = connection.execute(
+            select(ImportCheckpoint.__table__).where(ImportCheckpoint.source == source)
+        ).mappings().first()
+    return dict(row) if row else None
+
+
+def _save_checkpoint(connection, checkpoint, exists):
+    table = ImportCheckpoint.__table__
+    values = dict(checkpoint, updated_at=datetime.utcnow())
+    if exists:
+        connection.execute(update(table).where(table.c.source == checkpoint['source']).values(values))
+    else:
+        connection.execute(insert(table).values(values))
+
+
+def _reject(line_number, raw, error):
+    return _encoder.encode({
+        "line": line_number, "error": error, "record": raw.decode('utf-8', 'replace').rstrip('\r\n')
+    }) + b'\n'
+
+
+def import_requests(path, source=None, request_type=None, batch_size=IMPORT_BATCH_SIZE,
+                    dead_letter_path=None, restart=False, progress=None):
+    """Import legacy requests from a JSONL file, resuming from its checkpoint.
+
+    Args:
+        path (str): The JSONL file, one request object per line.
+        source (str): Checkpoint name; defaults to the file's absolute path.
+        request_type (str): Type of every line, from RECORD_TYPES; when None
+            each line names its type in a request_type field.
+        batch_size (int): Lines read per committed batch.
+        dead_letter_path (str): Where rejected lines are appended; defaults
+            to the file's path with .rejected.jsonl appended.
+        restart (bool): Discard the checkpoint and start from the first line.
+        progress (callable): Called with the checkpoint dict and the rows
+            per second after every batch.
+
+    Returns:
+        dict: The final checkpoint (line_number, byte_offset, inserted_count, rejected_count).
+    """
+    source = source or os.path.abspath(path)
+    dead_letter_path = dead_letter_path or f"{path}.rejected.jsonl"
+    decoder = _decoders[request_type]
+
+    if restart:
+        with db.engine.begin() as connection:
+            connection.execute(delete(ImportCheckpoint.__table__).where(ImportCheckpoint.source == source))
+    checkpoint = _load_checkpoint(source)
+    exists = checkpoint is not None
+    if not exists:
+        checkpoint = {'source': source, 'line_number': 0, 'byte_offset': 0, 'inserted_count': 0, 'rejected_count': 0}
+    checkpoint.pop('updated_at', None)
+    if checkpoint['byte_offset'] > os.path.getsize(path):
+        raise ValueError(f"{path} is shorter than its checkpoint at byte {checkpoint['byte_offset']}")
+
+    known_users = set(db.session.scalars(select(User.id)))
+    started = time.perf_counter()
+    lines_read = 0
+
+    with open(path, 'rb') as f, open(dead_letter_path, 'ab') as dead_letter:
+        f.seek(checkpoint['byte_offset'])
+        line_number, offset = checkpoint['line_number'], checkpoint['byte_offset']
+        batch, rejected, pending = {}, [], 0
+
+        def flush():
+            nonlocal batch, rejected, pending, exists
+            # Rejections are saved before the commit: after a crash they may
+            # be written again, but never lost
+            if rejected:
+                dead_letter.writelines(rejected)
+                dead_letter.flush()
+            checkpoint.update(
+                line_number=line_number, byte_offset=offset,
+                inserted_count=checkpoint['inserted_count'] + sum(len(rows) for rows in batch.values()),
+                rejected_count=checkpoint['rejected_count'] + len(rejected),
+            )
+            with db.engine.begin() as connection:
+                for model, rows in batch.items():
+                    _insert_rows(connection, model, rows)
+                _save_checkpoint(connection, checkpoint, exists)
+            bump_table_versions([model.__tablename__ for model in batch])
+            exists = True
+            batch, rejected, pending = {}, [], 0
+            if progress:
+                elapsed = time.perf_counter() - started
+                progress(checkpoint, lines_read / elapsed if elapsed else 0)
+
+        for raw in f:
+            line_number += 1
+            offset += len(raw)
+            lines_read += 1
+            pending += 1
+            if raw.strip():
+                try:
+                    record = decoder.decode(raw)
+                except msgspec.DecodeError as e:
+                    rejected.append(_reject(line_number, raw, str(e)))
+                else:
+                    requester = getattr(record, record.requester_field)
+                    if requester is not None and requester not in known_users:
+                        rejected.append(_reject(line_number, raw, f"Unknown user {requester} in `{record.requester_field}`"))
+                    else:
+                        batch.setdefault(record.model, []).append(record.to_row())
+            if pending >= batch_size:
+                flush()
+        if pending:
+            flush()
+
+    return checkpoint
+
+
+@click.command('import-requests')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--type', 'request_type', type=click.Choice(list(RECORD_TYPES)),
+              help='Type of every line. Default: read from each line\'s request_type field.')
+@click.option('--batch-size', type=click.IntRange(min=1), default=IMPORT_BATCH_SIZE, show_default=True,
+              help='Lines per committed batch.')
+@click.option('--dead-letter', type=click.Path(dir_okay=False), help='File for rejected lines. Default: PATH.rejected.jsonl.')
+@click.option('--name', help='Checkpoint name. Default: the absolute path of PATH.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and import from the first line.')
+@with_appcontext
+def import_requests_command(path, request_type, batch_size, dead_letter, name, restart):
+    """Bulk import legacy requests from a JSONL file."""
+    def progress(checkpoint, rate):
+        click.echo(f"line {checkpoint['line_number']}: {checkpoint['inserted_count']} inserted, "
+                   f"{checkpoint['rejected_count']} rejected ({rate:.0f} rows/s)")
+
+    source = name or os.path.abspath(path)
+    checkpoint = None if restart else _load_checkpoint(source)
+    if checkpoint:
+        click.echo(f"Resuming {source} after line {checkpoint['line_number']}")
+    started = time.perf_counter()
+    try:
+        checkpoint = import_requests(path, source=source, request_type=request_type, batch_size=batch_size,
+                                     dead_letter_path=dead_letter, restart=restart, progress=progress)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    elapsed = time.perf_counter() - started
+    click.echo(f"Imported {checkpoint['inserted_count']} requests from {path} "
+               f"({checkpoint['rejected_count']} rejected) in {elapsed:.1f}s")
@@ -0,0 +1,6 @@
+# celery_worker.py
+# Entry point for the background worker that drains the email outbox:
+#   celery -A celery_worker.celery worker -B --loglevel=info
+from app import app
+
+celery = app.extensions["celery"]
@@ -2,6 +2,15 @@ import os
 import logging
 from flask_sqlalchemy import SQLAlchemy
 
+def _int_env(name, default):
+    """Read an integer environment variable, ignoring trailing '# comments'."""
+    try:
+        return int(os.environ.get(name, str(default)).split('#')[0].strip())
+    except ValueError:
+        logging.warning(f"Invalid {name} value. Defaulting to {default}.")
+        return default
+
+
 class Config:
     """Base configuration class for the application."""
 
@@ -22,18 +31,17 @@ class Config:
     LOGGING_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     LOGGING_LOCATION = os.environ.get('LOGGING_LOCATION', 'app.log')
 
-    # Database settings
-    try:
-        DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '200').split('#')[0].strip())
-    except ValueError:
-        DB_POOL_SIZE = 200
-        logging.warning("Invalid DB_POOL_SIZE value. Defaulting to 200.")
-
-    try:
-        DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '120').split('#')[0].strip())
-    except ValueError:
-        DB_POOL_TIMEOUT = 120
-        logging.warning("Invalid DB_POOL_TIMEOUT value. Defaulting to 120.")
+    # Database settings (applied to the engines by database.init_database)
+    DB_POOL_SIZE = _int_env('DB_POOL_SIZE', 10)
+    DB_MAX_OVERFLOW = _int_env('DB_MAX_OVERFLOW', 10)
+    DB_POOL_TIMEOUT = _int_env('DB_POOL_TIMEOUT', 30)
+    DB_POOL_RECYCLE = _int_env('DB_POOL_RECYCLE', 1800)  # Seconds; below the server's idle connection timeout
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
+    DB_STATEMENT_TIMEOUT_MS = _int_env('DB_STATEMENT_TIMEOUT_MS', 30000)  # Web requests only; 0 disables the timeout
+    # Optional read replica used by the listing endpoints
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    # Seconds after a user's own commit during which their reads stay on the primary
+    REPLICA_STICKY_SECONDS = _int_env('REPLICA_STICKY_SECONDS', 5)
 
     ENABLE_NEW_FEATURE = os.environ.get('ENABLE_NEW_FEATURE', 'False').lower() == 'true'
     RATELIMIT_DEFAULT = os.environ.get('RATELIMIT_DEFAULT', "2000 per day; 500 per hour")
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from functools import wraps
+from flask import g, has_request_context, session as flask_session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from config import Config
+from extensions import db, REPLICA_BIND
+
+# Key in the Flask session holding the time of the user's last committed write
+LAST_WRITE_KEY = '_last_write_at'
+
+_lock = threading.Lock()
+_local = threading.local()
+_pool_stats = {}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a free connection.
+
+    Time spent opening a new connection is excluded, so the wait reflects
+    pool contention only.
+    """
+
+    def _do_get(self):
+        _local.connect_time = 0.0
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            _record_checkout(self, time.perf_counter() - started, timed_out=True)
+            raise
+        _record_checkout(self, time.perf_counter() - started - _local.connect_time)
+        return connection
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            _local.connect_time = getattr(_local, 'connect_time', 0.0) + time.perf_counter() - started
+
+
+def _record_checkout(pool, waited, timed_out=False):
+    name = getattr(pool, 'bind_name', 'primary')
+    with _lock:
+        stats = _pool_stats.setdefault(name, {
+            'checkouts': 0, 'waited': 0, 'timeouts': 0, 'wait_total_ms': 0.0, 'wait_max_ms': 0.0
+        })
+        waited_ms = waited * 1000
+        stats['checkouts'] += 1
+        stats['wait_total_ms'] += waited_ms
+        stats['wait_max_ms'] = max(stats['wait_max_ms'], waited_ms)
+        if waited_ms >= 1:
+            stats['waited'] += 1
+        if timed_out:
+            stats['timeouts'] += 1
+
+
+def engine_options(url):
+    """SQLAlchemy engine options for a database URL, taken from Config."""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # In-memory SQLite uses a single shared connection; there is no pool to size
+        return {}
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': Config.DB_POOL_SIZE,
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_timeout': Config.DB_POOL_TIMEOUT,
+        'pool_recycle': Config.DB_POOL_RECYCLE,
+        'pool_pre_ping': Config.DB_POOL_PRE_PING,
+    }
+
+
+def _set_statement_timeout(connection):
+    """Bound the statements of a transaction begun by a web request to DB_STATEMENT_TIMEOUT_MS.
+
+    SET LOCAL lasts until the transaction ends, so the pooled connection goes
+    back without the timeout. Migrations, Celery tasks and CLI commands run
+    without a request context and keep the server's default.
+    """
+    if not has_request_context():
+        return
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = {int(Config.DB_STATEMENT_TIMEOUT_MS)}")
+    finally:
+        cursor.close()
+
+
+def configure_engines(app):
+    """Apply the pool settings to the primary engine and the optional read replica.
+
+    Must be called before db.init_app(app).
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    replica_url = Config.SQLALCHEMY_REPLICA_URI
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: {'url': replica_url, **engine_options(replica_url)}}
+        logging.info("Read replica configured for listing queries.")
+
+
+def init_database(app):
+    """Install per-connection settings and pool instrumentation. Call after db.init_app(app)."""
+    with app.app_context():
+        for name, engine in db.engines.items():
+            engine.pool.bind_name = name or 'primary'
+            if engine.dialect.name == 'postgresql' and Config.DB_STATEMENT_TIMEOUT_MS:
+                event.listen(engine, 'begin', _set_statement_timeout)
+
+
+def read_replica(f):
+    """Run a read-only view's queries against the read replica.
+
+    Users who committed a write less than REPLICA_STICKY_SECONDS ago keep
+    reading from the primary, so they see their own changes while the
+    replica catches up. Without a replica the view is unchanged.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if REPLICA_BIND in db.engines:
+            last_write = flask_session.get(LAST_WRITE_KEY)
+            g.use_replica = last_write is None or time.time() - last_write >= Config.REPLICA_STICKY_SECONDS
+        return f(*args, **kwargs)
+    return decorated
+
+
+# Read-your-writes: remember when the current user last committed a change
+@event.listens_for(db.session, 'after_flush')
+def _flag_flushed_write(session, flush_context):
+    session.info['has_writes'] = True
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _flag_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['has_writes'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _remember_write(session):
+    if session.info.pop('has_writes', False) and has_request_context():
+        flask_session[LAST_WRITE_KEY] = time.time()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('has_writes', None)
+
+
+def replica_engine():
+    """The read replica engine, or the primary engine when no replica is configured."""
+    return db.engines.get(REPLICA_BIND, db.engine)
+
+
+def pool_stats():
+    """Checkout and wait counters per engine, with the current pool occupancy."""
+    with _lock:
+        stats = {name: dict(values) for name, values in _pool_stats.items()}
+    for name, engine in db.engines.items():
+        pool = engine.pool
+        name = name or 'primary'
+        entry = stats.setdefault(name, {})
+        if isinstance(pool, QueuePool):
+            entry.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+                'idle': pool.checkedin(),
+            })
+        if entry.get('checkouts'):
+            entry['wait_avg_ms'] = round(entry['wait_total_ms'] / entry['checkouts'], 3)
+            entry['wait_total_ms'] = round(entry['wait_total_ms'], 3)
+            entry['wait_max_ms'] = round(entry['wait_max_ms'], 3)
+    return stats
@@ -0,0 +1,89 @@
+import logging
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from extensions import db
+from memo_cache import memoize
+from models import Role, User
+
+# How long a cached lookup may live before it is re-read. Commits that touch
+# Role or User rows invalidate the shared cache immediately.
+DIRECTORY_TTL_SECONDS = 300
+
+
+@memoize('role_id_by_name', timeout=DIRECTORY_TTL_SECONDS)
+def get_role_id_by_name(role_name):
+    """Fetch the role ID for a role name, served from the shared cache.
+
+    Args:
+        role_name (str): The name of the role.
+
+    Returns:
+        int: The ID of the role or None if not found.
+    """
+    role = Role.query.with_entities(Role.id).filter_by(name=role_name).first()
+    return role.id if role else None
+
+
+@memoize('user_by_role', timeout=DIRECTORY_TTL_SECONDS)
+def get_user_by_role(role_name, department_id=None):
+    """Fetch the first user holding a role, optionally within a department.
+
+    The role and user are resolved in a single joined query and cached per
+    (role name, department_id) as a plain record, never as an ORM instance.
+
+    Args:
+        role_name (str): The name of the role, e.g. 'Supervisor'.
+        department_id (int): The department to search, or None for any department.
+
+    Returns:
+        dict: {'id', 'username', 'email', 'department_id'} or None if not found.
+    """
+    query = (
+        db.session.query(User.id, User.username, User.email, User.department_id)
+        .join(Role, User.role_id == Role.id)
+        .filter(Role.name == role_name)
+    )
+    if department_id is not None:
+        query = query.filter(User.department_id == department_id)
+    row = query.order_by(User.id).first()
+
+    record = dict(row._mapping) if row else None
+    if record is None:
+        logging.warning(f"No {role_name} found for department {department_id}.")
+    return record
+
+
+def get_supervisor(department_id=None):
+    """Fetch the supervisor record for a department."""
+    return get_user_by_role('Supervisor', department_id)
+
+
+def invalidate():
+    """Drop every cached role and user lookup."""
+    get_role_id_by_name.invalidate()
+    get_user_by_role.invalidate()
+
+
+# Invalidation: mark the session when Role or User rows change and clear the
+# cache only once that transaction commits, so readers never cache rows that
+# might still roll back.
+def _mark_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['directory_dirty'] = True
+
+
+for _model in (Role, User):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _mark_dirty)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('directory_dirty', False):
+        invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_dirty_flag(session):
+    session.info.pop('directory_dirty', None)
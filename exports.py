@@ -0,0 +1,165 @@
+import csv
+import io
+import os
+import tempfile
+import time
+from datetime import datetime, time as dt_time, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import literal, select
+import xlsxwriter
+from database import replica_engine
+from inbox import INBOX_SOURCES
+
+# Month-end extracts of every request type. Rows are streamed from each
+# table with a server-side cursor and written out as they arrive, so memory
+# stays bounded however many rows are exported.
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '2000'))
+EXPORT_COLUMNS = (
+    'request_type', 'id', 'branch', 'department', 'amount', 'description', 'status', 'requester_id', 'created_at'
+)
+EXPORT_FORMATS = ('csv', 'xlsx')
+REQUEST_TYPES = tuple(request_type for request_type, _, _, _, _ in INBOX_SOURCES)
+# Excel's row limit; larger exports continue on another worksheet
+XLSX_MAX_ROWS = 1048576
+_CHUNK_SIZE = 64 * 1024
+
+
+def _statements(since=None, until=None, branch=None, status=None, request_types=None):
+    for request_type, model, amount, description, requester in INBOX_SOURCES:
+        if request_types and request_type not in request_types:
+            continue
+        statement = select(
+            literal(request_type), model.id, model.branch, model.department, amount,
+            description, model.status, requester, model.created_at
+        )
+        if since is not None:
+            statement = statement.where(model.created_at >= datetime.combine(since, dt_time.min))
+        if until is not None:
+            statement = statement.where(model.created_at < datetime.combine(until + timedelta(days=1), dt_time.min))
+        if branch is not None:
+            statement = statement.where(model.branch == branch)
+        if status is not None:
+            statement = statement.where(model.status == status)
+        yield statement.order_by(model.created_at, model.id)
+
+
+def iter_export_rows(since=None, until=None, branch=None, status=None, request_types=None):
+    """Stream the requests matching the filters as tuples in EXPORT_COLUMNS order.
+
+    Each request table is read with a server-side cursor (yield_per), from
+    the read replica when one is configured.
+
+    Args:
+        since, until (date): Creation date range, inclusive, or None.
+        branch, status (str): Optional filters.
+        request_types (list): Request types to include; all when empty.
+
+    Returns:
+        generator: One tuple per request.
+    """
+    # Resolve the engine now: the generator may run after the app context is gone
+    engine = replica_engine()
+    statements = list(_statements(since, until, branch, status, request_types))
+
+    def rows():
+        with engine.connect() as connection:
+            connection = connection.execution_options(yield_per=EXPORT_BATCH_SIZE)
+            for statement in statements:
+                for row in connection.execute(statement):
+                    yield tuple(row)
+
+    return rows()
+
+
+def csv_chunks(rows):
+    """Encode rows as CSV, yielding about _CHUNK_SIZE bytes at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= _CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def write_xlsx(rows, path):
+    """Write rows to an XLSX file with XlsxWriter's constant-memory mode.
+
+    Rows are flushed to disk as each one is written; a new worksheet is
+    started whenever one reaches Excel's row limit.
+    """
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'tmpdir': tempfile.gettempdir(),
+    })
+    worksheet, row_number = None, XLSX_MAX_ROWS
+    for row in rows:
+        if row_number == XLSX_MAX_ROWS:
+            worksheet = workbook.add_worksheet()
+            worksheet.write_row(0, 0, EXPORT_COLUMNS)
+            row_number = 1
+        worksheet.write_row(row_number, 0, row)
+        row_number += 1
+    if worksheet is None:
+        workbook.add_worksheet().write_row(0, 0, EXPORT_COLUMNS)
+    workbook.close()
+
+
+def xlsx_chunks(rows):
+    """Build the workbook in a temporary file, then stream it and remove the file."""
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    try:
+        write_xlsx(rows, path)
+        with open(path, 'rb') as f:
+            while chunk := f.read(_CHUNK_SIZE):
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+EXPORT_WRITERS = {
+    'csv': (csv_chunks, 'text/csv'),
+    'xlsx': (xlsx_chunks, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def _counted(rows, counter):
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+@click.command('export-requests')
+@click.option('--format', 'export_format', type=click.Choice(EXPORT_FORMATS), default='csv')
+@click.option('--output', required=True, type=click.Path(dir_okay=False), help='File to write.')
+@click.option('--since', type=click.DateTime(['%Y-%m-%d']), help='First creation date (inclusive).')
+@click.option('--until', type=click.DateTime(['%Y-%m-%d']), help='Last creation date (inclusive).')
+@click.option('--branch')
+@click.option('--status')
+@click.option('--type', 'request_types', type=click.Choice(REQUEST_TYPES), multiple=True,
+              help='Request type to include; repeat for several. Default: all.')
+@with_appcontext
+def export_requests_command(export_format, output, since, until, branch, status, request_types):
+    """Export requests of every type to a CSV or XLSX file."""
+    started = time.perf_counter()
+    counter = [0]
+    rows = _counted(iter_export_rows(
+        since=since.date() if since else None, until=until.date() if until else None,
+        branch=branch, status=status, request_types=request_types
+    ), counter)
+    if export_format == 'xlsx':
+        write_xlsx(rows, output)
+    else:
+        with open(output, 'wb') as f:
+            for chunk in csv_chunks(rows):
+                f.write(chunk)
+    elapsed = time.perf_counter() - started
+    click.echo(f"Exported {counter[0]} requests to {output} in {elapsed:.1f}s "
+               f"({counter[0] / elapsed if elapsed else 0:.0f} rows/s)")
+
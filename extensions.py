@@ -1,5 +1,7 @@
 # extensions.py
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as SQLAlchemySession
 from flask_mail import Mail
 from flask_login import LoginManager
 from flask_migrate import Migrate 
@@ -9,9 +11,34 @@ from flasgger import Swagger
 from flask_wtf.csrf import CSRFProtect
 from flask_seasurf import SeaSurf
 from flask_session import Session
+from flask_session.redis import RedisSessionInterface
+from cachelib.simple import SimpleCache
+from datetime import timedelta
+import os
+import time
+from celery import Celery, Task
+
+# Bind holding the optional read replica (see database.configure_engines)
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(SQLAlchemySession):
+    """Session that sends reads to the read replica while g.use_replica is set.
+
+    g.use_replica is only set by database.read_replica for read-only views.
+    Flushes always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('use_replica'):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 migrate = Migrate()
 mail = Mail()
@@ -24,14 +51,76 @@ def init_app(app):
     limiter.init_app(app)
     mail.init_app(app)
 
-def init_session(app):
-    app.config['SESSION_TYPE'] = 'filesystem'
+class SlidingRedisSessionInterface(RedisSessionInterface):
+    """Redis session store with a sliding TTL that is not rewritten on every request.
+
+    The expiry time is kept inside the stored session. An unmodified session
+    is written back only once less than half of its lifetime remains, which
+    also re-issues the cookie.
+    """
+    EXPIRES_KEY = '_expires_at'
+
+    def save_session(self, app, session, response):
+        # dict.get avoids marking the session as accessed (and adding Vary: Cookie)
+        expires_at = dict.get(session, self.EXPIRES_KEY)
+        half_lifetime = app.permanent_session_lifetime.total_seconds() / 2
+        if session and expires_at is not None and expires_at - time.time() < half_lifetime:
+            session.modified = True
+        super().save_session(app, session, response)
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        session[self.EXPIRES_KEY] = time.time() + session_lifetime.total_seconds()
+        super()._upsert_session(session_lifetime, session, store_id)
+
+
+def init_session(app, redis_client=None):
+    """Store sessions in Redis, or in process memory when Redis is unavailable (local tests).
+
+    redis_client must be created with decode_responses=False: sessions are
+    stored as msgpack bytes.
+    """
     app.config['SESSION_PERMANENT'] = False
-    Session(app)
+    app.config['SESSION_USE_SIGNER'] = True
+    app.config['SESSION_KEY_PREFIX'] = 'session:'
+    app.config['SESSION_SERIALIZATION_FORMAT'] = 'msgpack'
+    app.config['SESSION_REFRESH_EACH_REQUEST'] = False
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=int(os.getenv('SESSION_LIFETIME_MINUTES', '30')))
+
+    if redis_client is None:
+        app.config['SESSION_TYPE'] = 'cachelib'
+        app.config['SESSION_CACHELIB'] = SimpleCache(threshold=10000)
+        Session(app)
+        return
+
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = redis_client
+    app.session_interface = SlidingRedisSessionInterface(
+        app,
+        client=redis_client,
+        key_prefix=app.config['SESSION_KEY_PREFIX'],
+        use_signer=app.config['SESSION_USE_SIGNER'],
+        permanent=app.config['SESSION_PERMANENT'],
+        serialization_format=app.config['SESSION_SERIALIZATION_FORMAT'],
+    )
+
+def init_celery(app):
+    """Create the Celery app used by background workers and bind it to the Flask app context."""
+    class FlaskTask(Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+
+    celery_app = Celery(app.name, task_cls=FlaskTask)
+    celery_app.config_from_object(app.config["CELERY"])
+    celery_app.set_default()
+    app.extensions["celery"] = celery_app
+    return celery_app
 
+# Only routes decorated with rate_limiting.rate_limit() are limited. The
+# client address comes from request.remote_addr, which ProxyFix (see
+# create_app) sets from X-Forwarded-For behind the hosting proxy.
 limiter = Limiter(
     key_func=get_remote_address,  # Use IP address for rate-limiting
-    default_limits=["2000 per day", "500 per hour"]  # Default rate limits
 )
 swagger = Swagger()
 csrf = CSRFProtect()
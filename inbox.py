@@ -0,0 +1,118 @@
+import base64
+from datetime import datetime
+from sqlalchemy import literal, select, tuple_, union_all
+from extensions import db
+from models import (
+    CashAdvance, OpexCapexRetirement, PettyCashAdvance,
+    PettyCashRetirement, StationaryRequest
+)
+
+# Columns of each request model mapped onto the common inbox shape:
+# (request_type, model, amount column, description column, requester column)
+INBOX_SOURCES = [
+    ('cash_advance', CashAdvance, CashAdvance.amount, CashAdvance.purpose, CashAdvance.officer_id),
+    ('opex_capex_retirement', OpexCapexRetirement, OpexCapexRetirement.total_amount,
+     OpexCapexRetirement.description, OpexCapexRetirement.created_by),
+    ('petty_cash_advance', PettyCashAdvance, PettyCashAdvance.total_amount,
+     PettyCashAdvance.description, PettyCashAdvance.officer_id),
+    ('petty_cash_retirement', PettyCashRetirement, PettyCashRetirement.total_amount,
+     PettyCashRetirement.description, PettyCashRetirement.created_by),
+    ('stationary_request', StationaryRequest, StationaryRequest.total_amount,
+     StationaryRequest.description, StationaryRequest.created_by),
+]
+
+
+def encode_inbox_cursor(row):
+    """Encode the (created_at, request_type, id) position of an inbox row."""
+    raw = f"{row.created_at.isoformat()}|{row.request_type}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_inbox_cursor(cursor):
+    """Decode a cursor produced by encode_inbox_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        created_at, request_type, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), request_type, int(row_id)
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _after_cursor(request_type, model, cursor):
+    """Keyset predicate for one source, given the global (created_at, type, id) cursor.
+
+    request_type is constant within a source, so the three-part comparison
+    reduces to a plain (created_at, id) range each branch can serve from its
+    index (created_at is NOT NULL).
+    """
+    after_created, after_type, after_id = cursor
+    if request_type < after_type:
+        return model.created_at > after_created
+    if request_type > after_type:
+        return model.created_at >= after_created
+    return tuple_(model.created_at, model.id) > tuple_(after_created, after_id)
+
+
+def inbox_statement(status='Pending', department=None, cursor=None, limit=50):
+    """Build the UNION ALL statement for one inbox page plus one look-ahead row.
+
+    The status, department and cursor filters and the page limit are pushed
+    into each branch so each table only contributes one page of rows.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    position = decode_inbox_cursor(cursor) if cursor else None
+
+    branches = []
+    for request_type, model, amount, description, requester in INBOX_SOURCES:
+        branch = select(
+            literal(request_type).label('request_type'),
+            model.id.label('id'),
+            model.branch.label('branch'),
+            model.department.label('department'),
+            amount.label('amount'),
+            description.label('description'),
+            model.status.label('status'),
+            model.version.label('version'),
+            requester.label('requester_id'),
+            model.created_at.label('created_at'),
+        ).where(model.status == status)
+        if department is not None:
+            branch = branch.where(model.department == department)
+        if position is not None:
+            branch = branch.where(_after_cursor(request_type, model, position))
+        branch = branch.order_by(model.created_at, model.id).limit(limit + 1).subquery()
+        branches.append(select(branch))
+
+    inbox = union_all(*branches).subquery()
+    return (
+        select(inbox)
+        .order_by(inbox.c.created_at, inbox.c.request_type, inbox.c.id)
+        .limit(limit + 1)
+    )
+
+
+def fetch_inbox(status='Pending', department=None, cursor=None, limit=50):
+    """Fetch one page of the unified approval inbox, oldest first.
+
+    Every request type is read in a single statement from inbox_statement().
+
+    Args:
+        status (str): The status to list.
+        department (str): Restrict to one department name, or None for all.
+        cursor (str): The next_cursor of the previous page, or None.
+        limit (int): The page size.
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page.
+    """
+    rows = db.session.execute(inbox_statement(status, department, cursor, limit)).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_inbox_cursor(rows[-1])
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+import logging
+import os
+from celery import shared_task
+from flask_mail import Message
+from sqlalchemy import event
+from extensions import db, mail
+from models import EmailOutbox
+
+# Outbox settings
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('OUTBOX_RETRY_BASE_SECONDS', '30'))
+OUTBOX_RETRY_MAX_SECONDS = int(os.getenv('OUTBOX_RETRY_MAX_SECONDS', '3600'))
+# How long a worker's claim on a batch lasts before another worker may retry it
+OUTBOX_CLAIM_SECONDS = int(os.getenv('OUTBOX_CLAIM_SECONDS', '600'))
+
+
+def queue_email(subject, recipients, body):
+    """Add an email to the outbox in the current transaction.
+
+    The message is delivered by the background worker once the caller commits,
+    so the request never waits on the mail server.
+
+    Args:
+        subject (str): The email subject.
+        recipients (list): The recipient email addresses.
+        body (str): The plain-text body.
+
+    Returns:
+        EmailOutbox: The pending outbox entry.
+    """
+    entry = EmailOutbox(subject=subject, recipients=list(recipients), body=body)
+    db.session.add(entry)
+    db.session.info['outbox_pending'] = True
+    return entry
+
+
+def retry_delay(attempts):
+    """Exponential backoff (in seconds) before the next delivery attempt."""
+    return min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_RETRY_MAX_SECONDS)
+
+
+def deliver_pending(batch_size=OUTBOX_BATCH_SIZE):
+    """Send a batch of due outbox messages over a single SMTP connection.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED and marked 'Sending' for
+    OUTBOX_CLAIM_SECONDS, and that claim is committed before anything is
+    sent, so no row lock is held while talking to the mail server. A claim
+    left behind by a crashed worker expires and the message is picked up
+    again. The claim counts as the attempt, so a message whose send keeps
+    crashing the worker is still marked 'Failed' after OUTBOX_MAX_ATTEMPTS.
+
+    Returns:
+        int: The number of messages claimed, or 0 when nothing is due or
+        the mail server is unreachable.
+    """
+    now = datetime.utcnow()
+    batch = (
+        EmailOutbox.query
+        .filter(EmailOutbox.status.in_(('Queued', 'Sending')), EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not batch:
+        db.session.rollback()
+        return 0
+    sending = []
+    for entry in batch:
+        if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+            # Every attempt was claimed by a worker that never reported back
+            entry.status = 'Failed'
+            entry.last_error = entry.last_error or "Delivery attempt did not complete"
+            continue
+        entry.attempts += 1
+        entry.status = 'Sending'
+        entry.next_attempt_at = now + timedelta(seconds=OUTBOX_CLAIM_SECONDS)
+        sending.append(entry)
+    db.session.commit()
+    if not sending:
+        return len(batch)
+
+    try:
+        connection = mail.connect()
+        connection.__enter__()
+    except Exception as e:
+        # Mail server unreachable: push the whole batch back without burning through every message
+        logging.error(f"Error connecting to mail server: {e}")
+        for entry in sending:
+            _record_failure(entry, e, now)
+        db.session.commit()
+        return 0
+
+    try:
+        for entry in sending:
+            try:
+                connection.send(Message(entry.subject, recipients=entry.recipients, body=entry.body))
+                entry.status = 'Sent'
+                entry.sent_at = datetime.utcnow()
+                entry.last_error = None
+            except Exception as e:
+                logging.error(f"Error sending outbox email {entry.id}: {e}")
+                _record_failure(entry, e, now)
+    finally:
+        try:
+            connection.__exit__(None, None, None)
+        except Exception as e:
+            logging.warning(f"Error closing mail server connection: {e}")
+
+    db.session.commit()
+    return len(batch)
+
+
+def _record_failure(entry, error, now):
+    """Schedule a retry for a failed message, or mark it failed once attempts run out.
+
+    The attempt was already counted when the message was claimed.
+    """
+    entry.last_error = str(error)
+    if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+        entry.status = 'Failed'
+    else:
+        entry.status = 'Queued'
+        entry.next_attempt_at = now + timedelta(seconds=retry_delay(entry.attempts))
+
+
+@shared_task(name='mail_queue.drain_outbox', ignore_result=True)
+def drain_outbox():
+    """Celery task: drain due outbox messages batch by batch."""
+    while deliver_pending() == OUTBOX_BATCH_SIZE:
+        pass
+
+
+@event.listens_for(db.session, 'after_commit')
+def _dispatch_outbox(session):
+    """Wake the mail worker after a transaction that queued email commits."""
+    if not session.info.pop('outbox_pending', False):
+        return
+    try:
+        drain_outbox.delay()
+    except Exception as e:
+        # The periodic sweep picks the message up if the broker is unavailable
+        logging.warning(f"Could not dispatch outbox drain task: {e}")
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_outbox_flag(session):
+    session.info.pop('outbox_pending', None)
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from functools import wraps
+import msgspec
+from redis.exceptions import RedisError
+
+# Redis client shared with the rest of the app; set by init_cache() in create_app.
+# When Redis is unavailable every lookup falls back to the in-process store.
+_redis = None
+
+_lock = threading.Lock()
+_local = {}
+_stats = {}
+
+
+def init_cache(redis_client):
+    """Use the application's Redis client as the shared cache backend."""
+    global _redis
+    _redis = redis_client
+
+
+def _count(namespace, counter):
+    with _lock:
+        stats = _stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'errors': 0})
+        stats[counter] += 1
+
+
+def cache_stats():
+    """Return hit/miss/error counters per namespace for this process."""
+    with _lock:
+        return {namespace: dict(stats) for namespace, stats in _stats.items()}
+
+
+def _redis_key(namespace):
+    return f"memo:{namespace}"
+
+
+def _get(namespace, field):
+    if _redis is not None:
+        try:
+            raw = _redis.hget(_redis_key(namespace), field)
+            if raw is None:
+                return False, None
+            entry = msgspec.json.decode(raw)
+            if entry['exp'] > time.time():
+                return True, entry['v']
+            return False, None
+        except (RedisError, msgspec.DecodeError) as e:
+            logging.warning(f"Cache read failed for {namespace}: {e}")
+            _count(namespace, 'errors')
+
+    entry = _local.get((namespace, field))
+    if entry and entry[1] > time.time():
+        return True, entry[0]
+    return False, None
+
+
+def _set(namespace, field, value, timeout):
+    expires = time.time() + timeout
+    if _redis is not None:
+        try:
+            key = _redis_key(namespace)
+            pipe = _redis.pipeline(transaction=False)
+            pipe.hset(key, field, msgspec.json.encode({'v': value, 'exp': expires}))
+            pipe.expire(key, timeout)
+            pipe.execute()
+            return
+        except RedisError as e:
+            logging.warning(f"Cache write failed for {namespace}: {e}")
+            _count(namespace, 'errors')
+
+    with _lock:
+        _local[(namespace, field)] = (value, expires)
+
+
+def invalidate(namespace):
+    """Drop every cached entry in a namespace, locally and in Redis."""
+    with _lock:
+        for key in [key for key in _local if key[0] == namespace]:
+            del _local[key]
+    if _redis is not None:
+        try:
+            _redis.delete(_redis_key(namespace))
+        except RedisError as e:
+            logging.warning(f"Cache invalidation failed for {namespace}: {e}")
+            _count(namespace, 'errors')
+
+
+def memoize(namespace, timeout=300):
+    """Cache a function's result per argument list.
+
+    Results must be plain JSON-serializable values (dicts, lists, scalars or
+    None), never ORM instances. Each namespace is stored as one Redis hash
+    keyed by the encoded arguments, so invalidating it is a single DEL.
+
+    Args:
+        namespace (str): Cache namespace, e.g. 'supervisor_by_department'.
+        timeout (int): Seconds an entry stays valid.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            field = msgspec.json.encode([args, sorted(kwargs.items())])
+            found, value = _get(namespace, field)
+            if found:
+                _count(namespace, 'hits')
+                return value
+
+            _count(namespace, 'misses')
+            value = f(*args, **kwargs)
+            _set(namespace, field, value, timeout)
+            return value
+
+        wrapper.invalidate = lambda: invalidate(namespace)
+        return wrapper
+    return decorator
@@ -0,0 +1,44 @@
+"""add description and quantity to stationary_request
+
+Revision ID: 0c5e9a3f7b12
+Revises: f2a6c8e1b4d9
+Create Date: 2026-10-17 20:15:37.902461
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c5e9a3f7b12'
+down_revision = 'f2a6c8e1b4d9'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ('description', sa.Text),
+    ('quantity', sa.Integer),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # The stationery form has always required both; they were not stored
+    if 'stationary_request' in inspector.get_table_names():
+        existing = [column['name'] for column in inspector.get_columns('stationary_request')]
+        for name, type_ in COLUMNS:
+            if name not in existing:
+                op.add_column('stationary_request', sa.Column(name, type_, nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'stationary_request' in inspector.get_table_names():
+        existing = [column['name'] for column in inspector.get_columns('stationary_request')]
+        for name, _ in COLUMNS:
+            if name in existing:
+                op.drop_column('stationary_request', name)
@@ -0,0 +1,47 @@
+"""add email outbox
+
+Revision ID: 3f1c8e2a7b41
+Revises: 9add89615840
+Create Date: 2026-10-17 09:12:04.518220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c8e2a7b41'
+down_revision = '9add89615840'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Check and create email_outbox table
+    if 'email_outbox' not in inspector.get_table_names():
+        op.create_table(
+            'email_outbox',
+            sa.Column('id', sa.Integer, primary_key=True, nullable=False),
+            sa.Column('subject', sa.String(255), nullable=False),
+            sa.Column('recipients', sa.JSON, nullable=False),
+            sa.Column('body', sa.Text, nullable=False),
+            sa.Column('status', sa.String(20), nullable=False, server_default='Queued'),
+            sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('last_error', sa.Text, nullable=True),
+            sa.Column('next_attempt_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+            sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+            sa.Column('sent_at', sa.DateTime, nullable=True),
+        )
+        op.create_index('ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'email_outbox' in inspector.get_table_names():
+        op.drop_index('ix_email_outbox_status_next_attempt', table_name='email_outbox')
+        op.drop_table('email_outbox')
@@ -0,0 +1,44 @@
+"""add content hash to document_uploads
+
+Revision ID: 4a6f0d1e9b58
+Revises: e91d3c5a8f20
+Create Date: 2026-10-17 12:20:37.940112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a6f0d1e9b58'
+down_revision = 'e91d3c5a8f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Check and create document_uploads table
+    if 'document_uploads' not in inspector.get_table_names():
+        op.create_table(
+            'document_uploads',
+            sa.Column('id', sa.Integer, primary_key=True, nullable=False),
+            sa.Column('file_name', sa.String(255), nullable=False),
+            sa.Column('file_path', sa.String(255), nullable=False),
+            sa.Column('sha256', sa.String(64), nullable=True),
+            sa.Column('uploaded_by', sa.Integer, sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('uploaded_at', sa.DateTime, server_default=sa.func.now()),
+        )
+    else:
+        columns = [column['name'] for column in inspector.get_columns('document_uploads')]
+        if 'sha256' not in columns:
+            op.add_column('document_uploads', sa.Column('sha256', sa.String(64), nullable=True))
+
+    op.create_index('ix_document_uploads_sha256', 'document_uploads', ['sha256'])
+
+
+def downgrade():
+    op.drop_index('ix_document_uploads_sha256', table_name='document_uploads')
+    op.drop_column('document_uploads', 'sha256')
@@ -0,0 +1,36 @@
+"""add version column to request tables for workflow transitions
+
+Revision ID: 5b9d2c7e4f31
+Revises: c3a7e5f19d62
+Create Date: 2026-10-17 13:48:26.107554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9d2c7e4f31'
+down_revision = 'c3a7e5f19d62'
+branch_labels = None
+depends_on = None
+
+TABLES = ['cash_advance', 'opex_capex_retirement', 'petty_cash_advance', 'petty_cash_retirement', 'stationary_request']
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    for table in TABLES:
+        if table not in tables:
+            continue
+        columns = [column['name'] for column in inspector.get_columns(table)]
+        if 'version' not in columns:
+            op.add_column(table, sa.Column('version', sa.Integer, nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_column(table, 'version')
@@ -0,0 +1,78 @@
+"""backfill created_at on the request tables and make it NOT NULL
+
+Revision ID: 6e1b7d4a9c35
+Revises: 0c5e9a3f7b12
+Create Date: 2026-10-17 21:04:19.736052
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e1b7d4a9c35'
+down_revision = '0c5e9a3f7b12'
+branch_labels = None
+depends_on = None
+
+# (request type, table, amount column), as in inbox.INBOX_SOURCES
+SOURCES = [
+    ('cash_advance', 'cash_advance', 'amount'),
+    ('opex_capex_retirement', 'opex_capex_retirement', 'total_amount'),
+    ('petty_cash_advance', 'petty_cash_advance', 'total_amount'),
+    ('petty_cash_retirement', 'petty_cash_retirement', 'total_amount'),
+    ('stationary_request', 'stationary_request', 'total_amount'),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+
+    # Keyset pages compare (created_at, id) as a row value, which only uses
+    # the created_at indexes as a range bound when the column has no NULLs.
+    # Requests without a date predate the column being filled in, so they
+    # take the table's oldest date (or now, when no row has one).
+    backfilled = False
+    for _, table, _ in SOURCES:
+        if table not in tables:
+            continue
+        result = bind.execute(sa.text(
+            f"UPDATE {table} SET created_at = COALESCE("
+            f"(SELECT min(created_at) FROM {table}), CURRENT_TIMESTAMP) "
+            f"WHERE created_at IS NULL"
+        ))
+        backfilled = backfilled or result.rowcount > 0
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime, nullable=False)
+
+    if not backfilled or 'request_summary' not in tables:
+        return
+
+    # The rollup skipped requests without a date; rebuild it to count them
+    if bind.dialect.name == 'postgresql':
+        month = "CAST(date_trunc('month', created_at) AS DATE)"
+    else:
+        month = "date(created_at, 'start of month')"
+    op.execute("DELETE FROM request_summary")
+    for request_type, table, amount in SOURCES:
+        if table not in tables:
+            continue
+        op.execute(
+            "INSERT INTO request_summary "
+            "(request_type, branch, department, status, month, request_count, total_amount) "
+            f"SELECT '{request_type}', branch, COALESCE(department, ''), status, {month}, "
+            f"COUNT(*), COALESCE(SUM({amount}), 0) "
+            f"FROM {table} WHERE status IS NOT NULL "
+            f"GROUP BY branch, COALESCE(department, ''), status, {month}"
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+
+    for _, table, _ in SOURCES:
+        if table in tables:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column('created_at', existing_type=sa.DateTime, nullable=True)
@@ -0,0 +1,40 @@
+"""add created_at to opex_capex_retirement
+
+Revision ID: 7d2e4b9c1a03
+Revises: 3f1c8e2a7b41
+Create Date: 2026-10-17 10:03:41.220915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e4b9c1a03'
+down_revision = '3f1c8e2a7b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Keyset pagination of the review queue orders by (created_at, id)
+    if 'opex_capex_retirement' in inspector.get_table_names():
+        columns = [column['name'] for column in inspector.get_columns('opex_capex_retirement')]
+        if 'created_at' not in columns:
+            op.add_column(
+                'opex_capex_retirement',
+                sa.Column('created_at', sa.DateTime, nullable=True, server_default=sa.func.now())
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'opex_capex_retirement' in inspector.get_table_names():
+        columns = [column['name'] for column in inspector.get_columns('opex_capex_retirement')]
+        if 'created_at' in columns:
+            op.drop_column('opex_capex_retirement', 'created_at')
@@ -0,0 +1,67 @@
+"""add request_summary rollup for dashboard aggregates
+
+Revision ID: a7e2c9d41f86
+Revises: c8f4a1d3e6b2
+Create Date: 2026-10-17 16:05:12.384910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7e2c9d41f86'
+down_revision = 'c8f4a1d3e6b2'
+branch_labels = None
+depends_on = None
+
+# (request type, table, amount column), as in inbox.INBOX_SOURCES
+SOURCES = [
+    ('cash_advance', 'cash_advance', 'amount'),
+    ('opex_capex_retirement', 'opex_capex_retirement', 'total_amount'),
+    ('petty_cash_advance', 'petty_cash_advance', 'total_amount'),
+    ('petty_cash_retirement', 'petty_cash_retirement', 'total_amount'),
+    ('stationary_request', 'stationary_request', 'total_amount'),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    if 'request_summary' not in tables:
+        op.create_table(
+            'request_summary',
+            sa.Column('request_type', sa.String(50), primary_key=True),
+            sa.Column('branch', sa.String(100), primary_key=True),
+            sa.Column('department', sa.String(100), primary_key=True),
+            sa.Column('status', sa.String(50), primary_key=True),
+            sa.Column('month', sa.Date, primary_key=True),
+            sa.Column('request_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('total_amount', sa.Numeric(16, 2), nullable=False, server_default='0'),
+        )
+        op.create_index('ix_request_summary_month', 'request_summary', ['month'])
+
+    # Backfill from the existing requests
+    if bind.dialect.name == 'postgresql':
+        month = "CAST(date_trunc('month', created_at) AS DATE)"
+    else:
+        month = "date(created_at, 'start of month')"
+    op.execute("DELETE FROM request_summary")
+    for request_type, table, amount in SOURCES:
+        if table not in tables:
+            continue
+        op.execute(
+            "INSERT INTO request_summary "
+            "(request_type, branch, department, status, month, request_count, total_amount) "
+            f"SELECT '{request_type}', branch, COALESCE(department, ''), status, {month}, "
+            f"COUNT(*), COALESCE(SUM({amount}), 0) "
+            f"FROM {table} WHERE created_at IS NOT NULL AND status IS NOT NULL "
+            f"GROUP BY branch, COALESCE(department, ''), status, {month}"
+        )
+
+
+def downgrade():
+    op.drop_index('ix_request_summary_month', table_name='request_summary')
+    op.drop_table('request_summary')
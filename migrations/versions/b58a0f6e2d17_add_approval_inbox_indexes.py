@@ -0,0 +1,69 @@
+"""add approval inbox indexes
+
+Revision ID: b58a0f6e2d17
+Revises: 7d2e4b9c1a03
+Create Date: 2026-10-17 10:47:12.803364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b58a0f6e2d17'
+down_revision = '7d2e4b9c1a03'
+branch_labels = None
+depends_on = None
+
+# Tables read by the unified approval inbox
+INBOX_TABLES = [
+    'cash_advance',
+    'opex_capex_retirement',
+    'petty_cash_advance',
+    'petty_cash_retirement',
+    'stationary_request',
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    # Every inbox branch needs created_at to order by age
+    for table in ('petty_cash_retirement', 'stationary_request'):
+        if table in tables:
+            columns = [column['name'] for column in inspector.get_columns(table)]
+            if 'created_at' not in columns:
+                op.add_column(table, sa.Column('created_at', sa.DateTime, nullable=True, server_default=sa.func.now()))
+
+    # Composite index serving "status = ? AND department = ? ORDER BY created_at, id"
+    index_columns = ['status', 'department', 'created_at', 'id']
+    for table in INBOX_TABLES:
+        if table not in tables:
+            continue
+        # Older databases may predate some of these columns (e.g. cash_advance.department)
+        table_columns = [column['name'] for column in inspector.get_columns(table)]
+        if not all(column in table_columns for column in index_columns):
+            continue
+        index_name = f'ix_{table}_status_department_created_at'
+        if index_name not in [index['name'] for index in inspector.get_indexes(table)]:
+            op.create_index(index_name, table, index_columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    for table in INBOX_TABLES:
+        if table in tables:
+            index_name = f'ix_{table}_status_department_created_at'
+            if index_name in [index['name'] for index in inspector.get_indexes(table)]:
+                op.drop_index(index_name, table_name=table)
+
+    for table in ('petty_cash_retirement', 'stationary_request'):
+        if table in tables:
+            columns = [column['name'] for column in inspector.get_columns(table)]
+            if 'created_at' in columns:
+                op.drop_column(table, 'created_at')
@@ -0,0 +1,30 @@
+"""add user_id, id index for the incremental notification feed
+
+Revision ID: c3a7e5f19d62
+Revises: 4a6f0d1e9b58
+Create Date: 2026-10-17 13:05:11.482903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a7e5f19d62'
+down_revision = '4a6f0d1e9b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'notifications' not in inspector.get_table_names():
+        return
+    if 'ix_notifications_user_id_id' not in [index['name'] for index in inspector.get_indexes('notifications')]:
+        op.create_index('ix_notifications_user_id_id', 'notifications', ['user_id', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_notifications_user_id_id', table_name='notifications')
@@ -0,0 +1,136 @@
+"""partition audit_logs by month and index it by entity and user
+
+Revision ID: c8f4a1d3e6b2
+Revises: 5b9d2c7e4f31
+Create Date: 2026-10-17 14:32:50.671218
+
+"""
+from datetime import datetime, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f4a1d3e6b2'
+down_revision = '5b9d2c7e4f31'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_audit_logs_entity_type_entity_id_performed_at', ['entity_type', 'entity_id', 'performed_at']),
+    ('ix_audit_logs_performed_by_performed_at', ['performed_by', 'performed_at']),
+]
+MONTHS_AHEAD = 3
+# Rows copied per INSERT ... SELECT when moving the existing audit log
+COPY_BATCH_SIZE = 50000
+
+
+def _months(start, end):
+    month = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month <= end:
+        following = (month + timedelta(days=32)).replace(day=1)
+        yield month, following
+        month = following
+
+
+def _create_indexes(inspector):
+    existing = [index['name'] for index in inspector.get_indexes('audit_logs')] \
+        if 'audit_logs' in inspector.get_table_names() else []
+    for name, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, 'audit_logs', columns)
+
+
+def _copy_rows(bind, source, target):
+    """Copy audit_logs rows between tables in id ranges of COPY_BATCH_SIZE."""
+    low, high = bind.execute(sa.text(f"SELECT min(id), max(id) FROM {source}")).first()
+    if low is None:
+        return
+    for start in range(low, high + 1, COPY_BATCH_SIZE):
+        bind.execute(sa.text(f"""
+            INSERT INTO {target} (id, action, entity_type, entity_id, performed_by, performed_at)
+            SELECT id, action, entity_type, entity_id, performed_by, performed_at FROM {source}
+            WHERE id >= :start AND id < :end
+        """), {'start': start, 'end': start + COPY_BATCH_SIZE})
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    if bind.dialect.name != 'postgresql':
+        # Other databases keep a plain table with the lookup indexes
+        if 'audit_logs' in tables:
+            _create_indexes(inspector)
+        return
+
+    partitioned = bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('audit_logs')"
+    )).scalar()
+    if partitioned:
+        return
+
+    existing = 'audit_logs' in tables
+    if existing:
+        op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned")
+        op.execute("ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey")
+        oldest = bind.execute(sa.text("SELECT min(performed_at) FROM audit_logs_unpartitioned")).scalar()
+    else:
+        oldest = None
+
+    op.execute("CREATE SEQUENCE IF NOT EXISTS audit_logs_id_seq")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            action VARCHAR(255) NOT NULL,
+            entity_type VARCHAR(100) NOT NULL,
+            entity_id INTEGER,
+            performed_by INTEGER NOT NULL REFERENCES users (id),
+            performed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, performed_at)
+        ) PARTITION BY RANGE (performed_at)
+    """)
+    # The sequence must belong to the new table before the old one is dropped
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+
+    now = datetime.utcnow()
+    for month, following in _months(oldest or now, now + timedelta(days=31 * MONTHS_AHEAD)):
+        op.execute(
+            f"CREATE TABLE audit_logs_{month:%Y_%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+        )
+    # Catches rows outside the created months until audit.ensure_partitions adds them
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    if existing:
+        _copy_rows(bind, 'audit_logs_unpartitioned', 'audit_logs')
+        op.execute("SELECT setval('audit_logs_id_seq', GREATEST((SELECT max(id) FROM audit_logs), 1))")
+        op.execute("DROP TABLE audit_logs_unpartitioned")
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'audit_logs', columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name='audit_logs')
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq') PRIMARY KEY,
+            action VARCHAR(255) NOT NULL,
+            entity_type VARCHAR(100) NOT NULL,
+            entity_id INTEGER,
+            performed_by INTEGER NOT NULL REFERENCES users (id),
+            performed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    _copy_rows(bind, 'audit_logs_partitioned', 'audit_logs')
+    op.execute("DROP TABLE audit_logs_partitioned")
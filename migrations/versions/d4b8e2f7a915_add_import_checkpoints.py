@@ -0,0 +1,36 @@
+"""add import_checkpoints for resumable bulk imports
+
+Revision ID: d4b8e2f7a915
+Revises: a7e2c9d41f86
+Create Date: 2026-10-17 17:42:36.201573
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8e2f7a915'
+down_revision = 'a7e2c9d41f86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'import_checkpoints' not in inspector.get_table_names():
+        op.create_table(
+            'import_checkpoints',
+            sa.Column('source', sa.String(255), primary_key=True),
+            sa.Column('line_number', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('byte_offset', sa.BigInteger, nullable=False, server_default='0'),
+            sa.Column('inserted_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('rejected_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime, nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table('import_checkpoints')
@@ -0,0 +1,65 @@
+"""add composite indexes on hot filter columns
+
+Revision ID: e91d3c5a8f20
+Revises: b58a0f6e2d17
+Create Date: 2026-10-17 11:31:55.164027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91d3c5a8f20'
+down_revision = 'b58a0f6e2d17'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns) matching the query shapes in routes.py
+INDEXES = [
+    # Approver queue and inbox without a department filter
+    ('ix_cash_advance_status_created_at', 'cash_advance', ['status', 'created_at', 'id']),
+    ('ix_opex_capex_retirement_status_created_at', 'opex_capex_retirement', ['status', 'created_at', 'id']),
+    ('ix_petty_cash_advance_status_created_at', 'petty_cash_advance', ['status', 'created_at', 'id']),
+    ('ix_petty_cash_retirement_status_created_at', 'petty_cash_retirement', ['status', 'created_at', 'id']),
+    ('ix_stationary_request_status_created_at', 'stationary_request', ['status', 'created_at', 'id']),
+    # Requests raised by one officer
+    ('ix_cash_advance_officer_id_created_at', 'cash_advance', ['officer_id', 'created_at']),
+    ('ix_opex_capex_retirement_created_by_created_at', 'opex_capex_retirement', ['created_by', 'created_at']),
+    ('ix_petty_cash_advance_officer_id_created_at', 'petty_cash_advance', ['officer_id', 'created_at']),
+    ('ix_petty_cash_retirement_created_by_created_at', 'petty_cash_retirement', ['created_by', 'created_at']),
+    ('ix_stationary_request_created_by_created_at', 'stationary_request', ['created_by', 'created_at']),
+    # Notifications feed and unread counts
+    ('ix_notifications_user_id_is_read_created_at', 'notifications', ['user_id', 'is_read', 'created_at']),
+    # Supervisor lookup by role and department
+    ('ix_users_role_id_department_id', 'users', ['role_id', 'department_id']),
+    ('ix_expenses_status_department_id_created_at', 'expenses', ['status', 'department_id', 'created_at']),
+]
+
+
+def _existing(inspector, table):
+    return [index['name'] for index in inspector.get_indexes(table)]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    for name, table, columns in INDEXES:
+        if table not in tables:
+            continue
+        table_columns = [column['name'] for column in inspector.get_columns(table)]
+        # Older databases may predate some of these columns
+        if all(column in table_columns for column in columns) and name not in _existing(inspector, table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    for name, table, columns in reversed(INDEXES):
+        if table in tables and name in _existing(inspector, table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,74 @@
+"""map legacy Approved/Rejected request statuses to the workflow statuses
+
+Revision ID: f2a6c8e1b4d9
+Revises: d4b8e2f7a915
+Create Date: 2026-10-17 19:42:08.517306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6c8e1b4d9'
+down_revision = 'd4b8e2f7a915'
+branch_labels = None
+depends_on = None
+
+# (request type, table, amount column), as in inbox.INBOX_SOURCES
+SOURCES = [
+    ('cash_advance', 'cash_advance', 'amount'),
+    ('opex_capex_retirement', 'opex_capex_retirement', 'total_amount'),
+    ('petty_cash_advance', 'petty_cash_advance', 'total_amount'),
+    ('petty_cash_retirement', 'petty_cash_retirement', 'total_amount'),
+    ('stationary_request', 'stationary_request', 'total_amount'),
+]
+
+# Before the workflow, a single review step set one of these final
+# statuses; they map to the end states of the approval chain
+LEGACY_STATUSES = {
+    'Approved': 'Approved by Approver',
+    'Rejected': 'Returned to Officer',
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+
+    changed = False
+    for _, table, _ in SOURCES:
+        if table not in tables:
+            continue
+        for old, new in LEGACY_STATUSES.items():
+            result = bind.execute(
+                sa.text(f"UPDATE {table} SET status = :new WHERE status = :old"), {'old': old, 'new': new}
+            )
+            changed = changed or result.rowcount > 0
+
+    if not changed or 'request_summary' not in tables:
+        return
+
+    # Rebuild the rollup, whose groups are keyed by status
+    if bind.dialect.name == 'postgresql':
+        month = "CAST(date_trunc('month', created_at) AS DATE)"
+    else:
+        month = "date(created_at, 'start of month')"
+    op.execute("DELETE FROM request_summary")
+    for request_type, table, amount in SOURCES:
+        if table not in tables:
+            continue
+        op.execute(
+            "INSERT INTO request_summary "
+            "(request_type, branch, department, status, month, request_count, total_amount) "
+            f"SELECT '{request_type}', branch, COALESCE(department, ''), status, {month}, "
+            f"COUNT(*), COALESCE(SUM({amount}), 0) "
+            f"FROM {table} WHERE created_at IS NOT NULL AND status IS NOT NULL "
+            f"GROUP BY branch, COALESCE(department, ''), status, {month}"
+        )
+
+
+def downgrade():
+    # The mapped rows cannot be told apart from requests that reached the
+    # same status through the workflow, so they are left as they are
+    pass
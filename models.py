@@ -39,6 +39,7 @@ class Department(db.Model):
     name = db.Column(db.String(255), nullable=False)
     branch_id = db.Column(db.Integer, db.ForeignKey('branches.id'), nullable=False)
     branch = db.relationship('Branch', backref=db.backref('departments', lazy=True))
+    users = db.relationship('User', back_populates='department')
 
     def __init__(self, name, branch_id):
         self.name = name
@@ -49,6 +50,8 @@ class Department(db.Model):
 
 # Role Model
 class Role(db.Model):
+    __tablename__ = 'roles'
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     users = db.relationship('User', back_populates='role')
@@ -69,6 +72,10 @@ class Expense(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_expenses_status_department_id_created_at', 'status', 'department_id', 'created_at'),
+    )
+
     # Relationships
     created_by_user = db.relationship('User', backref='expenses_created') 
     department = db.relationship('Department', backref='expenses')
@@ -100,11 +107,14 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+    __table_args__ = (
+        db.Index('ix_users_role_id_department_id', 'role_id', 'department_id'),
+    )
+
     # Relationships
     role = db.relationship('Role', back_populates='users')
     department = db.relationship('Department', back_populates='users')
     notifications = db.relationship('Notification', backref='user', lazy=True)
-    expenses_created = db.relationship('Expense', backref='created_by_user', foreign_keys="[Expense.created_by]")
 
     def __init__(self, username, email, password, first_name, last_name, role_id=None, department_id=None):
         self.username = username
@@ -140,12 +150,31 @@ class CashAdvance(db.Model):
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     purpose = db.Column(db.Text, nullable=False)
     status = db.Column(db.String(50), default='Pending')
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped on every status transition
     management_board_approval_path = db.Column(db.String(255), nullable=True)
     proforma_invoice_path = db.Column(db.String(255), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_cash_advance_status_department_created_at', 'status', 'department', 'created_at', 'id'),
+        db.Index('ix_cash_advance_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_cash_advance_officer_id_created_at', 'officer_id', 'created_at'),
+    )
 
     officer = db.relationship('User', backref='cash_advances')
 
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'officer_id': self.officer_id,
+            'branch': self.branch,
+            'department': self.department,
+            'amount': str(self.amount),
+            'purpose': self.purpose,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 
 # OPEX/CAPEX Retirement Model
 class OpexCapexRetirement(db.Model):
@@ -158,13 +187,36 @@ class OpexCapexRetirement(db.Model):
     description = db.Column(db.Text, nullable=True)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     status = db.Column(db.String(50), default='Pending')
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_opex_capex_retirement_status_department_created_at', 'status', 'department', 'created_at', 'id'),
+        db.Index('ix_opex_capex_retirement_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_opex_capex_retirement_created_by_created_at', 'created_by', 'created_at'),
+    )
 
     created_by_user = db.relationship('User', foreign_keys=[created_by])
 
     def __repr__(self):
         return f'<OpexCapexRetirement {self.payee_name}>'
 
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'created_by': self.created_by,
+            'branch': self.branch,
+            'department': self.department,
+            'payee_name': self.payee_name,
+            'payee_account_number': self.payee_account_number,
+            'invoice_amount': str(self.invoice_amount),
+            'total_amount': str(self.total_amount),
+            'description': self.description,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 
 # Petty Cash Advance Model
 class PettyCashAdvance(db.Model):
@@ -176,10 +228,30 @@ class PettyCashAdvance(db.Model):
     items = db.Column(db.JSON, nullable=False)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     status = db.Column(db.String(50), default='Pending')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_petty_cash_advance_status_department_created_at', 'status', 'department', 'created_at', 'id'),
+        db.Index('ix_petty_cash_advance_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_petty_cash_advance_officer_id_created_at', 'officer_id', 'created_at'),
+    )
 
     officer = db.relationship('User', backref='petty_cash_advances')
 
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'officer_id': self.officer_id,
+            'branch': self.branch,
+            'department': self.department,
+            'description': self.description,
+            'items': self.items,
+            'total_amount': str(self.total_amount),
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 
 # Petty Cash Retirement Model
 class PettyCashRetirement(db.Model):
@@ -190,7 +262,15 @@ class PettyCashRetirement(db.Model):
     items = db.Column(db.JSON, nullable=False)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     status = db.Column(db.String(50), default='Pending')
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_petty_cash_retirement_status_department_created_at', 'status', 'department', 'created_at', 'id'),
+        db.Index('ix_petty_cash_retirement_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_petty_cash_retirement_created_by_created_at', 'created_by', 'created_at'),
+    )
 
     created_by_user = db.relationship('User', foreign_keys=[created_by])
 
@@ -203,10 +283,20 @@ class StationaryRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     branch = db.Column(db.String(100), nullable=False)
     department = db.Column(db.String(100), nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    quantity = db.Column(db.Integer, nullable=True)
     items = db.Column(db.JSON, nullable=False)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     status = db.Column(db.String(50), default='Pending')
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_stationary_request_status_department_created_at', 'status', 'department', 'created_at', 'id'),
+        db.Index('ix_stationary_request_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_stationary_request_created_by_created_at', 'created_by', 'created_at'),
+    )
 
     created_by_user = db.relationship('User', foreign_keys=[created_by])
 
@@ -224,6 +314,11 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notifications_user_id_id', 'user_id', 'id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -234,12 +329,48 @@ class Notification(db.Model):
         }
 
 
+# Email Outbox Model (durable queue drained by the background mail worker)
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.JSON, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='Queued', nullable=False)  # Queued, Sending, Sent, Failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.id}, Status: {self.status}>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'subject': self.subject,
+            'recipients': self.recipients,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat(),
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+
 # Document Uploads Model (for tracking uploaded files)
 class DocumentUploads(db.Model):
     __tablename__ = 'document_uploads'
     id = db.Column(db.Integer, primary_key=True)
     file_name = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(255), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True, index=True)  # Content address of the stored blob
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -365,6 +496,13 @@ class AuditLog(db.Model):
     performed_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     performed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Timestamp of the action
 
+    # On PostgreSQL the table is range-partitioned by month on performed_at
+    # (primary key (id, performed_at)); see the c8f4a1d3e6b2 migration.
+    __table_args__ = (
+        db.Index('ix_audit_logs_entity_type_entity_id_performed_at', 'entity_type', 'entity_id', 'performed_at'),
+        db.Index('ix_audit_logs_performed_by_performed_at', 'performed_by', 'performed_at'),
+    )
+
     # Relationship to the user who performed the action
     user = db.relationship('User', backref=db.backref('audit_logs', lazy='dynamic'))
 
@@ -383,6 +521,41 @@ class AuditLog(db.Model):
         }
 
 
+# Dashboard rollup of the request tables, maintained by reporting.py
+class RequestSummary(db.Model):
+    __tablename__ = 'request_summary'
+
+    request_type = db.Column(db.String(50), primary_key=True)  # As in inbox.INBOX_SOURCES
+    branch = db.Column(db.String(100), primary_key=True)
+    department = db.Column(db.String(100), primary_key=True)  # '' for requests without a department
+    status = db.Column(db.String(50), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # First day of the month the request was created
+    request_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_request_summary_month', 'month'),
+    )
+
+    def __repr__(self):
+        return f"<RequestSummary {self.request_type} {self.branch} {self.status} {self.month}>"
+
+
+# Progress of a bulk import (bulk_import.py), saved in the same transaction as each batch
+class ImportCheckpoint(db.Model):
+    __tablename__ = 'import_checkpoints'
+
+    source = db.Column(db.String(255), primary_key=True)  # Name of the imported file
+    line_number = db.Column(db.Integer, nullable=False, default=0)  # Lines consumed so far
+    byte_offset = db.Column(db.BigInteger, nullable=False, default=0)  # Where to resume reading
+    inserted_count = db.Column(db.Integer, nullable=False, default=0)
+    rejected_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ImportCheckpoint {self.source} line {self.line_number}>"
+
+
 # Event listener to automatically set timestamps
 @event.listens_for(Expense, 'before_update')
 def receive_before_update(mapper, connection, target):
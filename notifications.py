@@ -0,0 +1,264 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+from extensions import db
+from models import Notification
+
+# Unread counters live in Redis as notifications:unread:<user_id> and are
+# adjusted when a transaction that inserts or reads notifications commits.
+# New notifications are announced on notifications:user:<user_id> so
+# long-poll requests wake up instead of clients polling the database.
+UNREAD_TTL_SECONDS = int(os.getenv('NOTIFICATION_UNREAD_TTL_SECONDS', '3600'))
+POLL_TIMEOUT_SECONDS = int(os.getenv('NOTIFICATION_POLL_TIMEOUT_SECONDS', '25'))
+# Long-polls allowed to wait at once in each worker process. Every waiting
+# poll holds a worker thread, so this must stay below gunicorn's --threads;
+# polls beyond it return at once and the client is told to retry later.
+POLL_MAX_WAITERS = int(os.getenv('NOTIFICATION_POLL_MAX_WAITERS', '4'))
+POLL_RETRY_SECONDS = int(os.getenv('NOTIFICATION_POLL_RETRY_SECONDS', '10'))
+
+# Shared Redis client (decode_responses=True); set by init_notifications() in create_app.
+# Without Redis, counts come from the database and wake-ups only reach
+# long-polls in this process.
+_redis = None
+
+_wakeup = threading.Condition()
+_local_versions = Counter()
+_waiters = threading.BoundedSemaphore(POLL_MAX_WAITERS) if POLL_MAX_WAITERS > 0 else None
+
+# Increment the counter only if it is cached; a missing key is rebuilt from
+# the database on read. The version key changes on every update, so a read
+# that is rebuilding the counter can tell that its count is already stale.
+_INCR_IF_EXISTS = """
+redis.call('incr', KEYS[2])
+redis.call('expire', KEYS[2], ARGV[2])
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+
+def init_notifications(redis_client):
+    global _redis
+    _redis = redis_client
+
+
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def _version_key(user_id):
+    return f"notifications:unread_version:{user_id}"
+
+
+def _channel(user_id):
+    return f"notifications:user:{user_id}"
+
+
+def notify(user_id, message):
+    """Add an in-app notification to the current session.
+
+    The unread counter and any waiting long-polls are updated when the
+    caller commits.
+    """
+    notification = Notification(user_id=user_id, message=message)
+    db.session.add(notification)
+    return notification
+
+
+def unread_count(user_id):
+    """Return the user's unread notification count, cached in Redis."""
+    if _redis is not None:
+        try:
+            cached = _redis.get(_unread_key(user_id))
+            if cached is not None:
+                return int(cached)
+        except RedisError as e:
+            logging.warning(f"Unread counter read failed for user {user_id}: {e}")
+
+    if _redis is None:
+        return _count_unread(user_id)
+
+    # Watch the version key while counting: if a commit updates the counter
+    # in between, its delta may be missing from the count, so the count is
+    # returned but not cached
+    try:
+        with _redis.pipeline() as pipe:
+            pipe.watch(_version_key(user_id))
+            count = _count_unread(user_id)
+            pipe.multi()
+            pipe.set(_unread_key(user_id), count, ex=UNREAD_TTL_SECONDS, nx=True)
+            pipe.execute()
+    except WatchError:
+        pass
+    except RedisError as e:
+        logging.warning(f"Unread counter write failed for user {user_id}: {e}")
+        count = _count_unread(user_id)
+    return count
+
+
+def _count_unread(user_id):
+    # Always count on the primary: on @read_replica views db.session reads
+    # the replica, and a lagging count would be cached as the counter's base
+    with Session(db.engine) as session:
+        return session.query(func.count(Notification.id)).filter(
+            Notification.user_id == user_id, Notification.is_read.is_(False)
+        ).scalar()
+
+
+def fetch_feed(user_id, since_id=None, before_id=None, limit=50, session=None):
+    """Fetch one page of a user's notifications.
+
+    With since_id, returns notifications newer than since_id, oldest first,
+    so a client can append them to what it already has. Otherwise returns
+    the newest notifications (older than before_id, if given), newest first.
+    Rows are read through session, by default the request's db.session.
+
+    Returns:
+        list: Notification rows.
+    """
+    query = (session or db.session).query(Notification).filter(Notification.user_id == user_id)
+    if since_id is not None:
+        return query.filter(Notification.id > since_id).order_by(Notification.id).limit(limit).all()
+    if before_id is not None:
+        query = query.filter(Notification.id < before_id)
+    return query.order_by(Notification.id.desc()).limit(limit).all()
+
+
+def mark_read(user_id, ids=None, up_to_id=None):
+    """Mark a user's notifications as read in one UPDATE.
+
+    Args:
+        user_id (int): The owner of the notifications.
+        ids (list): Notification IDs to mark, or None.
+        up_to_id (int): Mark everything up to and including this ID, or None.
+            With neither argument every notification is marked.
+
+    Returns:
+        int: The number of notifications that changed from unread to read.
+    """
+    query = Notification.query.filter(Notification.user_id == user_id, Notification.is_read.is_(False))
+    if ids is not None:
+        query = query.filter(Notification.id.in_(ids))
+    if up_to_id is not None:
+        query = query.filter(Notification.id <= up_to_id)
+
+    changed = query.update({Notification.is_read: True}, synchronize_session=False)
+    if changed:
+        db.session.info.setdefault('unread_deltas', Counter())[user_id] -= changed
+    return changed
+
+
+def wait_for_notifications(user_id, since_id, timeout=POLL_TIMEOUT_SECONDS):
+    """Block until the user has notifications newer than since_id, or until timeout.
+
+    Returns:
+        list: The new notifications, oldest first (empty on timeout), or
+            None without waiting when POLL_MAX_WAITERS polls are already
+            waiting in this process.
+    """
+    if _waiters is not None and not _waiters.acquire(blocking=False):
+        return None
+    try:
+        if _redis is not None:
+            try:
+                return _wait_redis(user_id, since_id, timeout)
+            except RedisError as e:
+                logging.warning(f"Notification subscription failed for user {user_id}: {e}")
+        return _wait_local(user_id, since_id, timeout)
+    finally:
+        if _waiters is not None:
+            _waiters.release()
+
+
+def _wait_redis(user_id, since_id, timeout):
+    pubsub = _redis.pubsub(ignore_subscribe_messages=True)
+    try:
+        # Subscribe before checking so a notification committed in between is not missed
+        pubsub.subscribe(_channel(user_id))
+        deadline = time.monotonic() + timeout
+        while True:
+            rows = _fetch_new(user_id, since_id)
+            remaining = deadline - time.monotonic()
+            if rows or remaining <= 0:
+                return rows
+            pubsub.get_message(timeout=remaining)
+    finally:
+        pubsub.close()
+
+
+def _wait_local(user_id, since_id, timeout):
+    deadline = time.monotonic() + timeout
+    while True:
+        with _wakeup:
+            version = _local_versions[user_id]
+        rows = _fetch_new(user_id, since_id)
+        remaining = deadline - time.monotonic()
+        if rows or remaining <= 0:
+            return rows
+        with _wakeup:
+            if _local_versions[user_id] == version:
+                _wakeup.wait(remaining)
+
+
+def _fetch_new(user_id, since_id):
+    # Each check reads on a short-lived session of its own, so it sees newly
+    # committed rows without ending the request's transaction; closing the
+    # session detaches the loaded rows
+    with Session(db.engine) as session:
+        return fetch_feed(user_id, since_id=since_id, session=session)
+
+
+def _publish(deltas, woken):
+    if _redis is not None:
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            for user_id, delta in deltas.items():
+                if delta:
+                    pipe.eval(_INCR_IF_EXISTS, 2, _unread_key(user_id), _version_key(user_id), delta, UNREAD_TTL_SECONDS)
+            for user_id in woken:
+                pipe.publish(_channel(user_id), 'new')
+            pipe.execute()
+        except RedisError as e:
+            # Drop the cached counters rather than leave them wrong
+            logging.warning(f"Notification counter update failed: {e}")
+            if deltas:
+                try:
+                    _redis.delete(*[_unread_key(user_id) for user_id in deltas])
+                except RedisError:
+                    pass
+
+    if woken:
+        with _wakeup:
+            for user_id in woken:
+                _local_versions[user_id] += 1
+            _wakeup.notify_all()
+
+
+@event.listens_for(Notification, 'after_insert')
+def _count_new_notification(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    if not target.is_read:
+        session.info.setdefault('unread_deltas', Counter())[target.user_id] += 1
+    session.info.setdefault('notified_users', set()).add(target.user_id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_on_commit(session):
+    deltas = session.info.pop('unread_deltas', None)
+    woken = session.info.pop('notified_users', None)
+    if deltas or woken:
+        _publish(deltas or Counter(), woken or set())
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_notification_changes(session):
+    session.info.pop('unread_deltas', None)
+    session.info.pop('notified_users', None)
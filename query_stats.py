@@ -0,0 +1,115 @@
+import logging
+import os
+import random
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+import msgspec
+from sqlalchemy import event
+from extensions import db
+
+# Per-request SQL instrumentation. Only a sample of requests is measured, so it
+# can stay enabled in production; unsampled requests pay one attribute lookup
+# per statement.
+SAMPLE_RATE = float(os.getenv('QUERY_STATS_SAMPLE_RATE', '0.1'))
+# A statement repeated this many times in one request is reported as an N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv('QUERY_STATS_N_PLUS_ONE_THRESHOLD', '5'))
+# Setting this request header forces a sample (useful when profiling one route)
+FORCE_HEADER = 'X-Query-Stats'
+
+logger = logging.getLogger('query_stats')
+
+
+class RequestQueryStats:
+    """Query count, total DB time and statement frequencies for one request."""
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statements executed at least `threshold` times, most frequent first."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+def current_stats():
+    """Return the stats of the current request, or None if it is not sampled."""
+    if not has_request_context():
+        return None
+    return g.get('query_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    if stats is None:
+        return
+    started = conn.info.get('query_start_time')
+    if started:
+        stats.duration += time.perf_counter() - started.pop()
+    stats.count += 1
+    # Parameters are bound separately, so a lazy load in a loop repeats the same text
+    stats.statements[statement] += 1
+
+
+def instrument_engine(engine):
+    """Attach the query counters to an engine (called for every bind in init_query_stats)."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_query_stats(app):
+    """Count queries and DB time per sampled request.
+
+    Sampled responses get X-DB-Query-Count and X-DB-Time-Ms headers and a
+    JSON log line on the 'query_stats' logger; statements repeated
+    N_PLUS_ONE_THRESHOLD times or more are logged as a warning.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    @app.before_request
+    def _start_query_stats():
+        if request.headers.get(FORCE_HEADER) or random.random() < SAMPLE_RATE:
+            g.query_stats = RequestQueryStats()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        duration_ms = round(stats.duration * 1000, 2)
+        repeated = stats.repeated()
+        response.headers['X-DB-Query-Count'] = str(stats.count)
+        response.headers['X-DB-Time-Ms'] = str(duration_ms)
+
+        logger.info(msgspec.json.encode({
+            'event': 'request_queries',
+            'method': request.method,
+            'endpoint': request.endpoint,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_time_ms': duration_ms,
+            'repeated_statements': len(repeated),
+        }).decode())
+        if repeated:
+            response.headers['X-DB-Repeated-Statements'] = str(len(repeated))
+            for statement, count in repeated:
+                logger.warning(msgspec.json.encode({
+                    'event': 'n_plus_one',
+                    'endpoint': request.endpoint,
+                    'path': request.path,
+                    'count': count,
+                    'statement': ' '.join(statement.split())[:500],
+                }).decode())
+        return response
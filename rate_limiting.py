@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, jsonify, request, session
+from flask_limiter.util import get_remote_address
+from limits import parse
+from extensions import limiter
+
+# Per-route limits, shared by every route in the scope. They are enforced in
+# Redis with the moving-window strategy (one atomic Lua script per check).
+# A local token bucket per client sits in front of Redis as an early-reject
+# filter only: it turns away clients that have already used up the limit on
+# this process without a Redis round trip, but every request it lets through
+# is still checked in Redis.
+RATE_LIMITS = {
+    'login': os.getenv('RATELIMIT_LOGIN', '10 per minute'),
+    'submission': os.getenv('RATELIMIT_SUBMISSION', '30 per minute'),
+}
+RATE_LIMIT_ITEMS = {scope: parse(limit) for scope, limit in RATE_LIMITS.items()}
+# Upper bound on the number of clients tracked by the early-reject filter
+EARLY_REJECT_MAX_KEYS = int(os.getenv('RATELIMIT_EARLY_REJECT_MAX_KEYS', '10000'))
+
+
+def user_or_ip():
+    """Rate-limit key: the logged-in user, or the client address for anonymous requests."""
+    user_id = session.get('user_id')
+    return f"user:{user_id}" if user_id else get_remote_address()
+
+
+KEY_FUNCS = {
+    'login': get_remote_address,
+    'submission': user_or_ip,
+}
+
+_lock = threading.Lock()
+_buckets = OrderedDict()
+_view_scopes = {}
+_rejected = {}
+
+
+class _TokenBucket:
+    """Local token bucket refilled at the scope's long-run rate."""
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, capacity):
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+
+def _count_rejection(scope, source):
+    with _lock:
+        counters = _rejected.setdefault(scope, {'local': 0, 'redis': 0})
+        counters[source] += 1
+
+
+def rate_limit_stats():
+    """Return rejected request counters per scope for this process."""
+    with _lock:
+        return {scope: dict(counters) for scope, counters in _rejected.items()}
+
+
+def _view_scope():
+    """Scope of the rate_limit() decorator on the current route, if any."""
+    view = current_app.view_functions.get(request.endpoint)
+    return _view_scopes.get(f"{view.__module__}.{view.__name__}") if view else None
+
+
+def rate_limit(scope):
+    """Apply a scope's shared limit to a route and register it for the early-reject filter."""
+    def decorator(f):
+        _view_scopes[f"{f.__module__}.{f.__name__}"] = scope
+        return limiter.shared_limit(RATE_LIMITS[scope], scope=scope, key_func=KEY_FUNCS[scope])(f)
+    return decorator
+
+
+def _take_local_token(scope, key):
+    """Take a token from the local bucket; False means this process alone has exceeded the limit."""
+    item = RATE_LIMIT_ITEMS[scope]
+    capacity = item.amount
+    rate = item.amount / item.get_expiry()
+    now = time.monotonic()
+
+    with _lock:
+        bucket = _buckets.get((scope, key))
+        if bucket is None:
+            bucket = _buckets[(scope, key)] = _TokenBucket(capacity)
+            if len(_buckets) > EARLY_REJECT_MAX_KEYS:
+                _buckets.popitem(last=False)
+        else:
+            _buckets.move_to_end((scope, key))
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+
+        if bucket.tokens < 1:
+            return False
+        bucket.tokens -= 1
+        return True
+
+
+def init_rate_limiting(app):
+    """Configure the shared limiter and put the local early-reject filter in front of it.
+
+    Must be called before limiter.init_app(app) so the filter runs before
+    the Redis check. A client whose local bucket is empty has already used
+    up its limit on this process alone, so it is rejected without a Redis
+    round trip. The filter never admits a request on its own: every request
+    it passes is checked against the shared Redis window, so allowed
+    requests still cost one Redis round trip.
+    """
+    app.config.setdefault('RATELIMIT_STRATEGY', 'moving-window')
+    app.config.setdefault('RATELIMIT_HEADERS_ENABLED', True)
+    # Keep limiting (per process) if Redis is unreachable instead of failing requests
+    app.config.setdefault('RATELIMIT_IN_MEMORY_FALLBACK_ENABLED', True)
+    app.config.setdefault('RATELIMIT_STORAGE_OPTIONS', {'socket_timeout': 0.05, 'socket_connect_timeout': 0.05})
+    app.config.setdefault('RATELIMIT_ON_BREACH_CALLBACK', _on_breach)
+
+    @app.before_request
+    def _local_early_reject():
+        scope = _view_scope()
+        if scope is None or not limiter.enabled:
+            return None
+        if not _take_local_token(scope, KEY_FUNCS[scope]()):
+            _count_rejection(scope, 'local')
+            item = RATE_LIMIT_ITEMS[scope]
+            response = jsonify({"error": f"Rate limit exceeded: {RATE_LIMITS[scope]}"})
+            response.headers['Retry-After'] = str(max(1, int(item.get_expiry() / item.amount)))
+            return response, 429
+        return None
+
+
+def _on_breach(request_limit):
+    _count_rejection(_view_scope() or 'default', 'redis')
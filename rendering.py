@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+from celery import shared_task
+from PIL import Image, UnidentifiedImageError
+import pdf2image
+from pdf2image.exceptions import PDFPageCountError, PDFSyntaxError
+from sqlalchemy import event
+from extensions import db
+from storage import blob_path
+
+# Rendered previews are cached per document hash: uploads/renders/<sha256>/,
+# with a render.json manifest recording the page count, or the error for
+# documents that cannot be rendered
+RENDER_ROOT = os.path.join('uploads', 'renders')
+RENDER_MAX_PAGES = int(os.getenv('RENDER_MAX_PAGES', '3'))
+RENDER_DPI = int(os.getenv('RENDER_DPI', '100'))
+THUMBNAIL_SIZE = (256, 256)
+MANIFEST_NAME = 'render.json'
+# Errors caused by the document itself; rendering it again would fail the same way
+CONTENT_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, PDFPageCountError, PDFSyntaxError)
+
+
+def render_dir(sha256):
+    return os.path.join(RENDER_ROOT, sha256)
+
+
+def thumbnail_path(sha256, page=1):
+    """Return the cached thumbnail path for a page, or None if it is not rendered yet."""
+    path = os.path.join(render_dir(sha256), f'thumb_{page}.jpg')
+    return path if os.path.exists(path) else None
+
+
+def render_status(sha256):
+    """Return the render manifest of a document, or None if it is not rendered yet.
+
+    The manifest is a dict with the number of rendered pages and, for
+    documents that cannot be rendered, the error.
+    """
+    target = render_dir(sha256)
+    try:
+        with open(os.path.join(target, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        if not os.path.isdir(target):
+            return None
+        # Rendered before manifests were written
+        pages = len([name for name in os.listdir(target) if name.startswith('thumb_')])
+        return {'pages': pages, 'error': None}
+
+
+def _write_manifest(directory, pages, error=None):
+    with open(os.path.join(directory, MANIFEST_NAME), 'w') as f:
+        json.dump({'pages': pages, 'error': error}, f)
+
+
+def _is_pdf(path):
+    with open(path, 'rb') as f:
+        return f.read(5) == b'%PDF-'
+
+
+def _make_thumbnail(image, path):
+    """Save a fixed-size JPEG thumbnail, decoding JPEG sources at reduced scale."""
+    image.draft('RGB', THUMBNAIL_SIZE)
+    image = image.convert('RGB')
+    image.thumbnail(THUMBNAIL_SIZE)
+    image.save(path, 'JPEG', quality=80)
+
+
+def render_document(sha256):
+    """Render page previews and thumbnails for a stored blob.
+
+    Only the first RENDER_MAX_PAGES pages of a PDF are rasterised, at
+    RENDER_DPI. Output is written to a temporary directory and renamed into
+    place, so a finished render directory is also the cache entry: documents
+    with the same content are rendered once. A document that is neither a
+    readable PDF nor an image gets a manifest recording the error, so it is
+    not queued again.
+
+    Args:
+        sha256 (str): The content hash of the stored document.
+
+    Returns:
+        str: The render directory.
+    """
+    target = render_dir(sha256)
+    if os.path.isdir(target):
+        return target
+
+    source = blob_path(sha256)
+    os.makedirs(RENDER_ROOT, exist_ok=True)
+    work_dir = tempfile.mkdtemp(dir=RENDER_ROOT, prefix='.render-')
+    try:
+        try:
+            if _is_pdf(source):
+                pages = pdf2image.convert_from_path(
+                    source, dpi=RENDER_DPI, first_page=1, last_page=RENDER_MAX_PAGES, thread_count=1
+                )
+                for number, page in enumerate(pages, start=1):
+                    page.save(os.path.join(work_dir, f'page_{number}.png'), 'PNG')
+                    _make_thumbnail(page, os.path.join(work_dir, f'thumb_{number}.jpg'))
+                _write_manifest(work_dir, len(pages))
+            else:
+                with Image.open(source) as image:
+                    _make_thumbnail(image, os.path.join(work_dir, 'thumb_1.jpg'))
+                _write_manifest(work_dir, 1)
+        except CONTENT_ERRORS as e:
+            logging.warning(f"Document {sha256} cannot be rendered: {e}")
+            for name in os.listdir(work_dir):
+                os.remove(os.path.join(work_dir, name))
+            _write_manifest(work_dir, 0, error=str(e) or type(e).__name__)
+
+        try:
+            os.rename(work_dir, target)
+        except OSError:
+            # Another worker finished the same document first
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return target
+    except Exception as e:
+        logging.error(f"Error rendering document {sha256}: {e}")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+
+@shared_task(name='rendering.render_document', ignore_result=True)
+def render_document_task(sha256):
+    """Celery task: render previews for a stored document off the request path."""
+    render_document(sha256)
+
+
+def queue_render(sha256):
+    """Ask the worker to render a document unless it is already cached."""
+    if os.path.isdir(render_dir(sha256)):
+        return
+    try:
+        render_document_task.delay(sha256)
+    except Exception as e:
+        logging.warning(f"Could not dispatch render task for {sha256}: {e}")
+
+
+@event.listens_for(db.session, 'after_commit')
+def _render_new_uploads(session):
+    """Queue renders for blobs uploaded in a transaction once it commits."""
+    for sha256 in session.info.pop('uploaded_blobs', ()):
+        queue_render(sha256)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_uploaded_blobs(session):
+    session.info.pop('uploaded_blobs', None)
@@ -0,0 +1,230 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import Date, cast, delete, event, func, insert, inspect, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from extensions import db
+from inbox import INBOX_SOURCES
+from models import RequestSummary
+
+# request_summary holds one row per (request type, branch, department,
+# status, month) with the request count and amount total. It is kept up to
+# date inside the transaction that changes the requests: ORM inserts and
+# updates are summarized from the flush, and workflow status changes (Core
+# UPDATEs) call summarize_status_change(), bulk imports (Core INSERTs)
+# summarize_inserted_rows(). Dashboard queries read only the rollup, so
+# their cost depends on the number of groups, not on history.
+
+# model: (request type, amount column)
+SUMMARY_SOURCES = {model: (request_type, amount) for request_type, model, amount, _, _ in INBOX_SOURCES}
+GROUP_COLUMNS = ('request_type', 'branch', 'department', 'status', 'month')
+
+# Upserts add to an existing group row instead of replacing it
+_UPSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+
+def _key(request_type, branch, department, status, created_at):
+    """The group a request counts towards, or None when, as in rebuild_summary(), it has none."""
+    if created_at is None or status is None:
+        return None
+    return request_type, branch, department or '', status, created_at.date().replace(day=1)
+
+
+def apply_deltas(connection, deltas):
+    """Add {group key: [count, amount]} deltas to request_summary in one upsert."""
+    rows = [
+        dict(zip(GROUP_COLUMNS, key), request_count=count, total_amount=amount)
+        for key, (count, amount) in deltas.items() if count or amount
+    ]
+    if not rows:
+        return
+    table = RequestSummary.__table__
+    statement = _UPSERTS[connection.dialect.name](table)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(GROUP_COLUMNS),
+        set_={
+            'request_count': table.c.request_count + statement.excluded.request_count,
+            'total_amount': table.c.total_amount + statement.excluded.total_amount,
+        }
+    )
+    connection.execute(statement, rows)
+
+    # Groups left without requests are removed rather than kept at zero
+    emptied = [key for key, (count, _) in deltas.items() if count < 0]
+    if emptied:
+        connection.execute(
+            delete(table)
+            .where(tuple_(*(table.c[name] for name in GROUP_COLUMNS)).in_(emptied))
+            .where(table.c.request_count <= 0)
+        )
+
+
+def summarize_status_change(model, ids, source, target, session=None):
+    """Move requests changed by a Core UPDATE from one status to another in the rollup.
+
+    Call in the same transaction as the UPDATE.
+    """
+    session = session or db.session()
+    request_type, amount = SUMMARY_SOURCES[model]
+    rows = session.execute(
+        select(model.branch, model.department, model.created_at, amount.label('amount')).where(model.id.in_(ids))
+    ).all()
+
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for row in rows:
+        amount_value = row.amount or 0
+        old_key = _key(request_type, row.branch, row.department, source, row.created_at)
+        new_key = _key(request_type, row.branch, row.department, target, row.created_at)
+        if old_key is not None:
+            deltas[old_key][0] -= 1
+            deltas[old_key][1] -= amount_value
+        if new_key is not None:
+            deltas[new_key][0] += 1
+            deltas[new_key][1] += amount_value
+    apply_deltas(session.connection(), deltas)
+
+
+def summarize_inserted_rows(connection, model, rows):
+    """Add requests inserted with Core (bypassing the session) to the rollup.
+
+    Call in the same transaction as the INSERT.
+
+    Args:
+        rows (list): The inserted rows as dicts of column values.
+    """
+    request_type, amount = SUMMARY_SOURCES[model]
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for row in rows:
+        key = _key(request_type, row['branch'], row.get('department'), row['status'], row.get('created_at'))
+        if key is None:
+            continue
+        entry = deltas[key]
+        entry[0] += 1
+        entry[1] += row[amount.key] or 0
+    apply_deltas(connection, deltas)
+
+
+def _previous(state, key):
+    """The value an attribute had before this flush."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[key].value
+
+
+@event.listens_for(db.session, 'after_flush')
+def _summarize_flush(session, flush_context):
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+
+    def add(request_type, values, sign):
+        branch, department, status, created_at, amount = values
+        key = _key(request_type, branch, department, status, created_at)
+        if key is None:
+            return
+        entry = deltas[key]
+        entry[0] += sign
+        entry[1] += sign * (amount or 0)
+
+    for obj in session.new:
+        source = SUMMARY_SOURCES.get(type(obj))
+        if source:
+            request_type, amount = source
+            add(request_type, (obj.branch, obj.department, obj.status, obj.created_at, getattr(obj, amount.key)), 1)
+
+    for obj in session.dirty:
+        source = SUMMARY_SOURCES.get(type(obj))
+        if source is None:
+            continue
+        request_type, amount = source
+        keys = ('branch', 'department', 'status', 'created_at', amount.key)
+        state = inspect(obj)
+        before = tuple(_previous(state, key) for key in keys)
+        after = tuple(state.attrs[key].value for key in keys)
+        if before != after:
+            add(request_type, before, -1)
+            add(request_type, after, 1)
+
+    for obj in session.deleted:
+        source = SUMMARY_SOURCES.get(type(obj))
+        if source:
+            request_type, amount = source
+            keys = ('branch', 'department', 'status', 'created_at', amount.key)
+            state = inspect(obj)
+            add(request_type, tuple(_previous(state, key) for key in keys), -1)
+
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def _month_expression(column, dialect):
+    if dialect == 'postgresql':
+        return cast(func.date_trunc('month', column), Date)
+    return func.date(column, 'start of month')
+
+
+def rebuild_summary():
+    """Recompute request_summary from the request tables in one transaction.
+
+    Only needed to repair the rollup, e.g. after rows were changed outside
+    the application.
+    """
+    with db.engine.begin() as connection:
+        table = RequestSummary.__table__
+        connection.execute(delete(table))
+        for model, (request_type, amount) in SUMMARY_SOURCES.items():
+            month = _month_expression(model.created_at, connection.dialect.name)
+            department = func.coalesce(model.department, '')
+            connection.execute(insert(table).from_select(
+                list(GROUP_COLUMNS) + ['request_count', 'total_amount'],
+                select(
+                    literal(request_type), model.branch, department, model.status, month,
+                    func.count(), func.coalesce(func.sum(amount), 0)
+                ).where(model.created_at.isnot(None), model.status.isnot(None))
+                .group_by(model.branch, department, model.status, month)
+            ))
+
+
+def query_summary(group_by, request_type=None, branch=None, department=None, status=None,
+                  since=None, until=None):
+    """Sum the rollup over the given dimensions.
+
+    Args:
+        group_by (list): Names from GROUP_COLUMNS to group by.
+        request_type, branch, department, status (str): Optional filters.
+        since, until (date): Optional month range, inclusive.
+
+    Returns:
+        list: Rows with the group_by columns, request_count and total_amount.
+    """
+    columns = [getattr(RequestSummary, name) for name in group_by]
+    query = select(
+        *columns,
+        func.sum(RequestSummary.request_count).label('request_count'),
+        func.sum(RequestSummary.total_amount).label('total_amount'),
+    )
+    if request_type is not None:
+        query = query.where(RequestSummary.request_type == request_type)
+    if branch is not None:
+        query = query.where(RequestSummary.branch == branch)
+    if department is not None:
+        query = query.where(RequestSummary.department == department)
+    if status is not None:
+        query = query.where(RequestSummary.status == status)
+    if since is not None:
+        query = query.where(RequestSummary.month >= since.replace(day=1))
+    if until is not None:
+        query = query.where(RequestSummary.month <= until.replace(day=1))
+    query = query.group_by(*columns).having(func.sum(RequestSummary.request_count) > 0).order_by(*columns)
+    return db.session.execute(query).all()
+
+
+def parse_month(value):
+    """Parse 'YYYY-MM' or 'YYYY-MM-DD' into the first day of that month.
+
+    Raises:
+        ValueError: If the value is not a date.
+    """
+    if len(value) == 7:
+        value += '-01'
+    return date.fromisoformat(value).replace(day=1)
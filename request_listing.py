@@ -0,0 +1,153 @@
+import base64
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+import msgspec
+from sqlalchemy import select
+from extensions import db
+from models import CashAdvance
+from utils import keyset_after, keyset_order
+
+# Server-side listing behind the React request table. Only the requested
+# columns are selected, and pages are located by keyset on (sort key, id)
+# like the review queue, so deep pages cost the same as the first. Every
+# sort key is NOT NULL, so descending sorts are plain DESC and can be
+# served by a backward scan of the ascending indexes.
+
+# Columns the table may ask for with fields=
+REQUEST_FIELDS = {
+    'id': CashAdvance.id,
+    'amount': CashAdvance.amount,
+    'purpose': CashAdvance.purpose,
+    'status': CashAdvance.status,
+    'request_date': CashAdvance.created_at,
+    'branch': CashAdvance.branch,
+    'department': CashAdvance.department,
+    'officer_id': CashAdvance.officer_id,
+}
+# The columns RequestTable.js shows
+DEFAULT_FIELDS = ('id', 'amount', 'purpose', 'status', 'request_date')
+
+# Sort keys: (column, parser of the cursor's value)
+SORT_KEYS = {
+    'request_date': (CashAdvance.created_at, datetime.fromisoformat),
+    'amount': (CashAdvance.amount, Decimal),
+    'id': (CashAdvance.id, int),
+}
+DEFAULT_SORT = '-request_date'
+
+
+def parse_fields(value):
+    """Parse a comma-separated fields= list, defaulting to DEFAULT_FIELDS.
+
+    Raises:
+        ValueError: If a field is unknown.
+    """
+    fields = [name for name in (value or '').split(',') if name] or list(DEFAULT_FIELDS)
+    unknown = [name for name in fields if name not in REQUEST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def parse_sort(value):
+    """Parse sort= ('amount', or '-amount' for descending) into (key, descending).
+
+    Raises:
+        ValueError: If the key is not in SORT_KEYS.
+    """
+    value = value or DEFAULT_SORT
+    key = value.lstrip('-')
+    if key not in SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)} (prefix - for descending)")
+    return key, value.startswith('-')
+
+
+def _sort_name(sort):
+    key, descending = sort
+    return f"-{key}" if descending else key
+
+
+def _encode_cursor(sort, row):
+    value = row._sort_value
+    raw = msgspec.json.encode([_sort_name(sort), str(value), row._row_id])
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(sort, cursor):
+    try:
+        cursor_sort, value, row_id = msgspec.json.decode(base64.urlsafe_b64decode(cursor.encode()))
+        if cursor_sort != _sort_name(sort):
+            raise ValueError("Cursor belongs to another sort order")
+        return SORT_KEYS[sort[0]][1](value), int(row_id)
+    except (ValueError, TypeError, ArithmeticError, msgspec.DecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def requests_statement(fields, sort, officer_id=None, department=None, branch=None, status=None,
+                       min_amount=None, max_amount=None, since=None, until=None, cursor=None, limit=50):
+    """Build the SELECT for one fetch_requests() page plus one look-ahead row.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort.
+    """
+    sort_column, _ = SORT_KEYS[sort[0]]
+    descending = sort[1]
+    query = select(
+        *(REQUEST_FIELDS[name].label(name) for name in fields),
+        sort_column.label('_sort_value'), CashAdvance.id.label('_row_id')
+    )
+
+    if officer_id is not None:
+        query = query.where(CashAdvance.officer_id == officer_id)
+    if department is not None:
+        query = query.where(CashAdvance.department == department)
+    if branch is not None:
+        query = query.where(CashAdvance.branch == branch)
+    if status is not None:
+        query = query.where(CashAdvance.status == status)
+    if min_amount is not None:
+        query = query.where(CashAdvance.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(CashAdvance.amount <= max_amount)
+    if since is not None:
+        query = query.where(CashAdvance.created_at >= datetime.combine(since, dt_time.min))
+    if until is not None:
+        query = query.where(CashAdvance.created_at < datetime.combine(until + timedelta(days=1), dt_time.min))
+
+    if cursor:
+        after_value, after_id = _decode_cursor(sort, cursor)
+        query = query.where(keyset_after(sort_column, CashAdvance.id, after_value, after_id, descending))
+    query = query.order_by(*keyset_order(sort_column, CashAdvance.id, descending))
+
+    return query.limit(limit + 1)
+
+
+def fetch_requests(fields, sort, officer_id=None, department=None, branch=None, status=None,
+                   min_amount=None, max_amount=None, since=None, until=None, cursor=None, limit=50):
+    """Fetch one page of cash advance requests with only the given columns.
+
+    Args:
+        fields (list): Names from REQUEST_FIELDS to select.
+        sort (tuple): (key, descending) from parse_sort().
+        officer_id, department, branch, status: Optional equality filters.
+        min_amount, max_amount (Decimal): Optional amount range, inclusive.
+        since, until (date): Optional creation date range, inclusive.
+        cursor (str): The next_cursor of the previous page, or None for the first page.
+        limit (int): The page size.
+
+    Returns:
+        tuple: (items as dicts of the fields, next_cursor or None on the last page).
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort.
+    """
+    query = requests_statement(
+        fields, sort, officer_id=officer_id, department=department, branch=branch, status=status,
+        min_amount=min_amount, max_amount=max_amount, since=since, until=until, cursor=cursor, limit=limit
+    )
+    rows = db.session.execute(query).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(sort, rows[-1])
+    return [{name: getattr(row, name) for name in fields} for row in rows], next_cursor
@@ -1,43 +1,53 @@
-from flask import Blueprint, jsonify, request, make_response, session
+from flask import Blueprint, Response, current_app, jsonify, request, make_response, session, send_file, stream_with_context
 from flask_login import login_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_mail import Mail, Message
 from extensions import db, csrf, limiter, mail
 from models import (
     User, CashAdvance, OpexCapexRetirement, PettyCashAdvance, 
-    PettyCashRetirement, StationaryRequest, Notification, Role
+    PettyCashRetirement, StationaryRequest, Notification, Role, Department,
+    DocumentUploads
 )
 from functools import wraps
 import datetime
+import hashlib
+from decimal import Decimal
 from werkzeug.utils import secure_filename
-from utils import send_email, get_role_id_by_name
-from utils import convert_pdf_to_image, allowed_file, resize_image, populate_branches_and_departments  # Import utility functions
-# Import forms
-from forms import (
-    UserRegistrationForm,
-    UserLoginForm,
-    CashAdvanceForm,
-    OpexCapexRetirementForm,
-    PettyCashAdvanceForm,
-    PettyCashRetirementForm,
-    StationaryRequestForm
+from directory import get_supervisor
+from mail_queue import queue_email
+from inbox import fetch_inbox, INBOX_SOURCES
+from storage import store_upload
+from rendering import thumbnail_path, queue_render, render_status
+from audit import log_event, query_audit_log
+from rate_limiting import rate_limit
+from exports import EXPORT_WRITERS, REQUEST_TYPES as EXPORT_REQUEST_TYPES, iter_export_rows
+from reporting import GROUP_COLUMNS, query_summary, parse_month
+from request_listing import fetch_requests, parse_fields, parse_sort
+from table_versions import table_version
+from schemas import (
+    PettyCashAdvanceIn, PettyCashRetirementIn, CashAdvanceIn, OpexCapexRetirementIn, StationeryRequestIn,
+    SchemaValidationError, parse_json, parse_form
 )
+from database import read_replica
+from workflow import (
+    transition, bulk_transition, QUEUE_STATUS, WORKFLOW_ROLES, LEGACY_ACTIONS,
+    InvalidTransitionError, RequestNotFoundError, ConcurrentUpdateError
+)
+from notifications import unread_count, fetch_feed, mark_read, wait_for_notifications, POLL_TIMEOUT_SECONDS, POLL_RETRY_SECONDS
+from serializers import (
+    USER_LOAD_OPTIONS, InboxItemOut, request_load_options, serialize_user, serialize_request,
+    serialize_notification, serialize_audit_entry, serialize_rows, json_response
+)
+from utils import convert_pdf_to_image, allowed_file, resize_image, populate_branches_and_departments, keyset_paginate  # Import utility functions
 # Import additional modules
 from PIL import Image
 import os
 import logging
 
-def send_email(subject, recipients, body):
-    """Send an email notification."""
-    try:
-        msg = Message(subject, recipients=recipients, body=body)
-        mail.send(msg)
-    except Exception as e:
-        print(f"Error sending email: {e}")
-
 # Blueprints
 main_blueprint = Blueprint('main', __name__)
 auth_blueprint = Blueprint('auth', __name__)
+api_blueprint = Blueprint('api', __name__)
 
 # Home Route
 @main_blueprint.route('/')
@@ -62,6 +72,7 @@ def login_required(f):
 # Authentication service: Login route
 @auth_blueprint.route('/login', methods=['POST'])
 @csrf.exempt
+@rate_limit('login')
 def login_user_api():
     # Check if the request is JSON
     if not request.is_json:
@@ -88,6 +99,7 @@ def login_user_api():
     session['username'] = user.username
     session.permanent = True  # Enable session expiration
     login_user(user)
+    log_event('Login', 'User', user.id, user.id)
 
     # Optional: Set session expiration
     session_lifetime = datetime.timedelta(minutes=30)
@@ -109,48 +121,37 @@ def logout():
 # petty cash advance routes
 @main_blueprint.route('/petty_cash_advance', methods=['POST'])
 @csrf.exempt
+@rate_limit('submission')
 def petty_cash_advance():
     try:
         if not request.is_json:
             return jsonify({"error": "Content-Type must be 'application/json'"}), 415
 
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "Invalid JSON"}), 400
-
-        branch = data.get('branch')
-        department = data.get('department')
-        name = data.get('name')
-        account = data.get('account')
-        items = data.get('items')
-        description = data.get('description')
-        total_amount = data.get('total_amount')
-
-        if not all([branch, department, name, account, items, description, total_amount]):
-            return jsonify({"error": "All fields are required"}), 400
+        try:
+            data = parse_json(PettyCashAdvanceIn, request.get_data())
+        except SchemaValidationError as e:
+            return jsonify({"error": "Invalid request data", "errors": e.errors}), 400
 
         petty_cash = PettyCashAdvance(
             officer_id=1,  # Replace this with current_user.id if using Flask-Login
-            branch=branch,
-            department=department,
-            name=name,
-            account=account,
-            items=items,
-            description=description,
-            total_amount=total_amount,
+            branch=data.branch,
+            department=data.department,
+            items=data.items,
+            description=data.description,
+            total_amount=data.total_amount,
             status="Pending"
         )
         db.session.add(petty_cash)
-        db.session.commit()
 
         # Notify supervisor
-        supervisor = User.query.filter_by(role_id=get_role_id_by_name('Supervisor')).first()
+        supervisor = get_supervisor()
         if supervisor:
-            send_email(
+            queue_email(
                 "New Petty Cash Advance Request",
-                [supervisor.email],
-                f"A new petty cash advance request has been raised by {name}."
+                [supervisor['email']],
+                f"A new petty cash advance request has been raised by {data.name}."
             )
+        db.session.commit()
 
         return jsonify({"message": "Petty cash advance request submitted successfully!", "id": petty_cash.id}), 201
 
@@ -164,50 +165,41 @@ def petty_cash_advance():
 @main_blueprint.route('/petty_cash_retirement', methods=['POST'])
 @login_required
 @csrf.exempt
+@rate_limit('submission')
 def petty_cash_retirement():
     try:
         if not request.form:
             return jsonify({"error": "Invalid form data"}), 400
 
-        data = request.form
-        branch = data.get('branch')
-        name = data.get('name')
-        items = data.get('items')
-        amount = data.get('amount')
-        department = data.get('department')
-        account = data.get('account')
-        description = data.get('description')
-        total_amount = data.get('total_amount')
+        try:
+            data = parse_form(PettyCashRetirementIn, request.form)
+        except SchemaValidationError as e:
+            return jsonify({"error": "Invalid request data", "errors": e.errors}), 400
         receipt = request.files.get('receipt')
+        if not receipt:
+            return jsonify({"error": "Receipt is required"}), 400
 
-        if not all([branch, name, items, amount, department, account, description, total_amount, receipt]):
-            return jsonify({"error": "All fields and receipt are required"}), 400
-
-        receipt_path = f"uploads/receipts/{receipt.filename}"
-        receipt.save(receipt_path)
+        store_upload(receipt, current_user.id)
 
         petty_cash_ret = PettyCashRetirement(
-            officer_id=current_user.id,
-            branch=branch,
-            name=name,
-            items=items,
-            amount=amount,
-            department=department,
-            account=account,
-            description=description,
-            total_amount=total_amount,
+            created_by=current_user.id,
+            branch=data.branch,
+            department=data.department,
+            items=data.items,
+            description=data.description,
+            total_amount=data.total_amount,
             status="Pending"
         )
         db.session.add(petty_cash_ret)
-        db.session.commit()
 
-        supervisor = User.query.filter_by(role_id=get_role_id_by_name('Supervisor'), department_id=current_user.department_id).first()
+        supervisor = get_supervisor(current_user.department_id)
         if supervisor:
-            send_email(
+            queue_email(
                 "New Petty Cash Retirement Request",
-                [supervisor.email],
+                [supervisor['email']],
                 f"A new petty cash retirement request has been raised by {current_user.username}."
             )
+        db.session.commit()
 
         return jsonify({"message": "Petty cash retirement request submitted successfully!", "id": petty_cash_ret.id}), 201
 
@@ -220,56 +212,45 @@ def petty_cash_retirement():
 # Cash Advance Request
 @main_blueprint.route('/cash_advance', methods=['POST'])
 @csrf.exempt
+@rate_limit('submission')
 def cash_advance_request():
     try:
         # Check if the form data and files exist
         if not request.form or not request.files:
             return jsonify({"error": "Form data or files missing"}), 400
 
-        data = request.form
-        branch = data.get('branch')
-        department = data.get('department')
-        name = data.get('name')
-        account = data.get('account')
-        invoice_amount = data.get('invoice_amount')
-        cash_advance = data.get('cash_advance')
-        narration = data.get('narration')   
-        less_what = data.get('less_what')
-        amount = data.get('amount')
+        try:
+            data = parse_form(CashAdvanceIn, request.form)
+        except SchemaValidationError as e:
+            return jsonify({"error": "Invalid request data", "errors": e.errors}), 400
         management_board_approval = request.files.get('management_board_approval')
         proforma_invoice = request.files.get('proforma_invoice')
+        if not all([management_board_approval, proforma_invoice]):
+            return jsonify({"error": "Management board approval and proforma invoice are required"}), 400
 
-        if not all([branch, department, name, account, invoice_amount, cash_advance, narration, less_what, amount, management_board_approval, proforma_invoice]):
-            return jsonify({"error": "All fields and required documents are mandatory"}), 400
-
-        approval_path = f"uploads/docs/{management_board_approval.filename}"
-        invoice_path = f"uploads/docs/{proforma_invoice.filename}"
-        management_board_approval.save(approval_path)
-        proforma_invoice.save(invoice_path)
+        approval_document = store_upload(management_board_approval, current_user.id)
+        invoice_document = store_upload(proforma_invoice, current_user.id)
 
         cash_advance = CashAdvance(
             officer_id=current_user.id,
-            branch=branch,
-            department=department,
-            name=name,
-            account=account,
-            invoice_amount=invoice_amount,
-            cash_advance=cash_advance,
-            narration=narration,
-            less_what=less_what,
-            amount=amount,
+            branch=data.branch,
+            department=data.department,
+            amount=data.amount,
+            purpose=data.narration,
+            management_board_approval_path=approval_document.file_path,
+            proforma_invoice_path=invoice_document.file_path,
             status="Pending"
         )
         db.session.add(cash_advance)
-        db.session.commit()
 
-        supervisor = User.query.filter_by(role_id=get_role_id_by_name('Supervisor'), department_id=current_user.department_id).first()
+        supervisor = get_supervisor(current_user.department_id)
         if supervisor:
-            send_email(
+            queue_email(
                 "New Cash Advance Request",
-                [supervisor.email],
+                [supervisor['email']],
                 f"A new cash advance request has been raised by {current_user.username}."
             )
+        db.session.commit()
 
         return jsonify({"message": "Cash advance request submitted successfully!", "id": cash_advance.id}), 201
 
@@ -283,59 +264,48 @@ def cash_advance_request():
 @main_blueprint.route('/opex_capex_retirement', methods=['POST'])
 @csrf.exempt
 @login_required
+@rate_limit('submission')
 def opex_capex_retirement():
     try:
         # Check if the form data and files exist
         if not request.form or not request.files:
             return jsonify({"error": "Form data or files missing"}), 400
 
-        data = request.form
-        branch = data.get('branch')
-        department = data.get('department')
-        name = data.get('name')
-        account = data.get('account')
-        invoice_amount = data.get('invoice_amount')
-        cash_advance = data.get('cash_advance')
-        narration = data.get('narration')
-        refund_reimbursement = data.get('refund_reimbursement')
-        less_what = data.get('less_what')
-        amount = data.get('amount')
-        receipt = request.files.get('receipt')
-
         # Validate all required fields and files
-        if not all([branch, department, name, account, invoice_amount, cash_advance, narration, refund_reimbursement, less_what, amount, receipt]):
-            return jsonify({"error": "All fields and receipt are required"}), 400
+        try:
+            data = parse_form(OpexCapexRetirementIn, request.form)
+        except SchemaValidationError as e:
+            return jsonify({"error": "Invalid request data", "errors": e.errors}), 400
+        receipt = request.files.get('receipt')
+        if not receipt:
+            return jsonify({"error": "Receipt is required"}), 400
 
         # Save receipt file
-        receipt_path = f"uploads/receipts/{receipt.filename}"
-        receipt.save(receipt_path)
+        store_upload(receipt, current_user.id)
 
         # Create and save the retirement request
         opex_retirement = OpexCapexRetirement(
-            officer_id=current_user.id,
-            branch=branch,
-            department=department,
-            name=name,
-            account=account,
-            invoice_amount=invoice_amount,
-            cash_advance=cash_advance,
-            narration=narration,
-            refund_reimbursement=refund_reimbursement,
-            less_what=less_what,
-            amount=amount,
+            created_by=current_user.id,
+            branch=data.branch,
+            department=data.department,
+            payee_name=data.name,
+            payee_account_number=data.account,
+            invoice_amount=data.invoice_amount,
+            description=data.narration,
+            total_amount=data.amount,
             status="Pending"
         )
         db.session.add(opex_retirement)
-        db.session.commit()
 
         # Notify supervisor
-        supervisor = User.query.filter_by(role_id=get_role_id_by_name('Supervisor'), department_id=current_user.department_id).first()
+        supervisor = get_supervisor(current_user.department_id)
         if supervisor:
-            send_email(
+            queue_email(
                 "New OPEX/CAPEX Retirement Request",
-                [supervisor.email],
+                [supervisor['email']],
                 f"A new OPEX/CAPEX retirement request has been raised by {current_user.username}."
             )
+        db.session.commit()
 
         return jsonify({"message": "OPEX/CAPEX retirement request submitted successfully!", "id": opex_retirement.id}), 201
 
@@ -349,44 +319,41 @@ def opex_capex_retirement():
 @main_blueprint.route('/stationery_request', methods=['POST'])
 @csrf.exempt
 @login_required
+@rate_limit('submission')
 def stationery_request():
     try:
         # Validate if JSON data is provided
         if not request.is_json:
             return jsonify({"error": "Invalid request format. JSON data is required"}), 400
 
-        data = request.get_json()
-        branch = data.get('branch')
-        department = data.get('department')
-        description = data.get('description')
-        quantity = data.get('quantity')
-        items = data.get('items')
-
         # Validate all required fields
-        if not all([branch, department, description, quantity, items]):
-            return jsonify({"error": "All fields are required"}), 400
+        try:
+            data = parse_json(StationeryRequestIn, request.get_data())
+        except SchemaValidationError as e:
+            return jsonify({"error": "Invalid request data", "errors": e.errors}), 400
 
         # Create and save the stationery request
         stationery = StationaryRequest(
-            officer_id=current_user.id,
-            branch=branch,
-            department=department,
-            description=description,
-            quantity=quantity,
-            items=items,
+            created_by=current_user.id,
+            branch=data.branch,
+            department=data.department,
+            description=data.description,
+            quantity=data.quantity,
+            items=data.items,
+            total_amount=data.total_amount,
             status="Pending"
         )
         db.session.add(stationery)
-        db.session.commit()
 
         # Notify the supervisor
-        supervisor = User.query.filter_by(role_id=get_role_id_by_name('Supervisor'), department_id=current_user.department_id).first()
+        supervisor = get_supervisor(current_user.department_id)
         if supervisor:
-            send_email(
+            queue_email(
                 "New Stationery Request",
-                [supervisor.email],
+                [supervisor['email']],
                 f"A new stationery request has been raised by {current_user.username}."
             )
+        db.session.commit()
 
         return jsonify({"message": "Stationery request submitted successfully!", "id": stationery.id}), 201
 
@@ -396,16 +363,100 @@ def stationery_request():
         traceback.print_exc()
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
+# Document Thumbnail API
+# Roles that may view any uploaded document; Supervisors and Reviewers see
+# their department's and everyone else only their own
+DOCUMENT_ROLES = ('Admin', 'Super Admin', 'Approver')
+
+
+def _can_view_document(document):
+    """Whether the current user may see an uploaded document."""
+    if document.uploaded_by == current_user.id:
+        return True
+    role_name = current_user.role.name if current_user.role else None
+    if role_name in DOCUMENT_ROLES:
+        return True
+    if role_name in ('Supervisor', 'Reviewer') and current_user.department_id is not None:
+        uploader_department = db.session.query(User.department_id).filter(User.id == document.uploaded_by).scalar()
+        return uploader_department == current_user.department_id
+    return False
+
+
+@main_blueprint.route('/documents/<int:document_id>/thumbnail', methods=['GET'])
+@login_required
+def document_thumbnail(document_id):
+    """Return a page thumbnail, or 202 while the background worker renders it.
+
+    Pages past the last rendered one, and documents that cannot be rendered,
+    get a 404.
+    """
+    try:
+        document = DocumentUploads.query.get(document_id)
+        if not document or not document.sha256:
+            return jsonify({"error": "Document not found"}), 404
+        if not _can_view_document(document):
+            return jsonify({"error": "Unauthorized access"}), 403
+
+        try:
+            page = int(request.args.get('page', 1))
+        except ValueError:
+            return jsonify({"error": "Invalid page"}), 400
+
+        status = render_status(document.sha256)
+        if status is None:
+            queue_render(document.sha256)
+            return jsonify({"status": "rendering"}), 202
+        if status['error']:
+            return jsonify({"error": "Document cannot be rendered"}), 404
+
+        path = thumbnail_path(document.sha256, page) if 1 <= page <= status['pages'] else None
+        if not path:
+            return jsonify({"error": "Page not found"}), 404
+        return send_file(os.path.abspath(path), mimetype='image/jpeg', max_age=86400)
+
+    except Exception as e:
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
 # Notifications API
+NOTIFICATION_PAGE_SIZE = int(os.getenv('NOTIFICATION_PAGE_SIZE', '50'))
+NOTIFICATION_MAX_PAGE_SIZE = int(os.getenv('NOTIFICATION_MAX_PAGE_SIZE', '200'))
+
+
+def _notification_page(user_id, notifications, since_id):
+    """Feed response: the items, the newest ID seen (next since_id) and the unread count."""
+    ids = [notification.id for notification in notifications]
+    return {
+        "items": [serialize_notification(notification) for notification in notifications],
+        "latest_id": max(ids, default=since_id),
+        "oldest_id": min(ids, default=None),
+        "unread_count": unread_count(user_id)
+    }
+
+
 @main_blueprint.route('/notifications', methods=['GET'])
 @login_required
+@read_replica
 def get_notifications():
+    """Get the current user's notifications incrementally.
+
+    Query parameters: since_id (newer than, oldest first), before_id
+    (older than, newest first), limit. Without either ID the newest page
+    is returned.
+    """
     try:
-        # Fetch notifications for the current user
-        notifications = Notification.query.filter_by(user_id=current_user.id).all()
+        try:
+            since_id = request.args.get('since_id', type=int)
+            before_id = request.args.get('before_id', type=int)
+            limit = min(max(int(request.args.get('limit', NOTIFICATION_PAGE_SIZE)), 1), NOTIFICATION_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({"error": "Invalid since_id, before_id or limit"}), 400
 
-        # Return notifications as JSON
-        return jsonify([notification.to_dict() for notification in notifications]), 200
+        user_id = current_user.id
+        notifications = fetch_feed(user_id, since_id=since_id, before_id=before_id, limit=limit)
+        return json_response(_notification_page(user_id, notifications, since_id))
 
     except Exception as e:
         # Log the error for debugging
@@ -414,6 +465,81 @@ def get_notifications():
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
 
+@main_blueprint.route('/notifications/poll', methods=['GET'])
+@login_required
+def poll_notifications():
+    """Long-poll for notifications newer than since_id.
+
+    Returns as soon as one arrives, or with an empty page after `timeout`
+    seconds (at most NOTIFICATION_POLL_TIMEOUT_SECONDS). When too many polls
+    are waiting already, returns at once with a Retry-After header.
+    """
+    try:
+        try:
+            since_id = int(request.args['since_id'])
+            timeout = min(max(float(request.args.get('timeout', POLL_TIMEOUT_SECONDS)), 0), POLL_TIMEOUT_SECONDS)
+        except (KeyError, ValueError):
+            return jsonify({"error": "since_id is required and timeout must be a number"}), 400
+
+        user_id = current_user.id
+        notifications = wait_for_notifications(user_id, since_id, timeout)
+        if notifications is None:
+            response = json_response(_notification_page(user_id, fetch_feed(user_id, since_id=since_id), since_id))
+            response.headers['Retry-After'] = str(POLL_RETRY_SECONDS)
+            return response
+        return json_response(_notification_page(user_id, notifications, since_id))
+
+    except Exception as e:
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+@main_blueprint.route('/notifications/unread_count', methods=['GET'])
+@login_required
+def get_unread_count():
+    try:
+        return jsonify({"unread_count": unread_count(current_user.id)}), 200
+
+    except Exception as e:
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+@main_blueprint.route('/notifications/mark_read', methods=['POST'])
+@login_required
+@csrf.exempt
+def mark_notifications_read():
+    """Mark notifications as read in bulk.
+
+    JSON body: {"ids": [...]} or {"up_to_id": N}; an empty body marks all.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        up_to_id = data.get('up_to_id')
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return jsonify({"error": "ids must be a list of notification IDs"}), 400
+        if up_to_id is not None and not isinstance(up_to_id, int):
+            return jsonify({"error": "up_to_id must be an integer"}), 400
+
+        user_id = current_user.id
+        changed = mark_read(user_id, ids=ids, up_to_id=up_to_id)
+        db.session.commit()
+
+        return jsonify({"marked_read": changed, "unread_count": unread_count(user_id)}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
 # Error Handlers
 @main_blueprint.errorhandler(404)
 def page_not_found(e):
@@ -426,22 +552,10 @@ def internal_error(e):
     return jsonify({"error": "Internal server error"}), 500
 
 
-# Helper Functions
-def get_role_id_by_name(role_name):
-    """Helper function to fetch a role ID by its name."""
-    try:
-        role = Role.query.filter_by(name=role_name).first()
-        return role.id if role else None
-    except Exception as e:
-        # Log the error for debugging
-        import traceback
-        traceback.print_exc()
-        return None
-
-
 # Users API
 @auth_blueprint.route('/users', methods=['GET'])
 @login_required
+@read_replica
 def get_all_users():
     """Get all registered users. Accessible by Admin/Super Admin."""
     try:
@@ -449,9 +563,9 @@ def get_all_users():
         if current_user.role.name not in ['Admin', 'Super Admin']:
             return jsonify({"error": "Unauthorized access"}), 403
 
-        # Fetch all users and return as JSON
-        users = User.query.all()
-        return jsonify([user.to_dict() for user in users]), 200
+        # Fetch all users with their role and department in one query
+        users = User.query.options(*USER_LOAD_OPTIONS).all()
+        return json_response([serialize_user(user) for user in users])
 
     except Exception as e:
         # Log the error for debugging
@@ -462,6 +576,7 @@ def get_all_users():
 
 @auth_blueprint.route('/users/<int:user_id>', methods=['GET'])
 @login_required
+@read_replica
 def get_user_details(user_id):
     """Get details of a specific user."""
     try:
@@ -470,12 +585,12 @@ def get_user_details(user_id):
             return jsonify({"error": "Unauthorized access"}), 403
 
         # Fetch the user by ID
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id, options=USER_LOAD_OPTIONS)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
         # Return user details as JSON
-        return jsonify(user.to_dict()), 200
+        return json_response(serialize_user(user))
 
     except Exception as e:
         # Log the error for debugging
@@ -485,30 +600,85 @@ def get_user_details(user_id):
 
 
 # Review Request API
+REVIEW_PAGE_SIZE = int(os.getenv('REVIEW_PAGE_SIZE', '50'))
+REVIEW_MAX_PAGE_SIZE = int(os.getenv('REVIEW_MAX_PAGE_SIZE', '200'))
+
+# Request type names (as used by the inbox) mapped to (model, amount column)
+REQUEST_TYPES = {request_type: (model, amount) for request_type, model, amount, _, _ in INBOX_SOURCES}
+REQUEST_TYPE_ERROR = f"type must be one of: {', '.join(REQUEST_TYPES)}"
+
+# Request type each role reviewed before ?type= / "type" existed; used when
+# the client sends none. The inbox lists every type together.
+DEFAULT_REVIEW_TYPES = {
+    'Supervisor': 'cash_advance',
+    'Reviewer': 'opex_capex_retirement',
+    'Approver': 'petty_cash_advance',
+}
+
+
+def _request_type(role_name, request_type):
+    """Resolve the ?type= / "type" of a request, defaulting to the role's own queue."""
+    return REQUEST_TYPES.get(request_type or DEFAULT_REVIEW_TYPES.get(role_name))
+
+
 @main_blueprint.route('/review_requests', methods=['GET'])
 @login_required
+@read_replica
 def review_requests():
-    """Get all requests for review based on user role."""
+    """Get one page of pending requests for review based on user role.
+
+    Query parameters: type (defaults to the role's queue; /main/inbox lists
+    every type), cursor, limit, branch, department, min_amount, max_amount.
+    """
     try:
         # Check if the current user has the required role
-        if current_user.role.name not in ['Supervisor', 'Reviewer', 'Approver']:
+        role_name = current_user.role.name
+        if role_name not in QUEUE_STATUS:
             return jsonify({"error": "Unauthorized access"}), 403
 
-        # Fetch requests based on the user's role
-        requests = []
-        if current_user.role.name == 'Supervisor':
-            requests = CashAdvance.query.filter_by(
-                status="Pending", department_id=current_user.department_id
-            ).all()
-        elif current_user.role.name == 'Reviewer':
-            requests = OpexCapexRetirement.query.filter_by(
-                status="Pending", department_id=current_user.department_id
-            ).all()
-        elif current_user.role.name == 'Approver':
-            requests = PettyCashAdvance.query.filter_by(status="Pending").all()
-
-        # Return the requests as JSON
-        return jsonify([req.to_dict() for req in requests]), 200
+        try:
+            limit = min(max(int(request.args.get('limit', REVIEW_PAGE_SIZE)), 1), REVIEW_MAX_PAGE_SIZE)
+            min_amount = request.args.get('min_amount', type=Decimal)
+            max_amount = request.args.get('max_amount', type=Decimal)
+        except (ValueError, ArithmeticError):
+            return jsonify({"error": "Invalid limit or amount filter"}), 400
+
+        queue = _request_type(role_name, request.args.get('type'))
+        if queue is None:
+            return jsonify({"error": REQUEST_TYPE_ERROR}), 400
+        model, amount_column = queue
+        query = model.query.options(*request_load_options(model)).filter(model.status == QUEUE_STATUS[role_name])
+
+        # Supervisors and Reviewers only see their own department
+        if role_name in ('Supervisor', 'Reviewer'):
+            department_name = (
+                db.session.query(Department.name)
+                .filter(Department.id == current_user.department_id)
+                .scalar_subquery()
+            )
+            query = query.filter(model.department == department_name)
+        elif request.args.get('department'):
+            query = query.filter(model.department == request.args['department'])
+
+        if request.args.get('branch'):
+            query = query.filter(model.branch == request.args['branch'])
+        if min_amount is not None:
+            query = query.filter(amount_column >= min_amount)
+        if max_amount is not None:
+            query = query.filter(amount_column <= max_amount)
+
+        try:
+            requests, next_cursor = keyset_paginate(
+                query, model.created_at, model.id, request.args.get('cursor'), limit
+            )
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        # Return the page as JSON
+        return json_response({
+            "items": [serialize_request(req) for req in requests],
+            "next_cursor": next_cursor
+        })
 
     except Exception as e:
         # Log the error for debugging
@@ -517,50 +687,220 @@ def review_requests():
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
 
+# Unified Approval Inbox API
+@main_blueprint.route('/inbox', methods=['GET'])
+@login_required
+def approval_inbox():
+    """Get one page of pending requests of every type, oldest first.
+
+    Query parameters: cursor, limit, department (Approver only).
+    """
+    try:
+        # Check if the current user has the required role
+        role_name = current_user.role.name
+        if role_name not in QUEUE_STATUS:
+            return jsonify({"error": "Unauthorized access"}), 403
+
+        try:
+            limit = min(max(int(request.args.get('limit', REVIEW_PAGE_SIZE)), 1), REVIEW_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({"error": "Invalid limit"}), 400
+
+        # Supervisors and Reviewers only see their own department
+        if role_name in ('Supervisor', 'Reviewer'):
+            department = db.session.query(Department.name).filter(
+                Department.id == current_user.department_id
+            ).scalar()
+            if department is None:
+                return jsonify({"items": [], "next_cursor": None}), 200
+        else:
+            department = request.args.get('department')
+
+        try:
+            rows, next_cursor = fetch_inbox(
+                status=QUEUE_STATUS[role_name], department=department, cursor=request.args.get('cursor'), limit=limit
+            )
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        return json_response({
+            "items": serialize_rows(InboxItemOut, rows),
+            "next_cursor": next_cursor
+        })
+
+    except Exception as e:
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+def _workflow_action(data):
+    """Read the workflow action from a JSON body, accepting the legacy "status" field."""
+    if data.get('action') is not None:
+        return data['action']
+    return LEGACY_ACTIONS.get(data.get('status'))
+
+
+def _acting_department(role_name):
+    """Supervisors and Reviewers only act on their own department."""
+    if role_name not in ('Supervisor', 'Reviewer'):
+        return None
+    return db.session.query(Department.name).filter(Department.id == current_user.department_id).scalar()
+
+
 @main_blueprint.route('/review_requests/<int:request_id>', methods=['PUT'])
 @login_required
+@csrf.exempt
 def update_request_status(request_id):
-    """Update the status of a request."""
+    """Move a request one step through the approval workflow.
+
+    JSON body: {"action": "approve" | "reject" | "request_payment" | "resubmit",
+    "type": request type (defaults to the role's queue), "version": optional}.
+    {"status": "Approved" | "Rejected"} is accepted as approve/reject.
+    """
     try:
         # Check if the current user has the required role
-        if current_user.role.name not in ['Supervisor', 'Reviewer', 'Approver']:
+        role_name = current_user.role.name
+        if role_name not in WORKFLOW_ROLES:
             return jsonify({"error": "Unauthorized access"}), 403
 
         # Parse JSON data from the request
-        data = request.get_json()
-        new_status = data.get('status')
-
-        # Validate the status
-        if not new_status or new_status not in ["Approved", "Rejected"]:
-            return jsonify({"error": "Invalid status. Allowed values are 'Approved' or 'Rejected'."}), 400
-
-        # Determine the type of request based on the user's role
-        request_to_review = None
-        if current_user.role.name == 'Supervisor':
-            request_to_review = CashAdvance.query.get(request_id)
-        elif current_user.role.name == 'Reviewer':
-            request_to_review = OpexCapexRetirement.query.get(request_id)
-        elif current_user.role.name == 'Approver':
-            request_to_review = PettyCashAdvance.query.get(request_id)
-
-        # Check if the request exists
-        if not request_to_review:
+        data = request.get_json(silent=True) or {}
+        action = _workflow_action(data)
+        if not action:
+            return jsonify({"error": "An action is required, e.g. 'approve' or 'reject'."}), 400
+
+        expected_version = data.get('version')
+        if expected_version is not None and not isinstance(expected_version, int):
+            return jsonify({"error": "version must be an integer"}), 400
+
+        queue = _request_type(role_name, data.get('type'))
+        if queue is None:
+            return jsonify({"error": REQUEST_TYPE_ERROR}), 400
+        model, _ = queue
+
+        try:
+            new_status, version = transition(
+                model, request_id, action, current_user,
+                department=_acting_department(role_name), expected_version=expected_version
+            )
+        except InvalidTransitionError as e:
+            return jsonify({"error": str(e)}), 400
+        except RequestNotFoundError:
+            db.session.rollback()
             return jsonify({"error": "Request not found"}), 404
+        except ConcurrentUpdateError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 409
+        db.session.commit()
+
+        return jsonify({
+            "message": f"Request ID {request_id} has been updated to {new_status}.",
+            "status": new_status,
+            "version": version
+        }), 200
 
-        # Update the request status
-        request_to_review.status = new_status
+    except Exception as e:
+        db.session.rollback()
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+BULK_REVIEW_MAX_IDS = int(os.getenv('BULK_REVIEW_MAX_IDS', '500'))
+
+
+@main_blueprint.route('/review_requests/bulk', methods=['PUT'])
+@login_required
+@csrf.exempt
+def bulk_update_request_status():
+    """Apply one workflow action to many requests at once.
+
+    JSON body: {"ids": [...], "action": "approve" | "reject" | ..., "type":
+    request type (defaults to the role's queue)}. {"status": "Approved" |
+    "Rejected"} is accepted as approve/reject. Requests that are missing or
+    not at the role's stage are reported in "skipped".
+    """
+    try:
+        # Check if the current user has the required role
+        role_name = current_user.role.name
+        if role_name not in WORKFLOW_ROLES:
+            return jsonify({"error": "Unauthorized access"}), 403
+
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        action = _workflow_action(data)
+
+        # Validate the payload
+        if not action:
+            return jsonify({"error": "An action is required, e.g. 'approve' or 'reject'."}), 400
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            return jsonify({"error": "ids must be a non-empty list of request IDs"}), 400
+        if len(ids) > BULK_REVIEW_MAX_IDS:
+            return jsonify({"error": f"At most {BULK_REVIEW_MAX_IDS} requests can be updated at once"}), 400
+
+        queue = _request_type(role_name, data.get('type'))
+        if queue is None:
+            return jsonify({"error": REQUEST_TYPE_ERROR}), 400
+        model, _ = queue
+
+        try:
+            new_status, updated, skipped = bulk_transition(
+                model, list(dict.fromkeys(ids)), action, current_user, department=_acting_department(role_name)
+            )
+        except InvalidTransitionError as e:
+            return jsonify({"error": str(e)}), 400
+        except ConcurrentUpdateError as e:
+            db.session.rollback()
+            return jsonify({"error": f"{e}; nothing was changed, please retry"}), 409
         db.session.commit()
 
-        # Notify the requester about the status update
-        requester = User.query.get(request_to_review.officer_id)
-        if requester:
-            send_email(
-                "Request Status Updated",
-                [requester.email],
-                f"Your request (ID: {request_id}) has been {new_status} by {current_user.role.name}."
+        return jsonify({
+            "updated": updated,
+            "skipped": {str(request_id): reason for request_id, reason in skipped.items()},
+            "status": new_status
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+# Audit Log API
+@main_blueprint.route('/audit_logs', methods=['GET'])
+@login_required
+def get_audit_logs():
+    """Get one page of audit events, newest first. Accessible by Admin/Super Admin.
+
+    Query parameters: entity_type, entity_id, performed_by, since, until
+    (ISO 8601; the last 90 days by default), cursor, limit.
+    """
+    try:
+        if current_user.role.name not in ['Admin', 'Super Admin']:
+            return jsonify({"error": "Unauthorized access"}), 403
+
+        try:
+            limit = min(max(int(request.args.get('limit', REVIEW_PAGE_SIZE)), 1), REVIEW_MAX_PAGE_SIZE)
+            since = request.args.get('since', type=datetime.datetime.fromisoformat)
+            until = request.args.get('until', type=datetime.datetime.fromisoformat)
+            entries, next_cursor = query_audit_log(
+                entity_type=request.args.get('entity_type'),
+                entity_id=request.args.get('entity_id', type=int),
+                performed_by=request.args.get('performed_by', type=int),
+                since=since, until=until, cursor=request.args.get('cursor'), limit=limit
             )
+        except ValueError:
+            return jsonify({"error": "Invalid limit, date range or cursor"}), 400
 
-        return jsonify({"message": f"Request ID {request_id} has been updated to {new_status}."}), 200
+        return json_response({
+            "items": [serialize_audit_entry(entry) for entry in entries],
+            "next_cursor": next_cursor
+        })
 
     except Exception as e:
         # Log the error for debugging
@@ -568,3 +908,207 @@ def update_request_status(request_id):
         traceback.print_exc()
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
+
+# Dashboard Aggregates API
+SUMMARY_ROLES = ('Admin', 'Super Admin', 'Supervisor', 'Reviewer', 'Approver')
+
+
+@main_blueprint.route('/reports/summary', methods=['GET'])
+@login_required
+@read_replica
+def request_summary():
+    """Request counts and amount totals from the request_summary rollup.
+
+    Query parameters: group_by (comma-separated: request_type, branch,
+    department, status, month; default status), type, branch, department,
+    status, since and until (YYYY-MM, inclusive).
+    Supervisors and Reviewers only see their own department.
+    """
+    try:
+        role_name = current_user.role.name
+        if role_name not in SUMMARY_ROLES:
+            return jsonify({"error": "Unauthorized access"}), 403
+
+        group_by = [name for name in request.args.get('group_by', 'status').split(',') if name]
+        if not group_by or any(name not in GROUP_COLUMNS for name in group_by):
+            return jsonify({"error": f"group_by must be a list of: {', '.join(GROUP_COLUMNS)}"}), 400
+        try:
+            since, until = (
+                parse_month(request.args[name]) if request.args.get(name) else None
+                for name in ('since', 'until')
+            )
+        except ValueError:
+            return jsonify({"error": "since and until must be YYYY-MM"}), 400
+
+        department = request.args.get('department')
+        if role_name in ('Supervisor', 'Reviewer'):
+            department = db.session.query(Department.name).filter(
+                Department.id == current_user.department_id
+            ).scalar()
+            if department is None:
+                return json_response({"group_by": group_by, "items": []})
+
+        rows = query_summary(
+            group_by,
+            request_type=request.args.get('type'),
+            branch=request.args.get('branch'),
+            department=department,
+            status=request.args.get('status'),
+            since=since,
+            until=until
+        )
+        items = []
+        for row in rows:
+            item = row._asdict()
+            if 'department' in item:
+                item['department'] = item['department'] or None
+            items.append(item)
+        return json_response({"group_by": group_by, "items": items})
+
+    except Exception as e:
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+# Finance Export API
+EXPORT_ROLES = ('Admin', 'Super Admin', 'Approver')
+
+
+@main_blueprint.route('/exports/requests', methods=['GET'])
+@login_required
+def export_requests():
+    """Stream requests of every type as CSV or XLSX.
+
+    Query parameters: format (csv or xlsx; default csv), since and until
+    (YYYY-MM-DD, inclusive), branch, status, type (repeatable).
+    """
+    try:
+        if current_user.role.name not in EXPORT_ROLES:
+            return jsonify({"error": "Unauthorized access"}), 403
+
+        export_format = request.args.get('format', 'csv')
+        if export_format not in EXPORT_WRITERS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_WRITERS)}"}), 400
+        request_types = request.args.getlist('type')
+        if any(request_type not in EXPORT_REQUEST_TYPES for request_type in request_types):
+            return jsonify({"error": "Unknown request type"}), 400
+        try:
+            since, until = (
+                datetime.date.fromisoformat(request.args[name]) if request.args.get(name) else None
+                for name in ('since', 'until')
+            )
+        except ValueError:
+            return jsonify({"error": "since and until must be YYYY-MM-DD"}), 400
+
+        rows = iter_export_rows(
+            since=since, until=until, branch=request.args.get('branch'),
+            status=request.args.get('status'), request_types=request_types
+        )
+        write_chunks, mimetype = EXPORT_WRITERS[export_format]
+        filename = f"requests_{datetime.date.today():%Y%m%d}.{export_format}"
+        return Response(
+            stream_with_context(write_chunks(rows)),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+
+    except Exception as e:
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+
+# Request Table API
+# Roles that see every cash advance; Supervisors and Reviewers see their
+# department's and everyone else their own
+REQUEST_LIST_ROLES = ('Admin', 'Super Admin', 'Approver')
+
+
+@api_blueprint.route('/requests', methods=['GET'])
+@login_required
+def list_requests():
+    """Get one page of cash advance requests for the request table.
+
+    Query parameters: fields (comma-separated; default id, amount, purpose,
+    status, request_date), sort (request_date, amount or id, prefixed with -
+    for descending; default -request_date), cursor, limit, status, branch,
+    department, min_amount, max_amount, since and until (YYYY-MM-DD, inclusive).
+    Responses carry an ETag; a matching If-None-Match gets a 304.
+    """
+    try:
+        role_name = current_user.role.name if current_user.role else None
+
+        # The ETag covers the table's generation, the caller's visibility and
+        # the query string. The generation is read before the page, so a
+        # write committed in between only makes the ETag older, never newer.
+        # (Pages come from the primary: a lagging replica would cache stale
+        # rows under the new generation.)
+        version = table_version(CashAdvance.__tablename__)
+        if version is not None:
+            scope = f"{version}|{current_user.id}|{current_user.role_id}|{current_user.department_id}"
+            etag = hashlib.sha1(f"{scope}|{sorted(request.args.items(multi=True))}".encode()).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            sort = parse_sort(request.args.get('sort'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            limit = min(max(int(request.args.get('limit', REVIEW_PAGE_SIZE)), 1), REVIEW_MAX_PAGE_SIZE)
+            min_amount, max_amount = (
+                Decimal(request.args[name]) if request.args.get(name) else None
+                for name in ('min_amount', 'max_amount')
+            )
+        except (ValueError, ArithmeticError):
+            return jsonify({"error": "Invalid limit or amount filter"}), 400
+        try:
+            since, until = (
+                datetime.date.fromisoformat(request.args[name]) if request.args.get(name) else None
+                for name in ('since', 'until')
+            )
+        except ValueError:
+            return jsonify({"error": "since and until must be YYYY-MM-DD"}), 400
+
+        officer_id = None
+        department = request.args.get('department')
+        if role_name in ('Supervisor', 'Reviewer'):
+            department = db.session.query(Department.name).filter(
+                Department.id == current_user.department_id
+            ).scalar()
+            if department is None:
+                return json_response({"items": [], "next_cursor": None})
+        elif role_name not in REQUEST_LIST_ROLES:
+            officer_id = current_user.id
+
+        try:
+            items, next_cursor = fetch_requests(
+                fields, sort, officer_id=officer_id, department=department,
+                branch=request.args.get('branch'), status=request.args.get('status'),
+                min_amount=min_amount, max_amount=max_amount, since=since, until=until,
+                cursor=request.args.get('cursor'), limit=limit
+            )
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        response = json_response({"items": items, "next_cursor": next_cursor})
+        if version is not None:
+            response.set_etag(etag)
+        else:
+            # Without table versions the page is hashed, which still saves the transfer
+            response.add_etag()
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+
+    except Exception as e:
+        # Log the error for debugging
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
@@ -0,0 +1,216 @@
+from decimal import Decimal
+from typing import Annotated, ClassVar, Optional
+import msgspec
+
+# Submission payloads are decoded and validated in one pass by msgspec:
+# the raw JSON body goes straight to a typed struct (amounts as Decimal)
+# without building an intermediate dict. Form posts are converted from the
+# form's string values with the same schemas. Lengths and amounts are
+# bounded by the columns they are stored in, so nothing that passes
+# validation can fail on INSERT.
+NonEmptyStr = Annotated[str, msgspec.Meta(min_length=1)]
+Items = Annotated[list, msgspec.Meta(min_length=1)]
+# Fits an Integer column
+PositiveInt = Annotated[int, msgspec.Meta(gt=0, le=2147483647)]
+BranchName = Annotated[str, msgspec.Meta(min_length=1, max_length=100)]
+DepartmentName = Annotated[str, msgspec.Meta(min_length=1, max_length=100)]
+PayeeName = Annotated[str, msgspec.Meta(min_length=1, max_length=100)]
+AccountNumber = Annotated[str, msgspec.Meta(min_length=1, max_length=20)]
+# Largest value the Numeric(10, 2) amount columns hold
+MAX_AMOUNT = Decimal('99999999.99')
+
+
+class SchemaValidationError(ValueError):
+    """Raised when a payload does not match its schema.
+
+    errors is a list of {"field": ..., "message": ...} dicts.
+    """
+
+    def __init__(self, errors):
+        super().__init__("; ".join(f"{e['field']}: {e['message']}" if e['field'] else e['message'] for e in errors))
+        self.errors = errors
+
+
+def amount_error(value, positive=False):
+    """Why a Decimal cannot be stored as an amount, or None if it can."""
+    if not value.is_finite():
+        return "Must be a finite number"
+    if positive and value <= 0:
+        return "Must be greater than 0"
+    if abs(value) > MAX_AMOUNT:
+        return f"Must be at most {MAX_AMOUNT}"
+    return None
+
+
+class Submission(msgspec.Struct, kw_only=True):
+    """Base class of the submission schemas."""
+    # Decimal fields that must be greater than zero
+    positive_fields: ClassVar[tuple] = ()
+    # Fields posted as JSON text inside multipart forms
+    form_json_fields: ClassVar[tuple] = ()
+    # Checkboxes: present (any value but "false") when ticked, absent otherwise
+    form_checkbox_fields: ClassVar[tuple] = ()
+
+    def __post_init__(self):
+        for name in self.__struct_fields__:
+            value = getattr(self, name)
+            if isinstance(value, Decimal):
+                error = amount_error(value, positive=name in self.positive_fields)
+                if error:
+                    raise ValueError(f"`{name}`: {error}")
+
+
+class PettyCashAdvanceIn(Submission):
+    positive_fields: ClassVar[tuple] = ('total_amount',)
+
+    branch: BranchName
+    department: DepartmentName
+    name: PayeeName
+    account: AccountNumber
+    items: Items
+    description: NonEmptyStr
+    total_amount: Decimal
+
+
+class PettyCashRetirementIn(Submission):
+    positive_fields: ClassVar[tuple] = ('amount', 'total_amount')
+    form_json_fields: ClassVar[tuple] = ('items',)
+
+    branch: BranchName
+    department: DepartmentName
+    name: PayeeName
+    account: AccountNumber
+    items: Items
+    description: NonEmptyStr
+    amount: Decimal
+    total_amount: Decimal
+
+
+class CashAdvanceIn(Submission, kw_only=True):
+    positive_fields: ClassVar[tuple] = ('invoice_amount', 'amount')
+    form_checkbox_fields: ClassVar[tuple] = ('cash_advance',)
+
+    branch: BranchName
+    department: DepartmentName
+    name: PayeeName
+    account: AccountNumber
+    invoice_amount: Decimal
+    cash_advance: bool = False
+    narration: NonEmptyStr
+    less_what: Optional[Decimal] = None
+    amount: Decimal
+
+
+class OpexCapexRetirementIn(Submission, kw_only=True):
+    positive_fields: ClassVar[tuple] = ('invoice_amount', 'amount')
+    form_checkbox_fields: ClassVar[tuple] = ('cash_advance', 'refund_reimbursement')
+
+    branch: BranchName
+    department: DepartmentName
+    name: PayeeName
+    account: AccountNumber
+    invoice_amount: Decimal
+    cash_advance: bool = False
+    narration: NonEmptyStr
+    refund_reimbursement: bool = False
+    less_what: Optional[Decimal] = None
+    amount: Decimal
+
+
+class StationeryRequestIn(Submission):
+    positive_fields: ClassVar[tuple] = ('total_amount',)
+
+    branch: BranchName
+    department: DepartmentName
+    description: NonEmptyStr
+    quantity: PositiveInt
+    items: Items
+    total_amount: Decimal
+
+
+SCHEMAS = (PettyCashAdvanceIn, PettyCashRetirementIn, CashAdvanceIn, OpexCapexRetirementIn, StationeryRequestIn)
+_decoders = {schema: msgspec.json.Decoder(schema) for schema in SCHEMAS}
+
+
+def _field_errors(schema, data):
+    """Check every field separately so a bad payload reports all of its problems.
+
+    Only runs after the single-pass decode has failed.
+    """
+    errors = []
+    values = {}
+    for field in msgspec.structs.fields(schema):
+        if field.encode_name not in data:
+            if field.required:
+                errors.append({"field": field.encode_name, "message": "This field is required"})
+            continue
+        try:
+            values[field.name] = msgspec.convert(data[field.encode_name], field.type, strict=False)
+        except msgspec.ValidationError as e:
+            errors.append({"field": field.encode_name, "message": str(e).split(' - at ')[0]})
+    for name, value in values.items():
+        if isinstance(value, Decimal):
+            error = amount_error(value, positive=name in schema.positive_fields)
+            if error:
+                errors.append({"field": name, "message": error})
+    return errors
+
+
+def _raise_for(schema, data, error):
+    errors = _field_errors(schema, data) if isinstance(data, dict) else []
+    raise SchemaValidationError(errors or [{"field": None, "message": str(error)}])
+
+
+def parse_json(schema, body):
+    """Decode and validate a raw JSON body.
+
+    Args:
+        schema: One of the submission schemas, e.g. PettyCashAdvanceIn.
+        body (bytes): The request body.
+
+    Returns:
+        The validated struct.
+
+    Raises:
+        SchemaValidationError: If the body is not valid JSON or does not match the schema.
+    """
+    try:
+        return _decoders[schema].decode(body)
+    except msgspec.DecodeError as e:
+        try:
+            data = msgspec.json.decode(body)
+        except msgspec.DecodeError:
+            raise SchemaValidationError([{"field": None, "message": "Invalid JSON"}])
+        _raise_for(schema, data, e)
+
+
+def parse_form(schema, form):
+    """Validate a submitted form against a schema, converting strings to the field types.
+
+    Args:
+        schema: One of the submission schemas.
+        form: The request's form (a MultiDict).
+
+    Returns:
+        The validated struct.
+
+    Raises:
+        SchemaValidationError: If the form does not match the schema.
+    """
+    data = form.to_dict()
+    # Like WTForms' Optional(), an empty optional field counts as not sent
+    for field in msgspec.structs.fields(schema):
+        if not field.required and data.get(field.encode_name) == '':
+            del data[field.encode_name]
+    for name in schema.form_checkbox_fields:
+        data[name] = data.get(name, 'false').lower() != 'false'
+    for name in schema.form_json_fields:
+        if name in data:
+            try:
+                data[name] = msgspec.json.decode(data[name])
+            except msgspec.DecodeError:
+                raise SchemaValidationError([{"field": name, "message": "Must be a JSON list"}])
+    try:
+        return msgspec.convert(data, schema, strict=False)
+    except msgspec.ValidationError as e:
+        _raise_for(schema, data, e)
@@ -0,0 +1,222 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional
+from flask import current_app
+from flask.json.provider import JSONProvider
+import msgspec
+from sqlalchemy.orm import joinedload
+from models import (
+    User, CashAdvance, OpexCapexRetirement, PettyCashAdvance,
+    PettyCashRetirement, StationaryRequest
+)
+
+# Response shapes are msgspec Structs encoded straight to JSON bytes, so a
+# listing is one encode call instead of a dict per row plus jsonify.
+# Decimals are encoded as strings and datetimes as ISO 8601, as to_dict() does.
+def _enc_hook(obj):
+    """Encode the few types msgspec has no native support for, as Flask's encoder does."""
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
+_decoder = msgspec.json.Decoder()
+
+
+class UserOut(msgspec.Struct):
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    role_id: Optional[int]
+    role: Optional[str]
+    department_id: Optional[int]
+    department: Optional[str]
+    is_active: Optional[bool]
+    email_verified: Optional[bool]
+    created_at: Optional[datetime]
+
+
+class CashAdvanceOut(msgspec.Struct):
+    id: int
+    officer_id: int
+    requester: Optional[str]
+    branch: str
+    department: Optional[str]
+    amount: Decimal
+    purpose: str
+    status: Optional[str]
+    version: int
+    created_at: Optional[datetime]
+
+
+class OpexCapexRetirementOut(msgspec.Struct):
+    id: int
+    created_by: Optional[int]
+    requester: Optional[str]
+    branch: str
+    department: Optional[str]
+    payee_name: str
+    payee_account_number: str
+    invoice_amount: Decimal
+    total_amount: Decimal
+    description: Optional[str]
+    status: Optional[str]
+    version: int
+    created_at: Optional[datetime]
+
+
+class PettyCashAdvanceOut(msgspec.Struct):
+    id: int
+    officer_id: int
+    requester: Optional[str]
+    branch: str
+    department: Optional[str]
+    description: Optional[str]
+    items: Any
+    total_amount: Decimal
+    status: Optional[str]
+    version: int
+    created_at: Optional[datetime]
+
+
+class PettyCashRetirementOut(msgspec.Struct):
+    id: int
+    created_by: Optional[int]
+    requester: Optional[str]
+    branch: str
+    department: Optional[str]
+    description: Optional[str]
+    items: Any
+    total_amount: Decimal
+    status: Optional[str]
+    version: int
+    created_at: Optional[datetime]
+
+
+class StationaryRequestOut(msgspec.Struct):
+    id: int
+    created_by: Optional[int]
+    requester: Optional[str]
+    branch: str
+    department: Optional[str]
+    description: Optional[str]
+    quantity: Optional[int]
+    items: Any
+    total_amount: Decimal
+    status: Optional[str]
+    version: int
+    created_at: Optional[datetime]
+
+
+class NotificationOut(msgspec.Struct):
+    id: int
+    message: str
+    is_read: bool
+    created_at: datetime
+
+
+class AuditLogOut(msgspec.Struct):
+    id: int
+    action: str
+    entity_type: str
+    entity_id: Optional[int]
+    performed_by: int
+    performed_at: datetime
+
+
+class InboxItemOut(msgspec.Struct):
+    request_type: str
+    id: int
+    branch: str
+    department: Optional[str]
+    amount: Decimal
+    description: Optional[str]
+    status: Optional[str]
+    version: int
+    requester_id: Optional[int]
+    created_at: Optional[datetime]
+
+
+# Relationships each serializer reads. They are all many-to-one, so they are
+# joined into the main query rather than loaded per row.
+USER_LOAD_OPTIONS = (joinedload(User.role), joinedload(User.department))
+
+# model: (output struct, requester relationship)
+REQUEST_SERIALIZERS = {
+    CashAdvance: (CashAdvanceOut, CashAdvance.officer),
+    OpexCapexRetirement: (OpexCapexRetirementOut, OpexCapexRetirement.created_by_user),
+    PettyCashAdvance: (PettyCashAdvanceOut, PettyCashAdvance.officer),
+    PettyCashRetirement: (PettyCashRetirementOut, PettyCashRetirement.created_by_user),
+    StationaryRequest: (StationaryRequestOut, StationaryRequest.created_by_user),
+}
+
+
+def _build(struct_type, obj, **overrides):
+    """Copy the struct's fields from a model instance or a Core result row."""
+    return struct_type(**{
+        name: overrides[name] if name in overrides else getattr(obj, name)
+        for name in struct_type.__struct_fields__
+    })
+
+
+def request_load_options(model):
+    """Loader options for serializing instances of a request model."""
+    return (joinedload(REQUEST_SERIALIZERS[model][1]),)
+
+
+def serialize_user(user):
+    return _build(
+        UserOut, user,
+        role=user.role.name if user.role else None,
+        department=user.department.name if user.department else None
+    )
+
+
+def serialize_request(obj):
+    struct_type, relationship = REQUEST_SERIALIZERS[type(obj)]
+    requester = getattr(obj, relationship.key)
+    return _build(struct_type, obj, requester=requester.username if requester else None)
+
+
+def serialize_notification(notification):
+    return _build(NotificationOut, notification)
+
+
+def serialize_audit_entry(entry):
+    return _build(AuditLogOut, entry)
+
+
+def serialize_rows(struct_type, rows):
+    """Convert Core result rows (e.g. the inbox UNION) without building ORM objects."""
+    return [_build(struct_type, row) for row in rows]
+
+
+def json_response(payload, status=200):
+    """Encode structs (or plain containers of them) into a JSON response."""
+    return current_app.response_class(_encoder.encode(payload), status=status, mimetype='application/json')
+
+
+class MsgspecJSONProvider(JSONProvider):
+    """Flask JSON provider backed by msgspec.
+
+    Installed as app.json, so jsonify() and request.get_json() also skip
+    the standard library json module.
+    """
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return _encoder.encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        try:
+            return _decoder.decode(s)
+        except msgspec.DecodeError as e:
+            # Flask turns ValueError into a 400 Bad Request
+            raise ValueError(str(e)) from e
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(_encoder.encode(obj), mimetype=self.mimetype)
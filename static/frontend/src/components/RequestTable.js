@@ -1,37 +1,79 @@
 import React, { useEffect, useState } from 'react';
 
+const FIELDS = 'id,amount,purpose,status,request_date';
+const PAGE_SIZE = 50;
+
 const RequestTable = () => {
   const [requests, setRequests] = useState([]);
+  const [sort, setSort] = useState('-request_date');
+  const [status, setStatus] = useState('');
+  // Cursors of the pages visited so far; the last one is the current page
+  const [cursors, setCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
+
+  const cursor = cursors[cursors.length - 1];
 
   useEffect(() => {
-    fetch('/api/requests')
+    const params = new URLSearchParams({ fields: FIELDS, sort, limit: PAGE_SIZE });
+    if (status) params.set('status', status);
+    if (cursor) params.set('cursor', cursor);
+
+    // The browser revalidates with If-None-Match and reuses its copy on a 304
+    fetch(`/api/requests?${params}`, { credentials: 'include' })
       .then(response => response.json())
-      .then(data => setRequests(data));
-  }, []);
+      .then(data => {
+        setRequests(data.items || []);
+        setNextCursor(data.next_cursor);
+      });
+  }, [sort, status, cursor]);
+
+  const sortBy = (key) => {
+    setSort(sort === `-${key}` ? key : `-${key}`);
+    setCursors([null]);
+  };
+
+  const filterByStatus = (value) => {
+    setStatus(value);
+    setCursors([null]);
+  };
 
   return (
-    <table>
-      <thead>
-        <tr>
-          <th>Request ID</th>
-          <th>Amount</th>
-          <th>Purpose</th>
-          <th>Status</th>
-          <th>Date</th>
-        </tr>
-      </thead>
-      <tbody>
-        {requests.map((request) => (
-          <tr key={request.id}>
-            <td>{request.id}</td>
-            <td>{request.amount}</td>
-            <td>{request.purpose}</td>
-            <td>{request.status}</td>
-            <td>{new Date(request.request_date).toLocaleDateString()}</td>
+    <div>
+      <label>Status</label>
+      <select value={status} onChange={(e) => filterByStatus(e.target.value)}>
+        <option value="">All</option>
+        <option value="Pending">Pending</option>
+        <option value="Returned to Officer">Returned to Officer</option>
+        <option value="Authorized by Supervisor">Authorized by Supervisor</option>
+        <option value="Reviewed by Reviewer">Reviewed by Reviewer</option>
+        <option value="Approved by Approver">Approved by Approver</option>
+        <option value="Payment Requested">Payment Requested</option>
+      </select>
+      <table>
+        <thead>
+          <tr>
+            <th onClick={() => sortBy('id')}>Request ID</th>
+            <th onClick={() => sortBy('amount')}>Amount</th>
+            <th>Purpose</th>
+            <th>Status</th>
+            <th onClick={() => sortBy('request_date')}>Date</th>
           </tr>
-        ))}
-      </tbody>
-    </table>
+        </thead>
+        <tbody>
+          {requests.map((request) => (
+            <tr key={request.id}>
+              <td>{request.id}</td>
+              <td>{request.amount}</td>
+              <td>{request.purpose}</td>
+              <td>{request.status}</td>
+              <td>{new Date(request.request_date).toLocaleDateString()}</td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+      <button disabled={cursors.length === 1} onClick={() => setCursors(cursors.slice(0, -1))}>Previous</button>
+      <button disabled={!nextCursor} onClick={() => setCursors([...cursors, nextCursor])}>Next</button>
+    </div>
   );
 };
 
@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import os
+import tempfile
+from werkzeug.utils import secure_filename
+from extensions import db
+from models import DocumentUploads, FileMetadata
+
+# Content-addressed blob store: uploads/blobs/<aa>/<bb>/<sha256>
+BLOB_ROOT = os.path.join('uploads', 'blobs')
+CHUNK_SIZE = 64 * 1024
+
+
+def blob_path(sha256):
+    """Return the storage path of a blob from its SHA-256 hex digest."""
+    return os.path.join(BLOB_ROOT, sha256[:2], sha256[2:4], sha256)
+
+
+def file_sha256(path):
+    """Hash a file on disk in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_blob(stream):
+    """Stream an upload to disk in fixed-size chunks while hashing it.
+
+    The data is written to a temporary file next to the blob store and then
+    atomically renamed to its content address. If a blob with the same digest
+    already exists the temporary copy is discarded, so duplicates take no
+    extra disk space.
+
+    Returns:
+        tuple: (sha256 hex digest, size in bytes, blob path)
+    """
+    os.makedirs(BLOB_ROOT, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, temp_path = tempfile.mkstemp(dir=BLOB_ROOT, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                temp_file.write(chunk)
+                size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        return sha256, size, path
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def file_type(file_name):
+    """The file's type as stored in FileMetadata: its lowercased extension.
+
+    The client's mimetype is not used: it is untrusted and the Office ones
+    are longer than the column.
+    """
+    extension = os.path.splitext(file_name)[1].lstrip('.').lower() or 'bin'
+    return extension[:FileMetadata.file_type.type.length]
+
+
+def store_upload(file_storage, uploaded_by):
+    """Store an uploaded file and record it in DocumentUploads and FileMetadata.
+
+    The rows are added to the current session; the caller commits them with
+    the request they belong to.
+
+    Args:
+        file_storage (FileStorage): The uploaded file from request.files.
+        uploaded_by (int): The ID of the uploading user.
+
+    Returns:
+        DocumentUploads: The new upload record.
+    """
+    file_name = secure_filename(file_storage.filename or '') or 'upload'
+    sha256, size, path = _write_blob(file_storage.stream)
+    logging.info(f"Stored upload {file_name} ({size} bytes) as {sha256}")
+
+    document = DocumentUploads(
+        file_name=file_name,
+        file_path=path,
+        sha256=sha256,
+        uploaded_by=uploaded_by
+    )
+    db.session.add(document)
+    db.session.info.setdefault('uploaded_blobs', set()).add(sha256)  # Rendered after commit
+    db.session.add(FileMetadata(
+        file_name=file_name,
+        file_type=file_type(file_name),
+        file_size=size,
+        document=document
+    ))
+    return document
@@ -0,0 +1,95 @@
+import logging
+import secrets
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from extensions import db
+
+# Generation counters for tables whose listings are served with ETags.
+# table_versions:<table> is incremented when a transaction that wrote to the
+# table commits, so a listing's ETag can be derived from the counter and
+# checked against If-None-Match before running any query.
+VERSIONED_TABLES = ('cash_advance',)
+
+# Shared Redis client (decode_responses=True); set by init_table_versions() in create_app.
+# Without Redis, versions are unavailable and callers fall back to hashing
+# the response body.
+_redis = None
+
+
+def init_table_versions(redis_client):
+    global _redis
+    _redis = redis_client
+
+
+def _key(table):
+    return f"table_versions:{table}"
+
+
+def table_version(table):
+    """Return the table's current generation, or None when Redis is unavailable."""
+    if _redis is None:
+        return None
+    try:
+        key = _key(table)
+        version = _redis.get(key)
+        if version is None:
+            # Start from a random value, so ETags issued before the key was
+            # lost never match again
+            _redis.set(key, secrets.randbelow(2 ** 62), nx=True)
+            version = _redis.get(key)
+        return version
+    except RedisError as e:
+        logging.warning(f"Table version read failed for {table}: {e}")
+        return None
+
+
+def bump_table_versions(tables):
+    """Start a new generation of each versioned table in tables.
+
+    Called after the writes are committed. Core writes made outside the
+    session (e.g. bulk imports) must call it themselves.
+    """
+    tables = [table for table in tables if table in VERSIONED_TABLES]
+    if _redis is None or not tables:
+        return
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        for table in tables:
+            pipe.incr(_key(table))
+        pipe.execute()
+    except RedisError as e:
+        logging.warning(f"Table version bump failed for {', '.join(tables)}: {e}")
+
+
+# Collect the versioned tables a transaction writes to and bump them only
+# once it commits, so readers never cache a page that might still roll back.
+def _changed_tables(session):
+    return session.info.setdefault('changed_tables', set())
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_flushed_tables(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table in VERSIONED_TABLES:
+            _changed_tables(session).add(table)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _track_bulk_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.local_table.name in VERSIONED_TABLES:
+            _changed_tables(orm_execute_state.session).add(mapper.local_table.name)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_on_commit(session):
+    tables = session.info.pop('changed_tables', None)
+    if tables:
+        bump_table_versions(tables)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changed_tables(session):
+    session.info.pop('changed_tables', None)
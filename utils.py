@@ -1,23 +1,22 @@
 from models import User, Role, Branch, Department, Notification, AuditLog
 from datetime import datetime
+from sqlalchemy import tuple_
 from sqlalchemy.exc import SQLAlchemyError
 import logging
-from flask_caching import Cache
 from PIL import Image
 import pdf2image
 import os
-from flask_mail import Message  
-from extensions import db, mail  # Import db from extensions.py
+import base64
+from extensions import db  # Import db from extensions.py
+from directory import get_role_id_by_name, get_supervisor  # Cached role/supervisor lookups
+from rendering import RENDER_MAX_PAGES, RENDER_DPI
+from storage import file_sha256
 from models import User  # Only import models you need
-from flask import request, jsonify
 
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# Initialize caching (assuming cache configuration is done elsewhere)
-cache = Cache()
-
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
 
 def allowed_file(filename):
@@ -29,7 +28,8 @@ def convert_pdf_to_image(pdf_path, output_folder='converted_images'):
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
     try:
-        images = pdf2image.convert_from_path(pdf_path)
+        # Only the first page is saved, so only the first page is rasterised
+        images = pdf2image.convert_from_path(pdf_path, first_page=1, last_page=1)
         image_path = os.path.join(output_folder, os.path.basename(pdf_path).replace(".pdf", ".jpg"))
         images[0].save(image_path, 'JPEG')
         return image_path
@@ -41,6 +41,7 @@ def resize_image(image_path, max_size=(800, 800)):
     """Resize an image to a maximum size while maintaining aspect ratio."""
     try:
         img = Image.open(image_path)
+        img.draft(img.mode, max_size)  # Decode JPEGs at reduced scale
         img.thumbnail(max_size)
         img.save(image_path)
     except Exception as e:
@@ -48,43 +49,6 @@ def resize_image(image_path, max_size=(800, 800)):
         raise
 
 
-def send_email(subject, recipients, body):
-    """Send an email notification."""
-    try:
-        msg = Message(subject, recipients=recipients, body=body)
-        mail.send(msg)
-    except Exception as e:
-        print(f"Error sending email: {e}")
-
-
-def get_role_id_by_name(role_name):
-    """Fetch the role ID based on the role name."""
-    role = Role.query.filter_by(name=role_name).first()
-    return role.id if role else None
-
-
-@cache.cached(timeout=60, key_prefix='supervisor_by_department')
-def get_supervisor(department_id):
-    """Fetch the supervisor for a given department.
-
-    Args:
-        department_id (int): The ID of the department.
-
-    Returns:
-        User: The supervisor User object or None if not found.
-    """
-    try:
-        SUPERVISOR_ROLE_ID = get_role_id_by_name('Supervisor')
-        supervisor = User.query.filter_by(department_id=department_id, role_id=SUPERVISOR_ROLE_ID).first()
-        if supervisor:
-            logging.info(f"Supervisor found for department {department_id}: {supervisor.username}")
-        else:
-            logging.warning(f"No supervisor found for department {department_id}.")
-        return supervisor
-    except SQLAlchemyError as e:
-        logging.error(f"Error fetching supervisor for department {department_id}: {e}")
-        return None
-
 def send_notification(user_id, message, notification_type='email'):
     """Send a notification to the user.
 
@@ -112,18 +76,6 @@ def send_notification(user_id, message, notification_type='email'):
     except Exception as e:
         logging.error(f"Failed to send notification to user {user_id}: {e}")
 
-def get_role_id_by_name(role_name):
-    """Fetch role ID by role name.
-
-    Args:
-        role_name (str): The name of the role.
-
-    Returns:
-        int: The ID of the role or None if not found.
-    """
-    role = Role.query.filter_by(name=role_name).first()
-    return role.id if role else None
-
 def get_officer_role_id():
     """Fetch the Officer role ID."""
     return get_role_id_by_name('Officer')
@@ -148,12 +100,18 @@ def get_super_admin_role_id():
     """Fetch the Super Admin role ID."""
     return get_role_id_by_name('Super Admin')
 
-def convert_pdf_to_image_v2(pdf_path):
-    """Convert PDF to images and return paths of the images.""" 
-    images = pdf2image.convert_from_path(pdf_path)
+def convert_pdf_to_image_v2(pdf_path, max_pages=RENDER_MAX_PAGES, dpi=RENDER_DPI):
+    """Convert the first pages of a PDF to images and return paths of the images.
+
+    The pages are written to uploads/pages/<sha256 of the PDF>, so files with
+    the same name in different directories do not overwrite each other.
+    """
+    images = pdf2image.convert_from_path(pdf_path, dpi=dpi, first_page=1, last_page=max_pages)
+    output_folder = os.path.join('uploads', 'pages', file_sha256(pdf_path))
+    os.makedirs(output_folder, exist_ok=True)
     image_paths = []
     for i, image in enumerate(images):
-        image_path = f'uploads/page_{i + 1}.png'  # Save each page as a PNG
+        image_path = os.path.join(output_folder, f'page_{i + 1}.png')  # Save each page as a PNG
         image.save(image_path, 'PNG')
         image_paths.append(image_path)
     return image_paths
@@ -189,14 +147,74 @@ def populate_branches_and_departments():
 
         db.session.commit()
 
-def validate_json(required_fields):
-    """Validate incoming JSON payloads."""
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Invalid JSON"}), 400
+def encode_cursor(created_at, row_id):
+    """Encode a keyset position (created_at, id) as an opaque URL-safe cursor."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# Keyset sort columns are NOT NULL, so the row-value comparison can use an
+# index on (..., sort column, id) as a range bound
+def keyset_order(sort_column, id_column, descending=False):
+    """ORDER BY clauses for a (sort value, id) keyset."""
+    if descending:
+        return sort_column.desc(), id_column.desc()
+    return sort_column.asc(), id_column.asc()
+
+
+def keyset_after(sort_column, id_column, sort_value, row_id, descending=False):
+    """WHERE clause for the rows after the position (sort_value, row_id) in keyset_order()."""
+    position, after = tuple_(sort_column, id_column), tuple_(sort_value, row_id)
+    return position < after if descending else position > after
+
 
-    missing_fields = [field for field in required_fields if field not in data]
-    if missing_fields:
-        return jsonify({"error": f"Missing fields: {', '.join(missing_fields)}"}), 400
+def keyset_page(query, created_column, id_column, cursor=None, limit=50):
+    """Restrict a query to one (created_at, id) keyset page plus one look-ahead row.
+
+    Works on both ORM queries and select() statements.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    if cursor:
+        after_created, after_id = decode_cursor(cursor)
+        query = query.filter(keyset_after(created_column, id_column, after_created, after_id))
+    return query.order_by(*keyset_order(created_column, id_column)).limit(limit + 1)
+
+
+def keyset_paginate(query, created_column, id_column, cursor=None, limit=50):
+    """Fetch one page of a query ordered by (created_at, id), oldest first.
+
+    The page is located with a WHERE (created_at, id) > cursor predicate
+    instead of OFFSET, so every page costs the same however deep it is.
+
+    Args:
+        query: The filtered SQLAlchemy query.
+        created_column: The created_at column to order by.
+        id_column: The primary key column used as the tie-breaker.
+        cursor (str): The next_cursor of the previous page, or None for the first page.
+        limit (int): The page size.
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page.
+    """
+    rows = keyset_page(query, created_column, id_column, cursor, limit).all()
+    if len(rows) <= limit:
+        return rows, None
 
-    return data
\ No newline at end of file
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
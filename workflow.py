@@ -0,0 +1,224 @@
+import logging
+from collections import defaultdict
+from sqlalchemy import select, update
+from audit import record
+from extensions import db
+from mail_queue import queue_email
+from models import (
+    ExpenseStatus, User, CashAdvance, OpexCapexRetirement, PettyCashAdvance,
+    PettyCashRetirement, StationaryRequest
+)
+from notifications import notify
+from reporting import summarize_status_change
+
+# Column holding the user who raised each kind of request
+REQUESTER_COLUMNS = {
+    CashAdvance: CashAdvance.officer_id,
+    OpexCapexRetirement: OpexCapexRetirement.created_by,
+    PettyCashAdvance: PettyCashAdvance.officer_id,
+    PettyCashRetirement: PettyCashRetirement.created_by,
+    StationaryRequest: StationaryRequest.created_by,
+}
+
+# Approval chain: Officer -> Supervisor -> Reviewer -> Approver -> Payment Requested.
+# (role, action): (required current status, new status). Every transition is
+# a single lookup here followed by one conditional UPDATE.
+TRANSITIONS = {
+    ('Supervisor', 'approve'): (ExpenseStatus.PENDING, ExpenseStatus.AUTHORIZED_BY_SUPERVISOR),
+    ('Supervisor', 'reject'): (ExpenseStatus.PENDING, ExpenseStatus.RETURNED_TO_OFFICER),
+    ('Reviewer', 'approve'): (ExpenseStatus.AUTHORIZED_BY_SUPERVISOR, ExpenseStatus.REVIEWED_BY_REVIEWER),
+    ('Reviewer', 'reject'): (ExpenseStatus.AUTHORIZED_BY_SUPERVISOR, ExpenseStatus.RETURNED_TO_OFFICER),
+    ('Approver', 'approve'): (ExpenseStatus.REVIEWED_BY_REVIEWER, ExpenseStatus.APPROVED_BY_APPROVER),
+    ('Approver', 'reject'): (ExpenseStatus.REVIEWED_BY_REVIEWER, ExpenseStatus.RETURNED_TO_OFFICER),
+    ('Approver', 'request_payment'): (ExpenseStatus.APPROVED_BY_APPROVER, ExpenseStatus.PAYMENT_REQUESTED),
+    ('Officer', 'resubmit'): (ExpenseStatus.RETURNED_TO_OFFICER, ExpenseStatus.PENDING),
+}
+TRANSITIONS = {key: (source.value, target.value) for key, (source, target) in TRANSITIONS.items()}
+
+# Status of the requests waiting on each reviewing role
+QUEUE_STATUS = {role: source for (role, action), (source, _) in TRANSITIONS.items() if action == 'approve'}
+WORKFLOW_ROLES = {role for role, _ in TRANSITIONS}
+
+# Status values accepted by the original single-request API
+LEGACY_ACTIONS = {'Approved': 'approve', 'Rejected': 'reject'}
+
+
+class InvalidTransitionError(ValueError):
+    """Raised when a role cannot perform an action."""
+
+
+class RequestNotFoundError(LookupError):
+    """Raised when a request does not exist or is not visible to the actor."""
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when a request changed between being read and being updated."""
+
+
+def resolve_transition(role, action):
+    """Return (required status, new status) for a role's action.
+
+    Raises:
+        InvalidTransitionError: If the role cannot perform the action.
+    """
+    try:
+        return TRANSITIONS[(role, action)]
+    except KeyError:
+        allowed = sorted(a for r, a in TRANSITIONS if r == role)
+        raise InvalidTransitionError(f"{role} cannot {action}; allowed actions: {', '.join(allowed) or 'none'}")
+
+
+def _visible(model, statement, actor, department):
+    """Restrict a statement to requests the actor may act on."""
+    if department is not None:
+        statement = statement.where(model.department == department)
+    if actor.role.name == 'Officer':
+        statement = statement.where(REQUESTER_COLUMNS[model] == actor.id)
+    return statement
+
+
+def transition(model, request_id, action, actor, department=None, expected_version=None):
+    """Apply one workflow action to a request.
+
+    The change is a single UPDATE ... WHERE id = :id AND status = :expected
+    (and version = :expected_version when given) that also bumps the version,
+    so two reviewers acting at once cannot both apply a transition. The
+    dashboard rollup is updated in the same transaction. The caller commits.
+
+    Args:
+        model: The request model, e.g. CashAdvance.
+        request_id (int): The request to change.
+        action (str): 'approve', 'reject', 'request_payment' or 'resubmit'.
+        actor (User): The user making the change.
+        department (str): Only requests from this department may change, or None.
+        expected_version (int): The version the client last saw, or None.
+
+    Returns:
+        tuple: (new status, new version)
+
+    Raises:
+        InvalidTransitionError: If the actor's role cannot perform the action.
+        RequestNotFoundError: If the request does not exist or is not visible.
+        ConcurrentUpdateError: If the request is not in the required status or version.
+    """
+    source, target = resolve_transition(actor.role.name, action)
+
+    statement = update(model).where(model.id == request_id, model.status == source)
+    if expected_version is not None:
+        statement = statement.where(model.version == expected_version)
+    statement = _visible(model, statement, actor, department).values(
+        status=target, version=model.version + 1
+    ).execution_options(synchronize_session=False)
+
+    if db.session.execute(statement).rowcount != 1:
+        current = db.session.execute(
+            _visible(model, select(model.status, model.version).where(model.id == request_id), actor, department)
+        ).first()
+        if current is None:
+            raise RequestNotFoundError(f"Request {request_id} not found")
+        raise ConcurrentUpdateError(
+            f"Request {request_id} is {current.status} (version {current.version}); "
+            f"{action} requires {source}" + (f" at version {expected_version}" if expected_version is not None else "")
+        )
+
+    summarize_status_change(model, [request_id], source, target)
+
+    requester_column = REQUESTER_COLUMNS[model]
+    row = db.session.execute(
+        select(model.version, requester_column.label('requester_id'), User.email)
+        .outerjoin(User, User.id == requester_column)
+        .where(model.id == request_id)
+    ).one()
+
+    record(f"Status changed from {source} to {target}", model.__name__, request_id, actor.id)
+    if row.requester_id is not None and row.requester_id != actor.id:
+        notify(row.requester_id, f"Your request (ID: {request_id}) is now {target}.")
+        if row.email:
+            queue_email(
+                "Request Status Updated",
+                [row.email],
+                f"Your request (ID: {request_id}) is now {target} ({actor.role.name})."
+            )
+    return target, row.version
+
+
+def bulk_transition(model, ids, action, actor, department=None):
+    """Apply one workflow action to many requests of one type in a single transaction.
+
+    The requests and their requesters are validated in one query and updated
+    with one UPDATE ... WHERE id IN (...) AND status = :expected. Audit
+    events go to the batched audit buffer, and each requester gets a single
+    notification and email listing all of their requests. The caller commits.
+
+    Args:
+        model: The request model, e.g. CashAdvance.
+        ids (list): Request IDs to update.
+        action (str): The workflow action, e.g. 'approve'.
+        actor (User): The user making the change.
+        department (str): Only requests from this department may change, or None.
+
+    Returns:
+        tuple: (new status, updated IDs, {id: reason} for IDs that were skipped)
+
+    Raises:
+        InvalidTransitionError: If the actor's role cannot perform the action.
+        ConcurrentUpdateError: If another transaction changed one of the requests first.
+    """
+    source, target = resolve_transition(actor.role.name, action)
+    requester_column = REQUESTER_COLUMNS[model]
+    rows = db.session.execute(_visible(
+        model,
+        select(model.id, model.status, requester_column.label('requester_id'), User.email)
+        .outerjoin(User, User.id == requester_column)
+        .where(model.id.in_(ids)),
+        actor, department
+    )).all()
+
+    found = {row.id: row for row in rows}
+    skipped = {}
+    valid = []
+    for request_id in ids:
+        row = found.get(request_id)
+        if row is None:
+            skipped[request_id] = "not found"
+        elif row.status != source:
+            skipped[request_id] = f"status is {row.status}"
+        else:
+            valid.append(request_id)
+
+    if not valid:
+        return target, [], skipped
+
+    result = db.session.execute(
+        update(model)
+        .where(model.id.in_(valid), model.status == source)
+        .values(status=target, version=model.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(valid):
+        raise ConcurrentUpdateError(
+            f"{len(valid) - result.rowcount} of {len(valid)} requests changed while being updated"
+        )
+
+    summarize_status_change(model, valid, source, target)
+    for request_id in valid:
+        record(f"Status changed from {source} to {target}", model.__name__, request_id, actor.id)
+
+    by_requester = defaultdict(list)
+    for request_id in valid:
+        row = found[request_id]
+        if row.requester_id is not None and row.requester_id != actor.id:
+            by_requester[(row.requester_id, row.email)].append(request_id)
+
+    for (requester_id, email), request_ids in by_requester.items():
+        listed = ', '.join(str(request_id) for request_id in request_ids)
+        notify(requester_id, f"{len(request_ids)} of your requests are now {target}: {listed}.")
+        if email:
+            queue_email(
+                "Request Status Updated",
+                [email],
+                f"Your requests (IDs: {listed}) are now {target} ({actor.role.name})."
+            )
+
+    logging.info(f"{actor.username} moved {len(valid)} {model.__name__} requests from {source} to {target}")
+    return target, valid, skipped